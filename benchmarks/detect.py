@@ -0,0 +1,58 @@
+# Benchmark for parsing references with language auto-detection (lang = 'auto'), compared with a known language
+# Usage: python benchmarks/detect.py [--count 2000] [--langs en,fr,es,ja,ko,ru]
+
+# Python standard libraries
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+# Internal imports
+from scripturelookup import data, lookup
+from sort import make_references
+
+
+def get_keys(references):
+  return [(reference.book_slug, reference.chapter, reference.verse_ranges) for reference in references]
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Language detection benchmark')
+  parser.add_argument('--count', type=int, default=2000, help='Number of references per language. Default: 2000.')
+  parser.add_argument('--langs', default='en,fr,es,ja,ko,ru', help='Comma-separated languages. Default: "en,fr,es,ja,ko,ru".')
+  args = parser.parse_args()
+  
+  # The first call includes building the automaton for all languages
+  start_time = time.perf_counter()
+  lookup.get_language_detector()
+  print(f'automaton {(time.perf_counter() - start_time) * 1000:,.1f} ms')
+  
+  all_labels = []
+  for lang in args.langs.split(','):
+    lang = data.get_bcp47(lang)
+    labels = [reference.label() for reference in make_references(args.count, lang = lang)]
+    all_labels.extend(labels)
+    input_string = '; '.join(labels)
+    
+    start_time = time.perf_counter()
+    known_references = lookup.parse_references_string(input_string, lang = lang)
+    known_time = time.perf_counter() - start_time
+    
+    start_time = time.perf_counter()
+    auto_references = lookup.parse_references_string(input_string, lang = 'auto')
+    auto_time = time.perf_counter() - start_time
+    
+    detected_count = sum(reference.lang == lang for reference in auto_references)
+    print(f'{lang:>10}  known {len(labels) / known_time:>10,.0f} references/sec  auto {len(labels) / auto_time:>10,.0f} references/sec  detected {detected_count:,} of {len(auto_references):,}')
+    if get_keys(auto_references) != get_keys(known_references):
+      sys.stdout.write(f'Warning: Auto-detection parsed different references than "{lang}"\n')
+  
+  # References in several languages, shuffled together
+  random.seed(1)
+  random.shuffle(all_labels)
+  start_time = time.perf_counter()
+  references = lookup.parse_references_string('; '.join(all_labels), lang = 'auto')
+  elapsed_time = time.perf_counter() - start_time
+  print(f'{"mixed":>10}  auto {len(all_labels) / elapsed_time:>10,.0f} references/sec  {len(references):,} references')
@@ -0,0 +1,87 @@
+# Benchmark for extracting chapter content from ChurchofJesusChrist.org pages, using saved pages in benchmarks/fixtures
+# Compares the built-in extractor with BeautifulSoup (if it's installed), and checks that both extract the same paragraphs
+# Usage: python benchmarks/extract.py [--seconds 2] [--chunk-size 16384]
+
+# Python standard libraries
+import os
+import sys
+import glob
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+# Internal imports
+from scripturelookup import extractor
+
+
+fixtures_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+# Extract paragraphs with the built-in extractor, as (verse number or None, text), feeding the page in chunks
+def extract_paragraphs(page_bytes, chunk_size):
+  chunks = (page_bytes[i:i + chunk_size] for i in range(0, len(page_bytes), chunk_size))
+  return list(extractor.iter_church_paragraphs(chunks))
+
+# Extract paragraphs with BeautifulSoup, the same way earlier versions did
+def extract_paragraphs_with_beautifulsoup(page_bytes, chunk_size):
+  from bs4 import BeautifulSoup
+  soup = BeautifulSoup(page_bytes.decode('utf-8'), 'html.parser')
+  paragraphs = []
+  for paragraph in soup.select('header [data-aid], .body-block [data-aid]'):
+    verse_number_span = paragraph.select_one('.verse-number')
+    verse_number = verse_number_span.text.strip() if verse_number_span else None
+    paragraphs.append((verse_number or None, paragraph.text.strip()))
+  return paragraphs
+
+# Get the time until the first verse is extracted, while the page is fed in chunks
+def get_first_verse_time(page_bytes, chunk_size):
+  start_time = time.perf_counter()
+  chunks = (page_bytes[i:i + chunk_size] for i in range(0, len(page_bytes), chunk_size))
+  for verse_number, text in extractor.iter_church_paragraphs(chunks):
+    if verse_number:
+      return time.perf_counter() - start_time
+  return None
+
+# Measure pages per second and peak memory allocated while extracting one page
+def run_benchmark(function, page_bytes, chunk_size, seconds = 2):
+  function(page_bytes, chunk_size)
+  count = 0
+  start_time = time.perf_counter()
+  while time.perf_counter() - start_time < seconds:
+    function(page_bytes, chunk_size)
+    count += 1
+  pages_per_second = count / (time.perf_counter() - start_time)
+  
+  tracemalloc.start()
+  function(page_bytes, chunk_size)
+  peak_memory = tracemalloc.get_traced_memory()[1]
+  tracemalloc.stop()
+  return pages_per_second, peak_memory
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Content extraction benchmark')
+  parser.add_argument('--seconds', type=float, default=2, help='Seconds to run each benchmark. Default: 2.')
+  parser.add_argument('--chunk-size', type=int, default=16384, help='Bytes fed to the extractor at a time. Default: 16384.')
+  args = parser.parse_args()
+  
+  try:
+    import bs4
+    extractors = (('extractor', extract_paragraphs), ('beautifulsoup', extract_paragraphs_with_beautifulsoup))
+  except ImportError:
+    sys.stdout.write('Warning: BeautifulSoup isn’t installed, so only the built-in extractor is measured.\n')
+    extractors = (('extractor', extract_paragraphs),)
+  
+  for path in sorted(glob.glob(os.path.join(fixtures_directory, '*.html'))):
+    with open(path, 'rb') as f:
+      page_bytes = f.read()
+    print(f'{os.path.basename(path)} ({len(page_bytes) / 1024:,.0f} KB, {len(extract_paragraphs(page_bytes, args.chunk_size))} paragraphs)')
+    outputs = []
+    for name, function in extractors:
+      outputs.append(function(page_bytes, args.chunk_size))
+      pages_per_second, peak_memory = run_benchmark(function, page_bytes, args.chunk_size, seconds = args.seconds)
+      print(f'  {name:<14} {pages_per_second:>8,.1f} pages/sec  {1000 / pages_per_second:>7.2f} ms/page  {peak_memory / 1024:>8,.0f} KB peak')
+    print(f'  first verse after {get_first_verse_time(page_bytes, args.chunk_size) * 1000:.2f} ms')
+    if any(output != outputs[0] for output in outputs):
+      sys.stdout.write(f'Warning: Extractors returned different paragraphs for {os.path.basename(path)}\n')
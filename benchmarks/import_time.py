@@ -0,0 +1,53 @@
+# Startup benchmark: measures how long it takes to import scripturelookup.lookup (using python -X importtime)
+# Exits with an error if importing loads metadata or slow third-party libraries, or takes longer than --max-ms
+# Usage: python benchmarks/import_time.py [--runs 5] [--max-ms 100]
+
+# Python standard libraries
+import os
+import sys
+import re
+import statistics
+import subprocess
+import argparse
+
+src_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+# Modules that should only be imported when they're needed
+deferred_modules = ('requests', 'bs4', 'html.parser', 'icu', 'sqlite3', 'concurrent.futures', 'multiprocessing')
+
+check_script = f'''
+import sys
+import scripturelookup.lookup
+from scripturelookup import data
+print('LOADED ' + ' '.join([m for m in {deferred_modules!r} if m in sys.modules] + (['metadata'] if 'scriptures' in vars(data) else [])))
+'''
+
+# Import scripturelookup.lookup in a new process, and return (cumulative import time in microseconds, modules or data that were loaded too early)
+def measure_import():
+  result = subprocess.run([sys.executable, '-X', 'importtime', '-c', check_script], cwd = src_directory, capture_output = True, text = True, check = True)
+  import_time = None
+  for line in result.stderr.splitlines():
+    match = re.match(r'^import time:\s+\d+ \|\s+(\d+) \| scripturelookup\.lookup$', line)
+    if match:
+      import_time = int(match.group(1))
+  loaded = result.stdout.strip()[len('LOADED'):].split()
+  return import_time, loaded
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Import time benchmark')
+  parser.add_argument('--runs', type=int, default=5, help='Number of imports to measure. Default: 5.')
+  parser.add_argument('--max-ms', type=float, default=100, help='Maximum median import time in milliseconds. Default: 100.')
+  args = parser.parse_args()
+  
+  import_times = []
+  loaded = []
+  for i in range(args.runs):
+    import_time, loaded = measure_import()
+    import_times.append(import_time)
+  median_ms = statistics.median(import_times) / 1000
+  print(f'import scripturelookup.lookup: {median_ms:.1f} ms (median of {args.runs})')
+  
+  if loaded:
+    sys.exit(f'Error: Importing scripturelookup.lookup loaded {", ".join(loaded)}.')
+  if median_ms > args.max_ms:
+    sys.exit(f'Error: Importing scripturelookup.lookup took longer than {args.max_ms} ms.')
@@ -0,0 +1,41 @@
+# Benchmark for formatting and parsing numbers in each numeral system
+# Compares the numeral system registry (cached lookups, format_many/parse_many) with calling each system's format function directly
+# Usage: python benchmarks/numerals.py [--seconds 1] [--max-number 200]
+
+# Python standard libraries
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+# Internal imports
+from scripturelookup import numbers
+
+
+# Run a function repeatedly for the given number of seconds, and return the number of calls per second
+def run_benchmark(function, seconds = 1):
+  function()
+  count = 0
+  start_time = time.perf_counter()
+  while time.perf_counter() - start_time < seconds:
+    function()
+    count += 1
+  return count / (time.perf_counter() - start_time)
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Numbers benchmark')
+  parser.add_argument('--seconds', type=float, default=1, help='Seconds to run each benchmark. Default: 1.')
+  parser.add_argument('--max-number', type=int, default=200, help='Format and parse numbers from 1 to this number. Default: 200.')
+  args = parser.parse_args()
+  
+  int_numbers = list(range(1, args.max_number + 1))
+  print(f'{"":>20} {"direct":>14} {"formatted":>14} {"format_many":>14} {"parse_many":>14}  (numbers/sec)')
+  for target_format, numeral_system in numbers.numeral_systems.items():
+    direct = run_benchmark(lambda: [numeral_system.format_function(n) for n in int_numbers], seconds = args.seconds)
+    formatted = run_benchmark(lambda: [numbers.get_formatted_number(n, target_format = target_format) for n in int_numbers], seconds = args.seconds)
+    format_many = run_benchmark(lambda: numbers.format_many(int_numbers, target_format = target_format), seconds = args.seconds)
+    formatted_numbers = numbers.format_many(int_numbers, target_format = target_format)
+    parse_many = run_benchmark(lambda: numbers.parse_many(formatted_numbers, advanced_conversion_types = ['chinese', 'geez', 'roman', 'alphabet']), seconds = args.seconds)
+    print(f'{target_format:>20} ' + ' '.join([f'{calls_per_second * len(int_numbers):>14,.0f}' for calls_per_second in (direct, formatted, format_many, parse_many)]))
@@ -0,0 +1,50 @@
+# Micro-benchmark for parsing scripture references
+# Usage: python benchmarks/parse.py [--seconds 3] [--lang en]
+
+# Python standard libraries
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+# Internal imports
+from scripturelookup import lookup
+
+
+sample_inputs = [
+  'John 3:16',
+  'Alma 32:21, 27–28',
+  'Moroni 10:3–5; Ether 12:27',
+  '1 Nephi 3:7',
+  'Genesis 1:1',
+  'Helaman 5:12',
+  '/scriptures/nt/john/3.16',
+  'https://www.churchofjesuschrist.org/study/scriptures/bofm/hel/5?id=p12&lang=eng#p12',
+]
+
+def run_benchmark(function, inputs, seconds = 3):
+  # Warm up
+  for input_string in inputs:
+    function(input_string)
+  
+  count = 0
+  start_time = time.perf_counter()
+  while time.perf_counter() - start_time < seconds:
+    for input_string in inputs:
+      function(input_string)
+      count += 1
+  return count / (time.perf_counter() - start_time)
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Parse benchmark')
+  parser.add_argument('--seconds', type=float, default=3, help='Seconds to run each benchmark. Default: 3.')
+  parser.add_argument('--lang', default='en', help='Language to parse in. Default: "en".')
+  args = parser.parse_args()
+  
+  for input_string in sample_inputs:
+    parses_per_second = run_benchmark(lambda s: lookup.parse_references_string(s, lang = args.lang), [input_string], seconds = args.seconds)
+    print(f'{parses_per_second:>10,.0f} parses/sec  {input_string}')
+  parses_per_second = run_benchmark(lambda s: lookup.parse_references_string(s, lang = args.lang), sample_inputs, seconds = args.seconds)
+  print(f'{parses_per_second:>10,.0f} parses/sec  (all inputs)')
@@ -0,0 +1,66 @@
+# Benchmark for finding references in free-form text
+# Usage: python benchmarks/scan.py [--size 1000000] [--langs en,fr,ja]
+
+# Python standard libraries
+import io
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+# Internal imports
+from scripturelookup import data, lookup
+from sort import make_references
+
+
+# Make reproducible text of about the given size, with a reference every few words
+def make_text(size, lang = 'en', seed = 1):
+  random.seed(seed)
+  words = ['and', 'the', 'of', 'to', 'see', 'also', 'in', 'that', 'we', 'read', 'chapter', 'verse', '12', 'job', 'is']
+  references = make_references(max(1, size // 60), lang = lang, seed = seed)
+  parts = []
+  length = 0
+  while length < size:
+    for i in range(random.randint(3, 12)):
+      parts.append(random.choice(words))
+      length += len(parts[-1]) + 1
+    parts.append(random.choice(references).label(abbreviated = random.random() < 0.3) + random.choice(['.', ',', ';', '']))
+    length += len(parts[-1]) + 1
+  return ' '.join(parts)[:size]
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Reference scanning benchmark')
+  parser.add_argument('--size', type=int, default=1000000, help='Number of characters of text. Default: 1000000.')
+  parser.add_argument('--langs', default='en,fr,ja', help='Comma-separated languages. Default: "en,fr,ja".')
+  args = parser.parse_args()
+  
+  for lang in args.langs.split(','):
+    lang = data.get_bcp47(lang)
+    text = make_text(args.size, lang = lang)
+    
+    # The first call includes building the automaton for the language
+    start_time = time.perf_counter()
+    list(lookup.find_references('', lang = lang))
+    build_time = time.perf_counter() - start_time
+    
+    start_time = time.perf_counter()
+    spans = list(lookup.find_references(text, lang = lang))
+    elapsed_time = time.perf_counter() - start_time
+    print(f'{lang:>10} string  {len(text) / elapsed_time:>12,.0f} characters/sec  {len(spans):>8,} references  (automaton {build_time * 1000:,.1f} ms)')
+    
+    start_time = time.perf_counter()
+    streamed_spans = list(lookup.find_references(io.StringIO(text), lang = lang, chunk_size = 8192))
+    elapsed_time = time.perf_counter() - start_time
+    print(f'{lang:>10} stream  {len(text) / elapsed_time:>12,.0f} characters/sec  {len(streamed_spans):>8,} references')
+    if [(start, end) for start, end, reference in streamed_spans] != [(start, end) for start, end, reference in spans]:
+      sys.stdout.write('Warning: Streaming found different references than scanning the whole string\n')
+    
+    # Time should grow linearly with the size of the text
+    for multiple in (2, 4):
+      start_time = time.perf_counter()
+      list(lookup.find_references(text * multiple, lang = lang))
+      elapsed_time = time.perf_counter() - start_time
+      print(f'{lang:>10} {multiple}x      {len(text) * multiple / elapsed_time:>12,.0f} characters/sec')
@@ -0,0 +1,89 @@
+# Benchmark for the HTTP server, run entirely on localhost
+# Usage: python benchmarks/serve.py [--count 2000] [--clients 4] [--batch-size 100] [--lang en]
+
+# Python standard libraries
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import http.client
+import urllib.parse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+# Internal imports
+from scripturelookup import data, server
+from sort import make_references
+
+
+# Send a request on a connection, returning the response status and JSON value
+def send_request(connection, method, path, value = None):
+  body = json.dumps(value).encode('utf-8') if value is not None else None
+  headers = {'Content-Type': 'application/json'} if body else {}
+  connection.request(method, path, body = body, headers = headers)
+  response = connection.getresponse()
+  return response.status, json.loads(response.read())
+
+# Send requests from several clients at once (each with its own connection), returning the latency of each request
+def run_clients(port, requests, clients):
+  latencies = []
+  latencies_lock = threading.Lock()
+  def run_client(client_requests):
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    client_latencies = []
+    for method, path, value in client_requests:
+      start_time = time.perf_counter()
+      status, response_value = send_request(connection, method, path, value)
+      client_latencies.append(time.perf_counter() - start_time)
+      if status != 200:
+        sys.stdout.write(f'Warning: {method} {path} returned {status}: {response_value}\n')
+    connection.close()
+    with latencies_lock:
+      latencies.extend(client_latencies)
+  threads = [threading.Thread(target = run_client, args = (requests[i::clients],)) for i in range(clients)]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+  return sorted(latencies)
+
+def report(name, count, elapsed_time, latencies):
+  print(f'{name:>26}  {count / elapsed_time:>10,.0f} references/sec  p50 {server.get_percentile(latencies, 50) * 1000:>7.2f} ms  p99 {server.get_percentile(latencies, 99) * 1000:>7.2f} ms')
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='HTTP server benchmark')
+  parser.add_argument('--count', type=int, default=2000, help='Number of references. Default: 2000.')
+  parser.add_argument('--clients', type=int, default=4, help='Number of clients sending requests at once. Default: 4.')
+  parser.add_argument('--batch-size', type=int, default=100, help='Number of inputs per batch request. Default: 100.')
+  parser.add_argument('--lang', default='en', help='Language. Default: "en".')
+  args = parser.parse_args()
+  lang = data.get_bcp47(args.lang)
+  
+  start_time = time.perf_counter()
+  http_server = server.make_server(port = 0, default_lang = lang, quiet = True)
+  print(f'startup {(time.perf_counter() - start_time) * 1000:,.1f} ms')
+  port = http_server.server_address[1]
+  threading.Thread(target = http_server.serve_forever, daemon = True).start()
+  
+  labels = [reference.label() for reference in make_references(args.count, lang = lang)]
+  
+  for command in ('get_label', 'get_church_url'):
+    requests = [('GET', f'/{command}?' + urllib.parse.urlencode({'input': label}), None) for label in labels]
+    start_time = time.perf_counter()
+    latencies = run_clients(port, requests, args.clients)
+    report(f'GET /{command}', len(labels), time.perf_counter() - start_time, latencies)
+    
+    batches = [labels[i:i + args.batch_size] for i in range(0, len(labels), args.batch_size)]
+    requests = [('POST', '/batch', {'command': command, 'inputs': batch}) for batch in batches]
+    start_time = time.perf_counter()
+    latencies = run_clients(port, requests, args.clients)
+    report(f'POST /batch {command}', len(labels), time.perf_counter() - start_time, latencies)
+  
+  # Latency percentiles measured by the server
+  connection = http.client.HTTPConnection('127.0.0.1', port)
+  print(json.dumps(send_request(connection, 'GET', '/stats')[1], indent = 2))
+  connection.close()
+  http_server.shutdown()
+  http_server.server_close()
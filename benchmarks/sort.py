@@ -0,0 +1,49 @@
+# Benchmark for sorting large lists of scripture references
+# Usage: python benchmarks/sort.py [--count 100000] [--langs en,fr,ja,cmn-Hant,ru]
+
+# Python standard libraries
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+# Internal imports
+from scripturelookup import data, lookup
+
+
+# Make a reproducible list of references spread across all books (about 1 in 10 without verses)
+def make_references(count, lang = 'en', seed = 1):
+  random.seed(seed)
+  books = []
+  for publication_slug, publication_info in data.scriptures['structure'].items():
+    for book_slug, book_info in publication_info['books'].items():
+      books.append((publication_slug, book_slug, book_info['churchChapters'] or [1]))
+  references = []
+  for i in range(count):
+    publication_slug, book_slug, chapters = random.choice(books)
+    verse = random.randint(1, 40)
+    verse_ranges = ((verse, verse + random.randint(0, 5)),) if random.random() < 0.9 else ()
+    references.append(lookup.Reference(lang = lang, publication_slug = publication_slug, book_slug = book_slug, chapter = random.choice(chapters), verse_ranges = verse_ranges))
+  return references
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Sort benchmark')
+  parser.add_argument('--count', type=int, default=100000, help='Number of references to sort. Default: 100000.')
+  parser.add_argument('--langs', default='en,fr,ja,cmn-Hant,ru', help='Comma-separated languages to sort in. Default: "en,fr,ja,cmn-Hant,ru".')
+  args = parser.parse_args()
+  
+  for lang in args.langs.split(','):
+    lang = data.get_bcp47(lang)
+    references = make_references(args.count, lang = lang)
+    for sort_by in ('traditional', 'label'):
+      # The first sort includes building the cached positions for the language
+      start_time = time.perf_counter()
+      lookup.sort_references(references[:1], lang = lang, sort_by = sort_by)
+      first_time = time.perf_counter() - start_time
+      start_time = time.perf_counter()
+      lookup.sort_references(references, lang = lang, sort_by = sort_by)
+      elapsed_time = time.perf_counter() - start_time
+      print(f'{lang:>10} {sort_by:>12}  {args.count / elapsed_time:>12,.0f} references/sec  (first call {first_time * 1000:,.1f} ms)')
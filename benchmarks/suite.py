@@ -0,0 +1,237 @@
+# Benchmark suite: throughput and memory for parsing, labels, URLs, sorting, and content, with a fixed corpus of references
+# Results are written as JSON, so results from different commits can be compared (--compare)
+# Content is requested from a stub server on localhost, so no network connection is needed
+# Usage: python benchmarks/suite.py [--output results.json] [--compare baseline.json] [--only parse,label] [--repeat 5]
+
+# Python standard libraries
+import os
+import sys
+import json
+import time
+import hashlib
+import platform
+import argparse
+import datetime
+import tempfile
+import threading
+import subprocess
+import tracemalloc
+import http.server
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+# Internal imports
+from scripturelookup import data, lookup
+
+
+corpus_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus.json')
+
+# Minimum time for each timed run, so fast cases are repeated enough to be measured accurately
+min_run_seconds = 0.2
+
+
+# Serves python-scripture-scraper chapter JSON (/en-json/{publication}/{book}/{book}-{chapter}.json) with placeholder verses
+class StubContentHandler(http.server.BaseHTTPRequestHandler):
+  protocol_version = 'HTTP/1.1'
+  disable_nagle_algorithm = True
+  
+  def do_GET(self):
+    chapter = self.path.rsplit('-', 1)[-1].split('.')[0]
+    paragraphs = [{'type': 'title', 'number': '', 'content': f'Chapter {chapter}'}]
+    paragraphs += [{'type': 'verse', 'number': str(verse), 'content': f'Verse {verse} of {self.path}. ' * 8} for verse in range(1, 81)]
+    body = json.dumps({'paragraphs': paragraphs}).encode('utf-8')
+    self.send_response(200)
+    self.send_header('Content-Type', 'application/json')
+    self.send_header('Content-Length', str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+  
+  def log_message(self, format, *args):
+    pass
+
+
+# Start the stub content server on a free port, and use it instead of python-scripture-scraper
+def start_stub_server():
+  stub_server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StubContentHandler)
+  stub_server.daemon_threads = True
+  threading.Thread(target = stub_server.serve_forever, daemon = True).start()
+  data.scraper_base_url = f'http://127.0.0.1:{stub_server.server_address[1]}'
+  data.configure_content_bundle(enabled = False)
+  return stub_server
+
+
+# Get a short hash of a function's output, so changes in behavior show up when results are compared
+def get_output_hash(output):
+  return hashlib.sha256(json.dumps(output, ensure_ascii = False, default = repr).encode('utf-8')).hexdigest()[:16]
+
+# Measure a function that processes `operations` items: best and median throughput over `repeat` runs, and peak memory allocated during one call
+def measure(function, operations, repeat = 5):
+  # Warm up (and build any cached tables), then find how many calls make a run long enough to measure
+  output = function()
+  number = 1
+  while True:
+    start_time = time.perf_counter()
+    for i in range(number):
+      function()
+    elapsed_time = time.perf_counter() - start_time
+    if elapsed_time >= min_run_seconds or number >= 1000000:
+      break
+    number *= 2 if elapsed_time * 4 > min_run_seconds else 10
+  
+  run_times = [elapsed_time / number]
+  for i in range(repeat - 1):
+    start_time = time.perf_counter()
+    for i in range(number):
+      function()
+    run_times.append((time.perf_counter() - start_time) / number)
+  run_times.sort()
+  
+  tracemalloc.start()
+  function()
+  peak_memory = tracemalloc.get_traced_memory()[1]
+  tracemalloc.stop()
+  
+  return {
+    'operations': operations,
+    'ops_per_sec': round(operations / run_times[0], 1),
+    'median_ops_per_sec': round(operations / run_times[len(run_times) // 2], 1),
+    'peak_memory_kb': round(peak_memory / 1024, 1),
+    'output_hash': get_output_hash(output),
+  }
+
+
+# Get references that have Church URLs (publications and books without URIs are skipped)
+def get_linkable_references(references):
+  linkable_references = []
+  for reference in references:
+    try:
+      reference.church_url()
+    except Exception:
+      continue
+    linkable_references.append(reference)
+  return linkable_references
+
+# Get the benchmark cases, as (name, group, function, number of operations per call)
+def get_cases(corpus):
+  cases = []
+  references_by_category = {}
+  for category, category_data in corpus.items():
+    lang, inputs = category_data['lang'], category_data['inputs']
+    references_by_category[category] = [reference for input_string in inputs for reference in lookup.parse_references_string(input_string, lang = lang)]
+    cases.append((f'parse/{category}', 'parse', lambda inputs = inputs, lang = lang: [[reference.attributes() for reference in lookup.parse_references_string(input_string, lang = lang)] for input_string in inputs], len(inputs)))
+  
+  for category, references in references_by_category.items():
+    cases.append((f'label/{category}', 'label', lambda references = references: [reference.label() for reference in references], len(references)))
+    cases.append((f'label-abbreviated/{category}', 'label', lambda references = references: [reference.label(abbreviated = True) for reference in references], len(references)))
+    linkable_references = get_linkable_references(references)
+    cases.append((f'church_url/{category}', 'church_url', lambda references = linkable_references: [reference.church_url() for reference in references], len(linkable_references)))
+    # Not available in older versions
+    if hasattr(lookup, 'get_church_urls'):
+      cases.append((f'get_church_urls/{category}', 'church_url', lambda references = linkable_references: lookup.get_church_urls(references), len(linkable_references)))
+  
+  # Sort every reference in the corpus, in each language
+  all_references = [reference for references in references_by_category.values() for reference in references]
+  for lang in ('en', 'ko', 'cmn-Hant', 'ar', 'am'):
+    for sort_by in ('traditional', 'label'):
+      cases.append((f'sort_references/{sort_by}/{lang}', 'sort', lambda lang = lang, sort_by = sort_by: [reference.attributes() for reference in lookup.sort_references(all_references, lang = lang, sort_by = sort_by)], len(all_references)))
+  
+  # Content, with and without the content cache
+  content_references = [reference for reference in references_by_category['en'] if reference.publication_slug and reference.chapter][:40]
+  content_requests = [reference.content_request(source = 'python-scripture-scraper') for reference in content_references]
+  def request_content_each():
+    return [data.request_content(**content_request) for content_request in content_requests]
+  def request_contents_all():
+    return data.request_contents(content_requests)
+  cases.append(('request_content/uncached', 'content', request_content_each, len(content_requests)))
+  cases.append(('request_contents/uncached', 'content', request_contents_all, len(content_requests)))
+  cases.append(('request_content/cached', 'content-cached', request_content_each, len(content_requests)))
+  # Not available in older versions
+  if hasattr(data, 'configure_chapter_cache'):
+    cases.append(('request_content/chapter-cache', 'content-chapter-cache', request_content_each, len(content_requests)))
+  return cases
+
+
+# Get the current git commit, if the benchmark is run in a git repository
+def get_git_commit():
+  try:
+    result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd = os.path.dirname(os.path.abspath(__file__)), capture_output = True, text = True, check = True)
+    return result.stdout.strip()
+  except Exception:
+    return None
+
+# Run the benchmark cases (or only the groups in `only`), returning the results
+def run_suite(only = None, repeat = 5):
+  with open(corpus_path, 'rb') as f:
+    corpus_bytes = f.read()
+  corpus = json.loads(corpus_bytes)
+  
+  stub_server = start_stub_server()
+  results = {}
+  with tempfile.TemporaryDirectory() as cache_directory:
+    for name, group, function, operations in get_cases(corpus):
+      if only and group.split('-')[0] not in only:
+        continue
+      if group == 'content-cached':
+        data.configure_content_cache(directory = cache_directory)
+      else:
+        data.configure_content_cache(enabled = False)
+      # Parsed chapters are only kept in memory for the chapter cache case, so other cases measure reading and parsing chapters
+      if hasattr(data, 'configure_chapter_cache'):
+        data.configure_chapter_cache(enabled = group == 'content-chapter-cache')
+      results[name] = measure(function, operations, repeat = repeat)
+      print(f'{name:<40} {results[name]["ops_per_sec"]:>14,.0f} ops/sec  {results[name]["peak_memory_kb"]:>10,.1f} KB peak')
+  stub_server.shutdown()
+  stub_server.server_close()
+  
+  return {
+    'metadata': {
+      'commit': get_git_commit(),
+      'date': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec = 'seconds'),
+      'python': platform.python_version(),
+      'platform': platform.platform(),
+      'corpus_hash': hashlib.sha256(corpus_bytes).hexdigest()[:16],
+      'repeat': repeat,
+    },
+    'results': results,
+  }
+
+
+# Compare results with baseline results, printing the change in throughput and memory for each case
+# Returns the names of cases that are slower than the baseline by more than max_slowdown (a fraction, i.e. 0.1 for 10%)
+def compare_results(results, baseline, max_slowdown = None):
+  if results['metadata']['corpus_hash'] != baseline['metadata']['corpus_hash']:
+    sys.stdout.write('Warning: The corpus changed since the baseline, so results may not be comparable\n')
+  print(f'\nCompared with {baseline["metadata"].get("commit") or "baseline"} ({baseline["metadata"].get("date")}):')
+  slower_cases = []
+  for name, result in results['results'].items():
+    baseline_result = baseline['results'].get(name)
+    if not baseline_result:
+      print(f'{name:<40} (new)')
+      continue
+    speed_ratio = result['ops_per_sec'] / baseline_result['ops_per_sec']
+    memory_ratio = result['peak_memory_kb'] / baseline_result['peak_memory_kb'] if baseline_result['peak_memory_kb'] else 1
+    note = '  output changed' if result['output_hash'] != baseline_result['output_hash'] else ''
+    print(f'{name:<40} {speed_ratio:>7.2f}x speed  {memory_ratio:>7.2f}x memory{note}')
+    if max_slowdown is not None and speed_ratio < 1 - max_slowdown:
+      slower_cases.append(name)
+  return slower_cases
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Benchmark suite')
+  parser.add_argument('--output', help='File to write results to (JSON).')
+  parser.add_argument('--compare', help='Results file (JSON) to compare with, i.e. from an earlier commit.')
+  parser.add_argument('--max-slowdown', type=float, help='Exit with an error if a case is slower than the compared results by more than this fraction (i.e. 0.1).')
+  parser.add_argument('--only', help='Comma-separated groups to run (parse, label, church_url, sort, content). Default: all.')
+  parser.add_argument('--repeat', type=int, default=5, help='Number of timed runs for each case. Default: 5.')
+  args = parser.parse_args()
+  
+  results = run_suite(only = args.only.split(',') if args.only else None, repeat = args.repeat)
+  if args.output:
+    with open(args.output, 'w', encoding = 'utf-8') as f:
+      json.dump(results, f, ensure_ascii = False, indent = 2)
+  if args.compare:
+    with open(args.compare, 'r', encoding = 'utf-8') as f:
+      slower_cases = compare_results(results, json.load(f), max_slowdown = args.max_slowdown)
+    if slower_cases:
+      sys.stdout.write(f'Error: {len(slower_cases)} cases are slower than the compared results: {", ".join(slower_cases)}\n')
+      sys.exit(1)
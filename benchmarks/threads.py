@@ -0,0 +1,82 @@
+# Concurrency stress test: get_label throughput with 1 to N threads sharing one engine, checking that every thread gets the same labels
+# Threads only run Python code in parallel in free-threaded builds (Python 3.13+ with the GIL disabled), where throughput should grow
+# about linearly with the number of threads. With the GIL, throughput stays about the same, but results are still checked.
+# Usage: python benchmarks/threads.py [--threads 1,2,4,8] [--seconds 2] [--count 2000] [--lang en]
+
+# Python standard libraries
+import os
+import sys
+import time
+import argparse
+import platform
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+# Internal imports
+from scripturelookup import data, engine
+from sort import make_references
+
+
+# Inputs with lettered verses, which are sorted with each thread's ICU collator
+lettered_verse_inputs = ('D&C 20:6-8, 7a', 'Genesis 1:1-3, 2a', 'Alma 32:21, 21a, 27')
+
+
+# Get labels from several threads at once for `seconds`, each thread starting at a different input
+# Returns a tuple: (labels per second, number of labels that were different from the expected labels)
+def run_threads(lookup_engine, inputs, expected_labels, thread_count, seconds):
+  counts = [0] * thread_count
+  mismatches = [0] * thread_count
+  barrier = threading.Barrier(thread_count + 1)
+  def run_thread(thread_number):
+    position = len(inputs) * thread_number // thread_count
+    count = 0
+    mismatch_count = 0
+    barrier.wait()
+    end_time = time.perf_counter() + seconds
+    while time.perf_counter() < end_time:
+      for i in range(100):
+        if lookup_engine.get_label(inputs[position]) != expected_labels[position]:
+          mismatch_count += 1
+        position = (position + 1) % len(inputs)
+      count += 100
+    counts[thread_number] = count
+    mismatches[thread_number] = mismatch_count
+  threads = [threading.Thread(target = run_thread, args = (thread_number,)) for thread_number in range(thread_count)]
+  for thread in threads:
+    thread.start()
+  barrier.wait()
+  start_time = time.perf_counter()
+  for thread in threads:
+    thread.join()
+  return sum(counts) / (time.perf_counter() - start_time), sum(mismatches)
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Concurrency stress test')
+  parser.add_argument('--threads', default='1,2,4,8', help='Comma-separated numbers of threads. Default: "1,2,4,8".')
+  parser.add_argument('--seconds', type=float, default=2, help='Seconds to run each number of threads. Default: 2.')
+  parser.add_argument('--count', type=int, default=2000, help='Number of references. Default: 2000.')
+  parser.add_argument('--lang', default='en', help='Language. Default: "en".')
+  args = parser.parse_args()
+  lang = data.get_bcp47(args.lang)
+  
+  thread_counts = [int(thread_count) for thread_count in args.threads.split(',')]
+  gil_enabled = getattr(sys, '_is_gil_enabled', lambda: True)()
+  print(f'Python {platform.python_version()} ({"GIL enabled" if gil_enabled else "free-threaded"}), {os.cpu_count()} CPUs')
+  if gil_enabled:
+    sys.stdout.write('Warning: The GIL is enabled, so throughput won’t grow with more threads (use a free-threaded build of Python 3.13+).\n')
+  if max(thread_counts) > (os.cpu_count() or 1):
+    sys.stdout.write('Warning: There are more threads than CPUs, so throughput won’t grow past the number of CPUs.\n')
+  
+  lookup_engine = engine.Engine(lang = lang)
+  inputs = [reference.label() for reference in make_references(args.count, lang = lang)] + list(lettered_verse_inputs)
+  expected_labels = [lookup_engine.get_label(input_string) for input_string in inputs]
+  
+  single_thread_throughput = None
+  for thread_count in thread_counts:
+    throughput, mismatch_count = run_threads(lookup_engine, inputs, expected_labels, thread_count, args.seconds)
+    single_thread_throughput = single_thread_throughput or throughput / thread_count
+    speedup = throughput / single_thread_throughput
+    print(f'{thread_count:>3} threads  {throughput:>10,.0f} labels/sec  {speedup:>5.2f}x  {speedup / thread_count * 100:>5.1f}% efficiency')
+    if mismatch_count:
+      sys.stdout.write(f'Warning: {mismatch_count} labels were different with {thread_count} threads\n')
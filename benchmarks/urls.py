@@ -0,0 +1,53 @@
+# Benchmark for generating Church URIs and URLs, and parsing them back into references
+# Usage: python benchmarks/urls.py [--count 100000] [--langs en,fr,ja]
+
+# Python standard libraries
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+# Internal imports
+from scripturelookup import data, lookup
+from sort import make_references
+
+
+def report(name, count, elapsed_time):
+  print(f'{name:>28}  {count / elapsed_time:>12,.0f} references/sec')
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='URL benchmark')
+  parser.add_argument('--count', type=int, default=100000, help='Number of references. Default: 100000.')
+  parser.add_argument('--langs', default='en,fr,ja', help='Comma-separated languages. Default: "en,fr,ja".')
+  args = parser.parse_args()
+  
+  scripture_index = lookup.get_scripture_index()
+  for lang in args.langs.split(','):
+    lang = data.get_bcp47(lang)
+    # Only books that have a Church URI
+    references = [reference for reference in make_references(args.count, lang = lang) if scripture_index.book_church_uris.get(reference.book_slug)]
+    print(lang)
+    
+    start_time = time.perf_counter()
+    uris = [reference.church_uri() for reference in references]
+    report('Reference.church_uri', len(references), time.perf_counter() - start_time)
+    
+    start_time = time.perf_counter()
+    urls = [reference.church_url() for reference in references]
+    report('Reference.church_url', len(references), time.perf_counter() - start_time)
+    
+    start_time = time.perf_counter()
+    bulk_urls = lookup.get_church_urls(references)
+    report('get_church_urls', len(references), time.perf_counter() - start_time)
+    if bulk_urls != urls:
+      sys.stdout.write('Warning: get_church_urls returned different URLs than Reference.church_url\n')
+    
+    start_time = time.perf_counter()
+    lookup.parse_references_string('; '.join(uris), lang = lang)
+    report('parse URIs', len(references), time.perf_counter() - start_time)
+    
+    start_time = time.perf_counter()
+    lookup.parse_references_string('; '.join(urls), lang = lang)
+    report('parse URLs', len(references), time.perf_counter() - start_time)
@@ -0,0 +1,64 @@
+# Python standard libraries
+import os
+import threading
+import zlib
+
+
+# Local store of chapter content (a SQLite database), so content can be looked up without a network connection
+# Each chapter is stored as zlib-compressed text, keyed the same way as the content cache: (source, lang, publication_slug, book_slug, chapter)
+class ContentBundle:
+  def __init__(self, path):
+    # Imported here, so sqlite3 is only loaded if there's a content bundle
+    import sqlite3
+    self.path = path
+    self.lock = threading.Lock()
+    self.connection = sqlite3.connect(path, check_same_thread = False)
+    self.connection.execute('''
+      CREATE TABLE IF NOT EXISTS chapters (
+        source TEXT NOT NULL,
+        lang TEXT NOT NULL,
+        publication_slug TEXT NOT NULL,
+        book_slug TEXT NOT NULL,
+        chapter TEXT NOT NULL,
+        content BLOB NOT NULL,
+        PRIMARY KEY (source, lang, publication_slug, book_slug, chapter)
+      ) WITHOUT ROWID
+    ''')
+    self.connection.commit()
+  
+  # Get the text for a chapter key, or None if the chapter isn't in the bundle
+  def get(self, key):
+    source, lang, publication_slug, book_slug, chapter = key
+    with self.lock:
+      row = self.connection.execute(
+        'SELECT content FROM chapters WHERE source = ? AND lang = ? AND publication_slug = ? AND book_slug = ? AND chapter = ?',
+        (source, lang, str(publication_slug), str(book_slug), str(chapter)),
+      ).fetchone()
+    if row is None:
+      return None
+    return zlib.decompress(row[0]).decode('utf-8')
+  
+  # Add or replace several chapters at once (each item is a tuple: key, text)
+  def set_many(self, items):
+    rows = []
+    for (source, lang, publication_slug, book_slug, chapter), text in items:
+      rows.append((source, lang, str(publication_slug), str(book_slug), str(chapter), zlib.compress(text.encode('utf-8'), 9)))
+    with self.lock:
+      self.connection.executemany('INSERT OR REPLACE INTO chapters VALUES (?, ?, ?, ?, ?, ?)', rows)
+      self.connection.commit()
+  
+  # Get the number of chapters in the bundle
+  def count(self):
+    with self.lock:
+      return self.connection.execute('SELECT COUNT(*) FROM chapters').fetchone()[0]
+  
+  def close(self):
+    with self.lock:
+      self.connection.close()
+
+
+# Open a content bundle if the file exists, otherwise return None
+def open_bundle(path):
+  if os.path.isfile(path):
+    return ContentBundle(path)
+  return None
@@ -0,0 +1,197 @@
+# Python standard libraries
+import os
+import json
+import time
+import hashlib
+import threading
+
+# Internal imports
+from . import network
+
+
+# On-disk cache for content that's fetched over HTTP (such as scripture chapters)
+# Each entry is stored as a body file and a JSON metadata file (URL, ETag, Last-Modified, and when it was fetched)
+# Entries older than ttl seconds are revalidated with the server (If-None-Match / If-Modified-Since) before they're used again
+# When the cache grows past max_size bytes, the least recently used entries are removed
+class ContentCache:
+  def __init__(self, directory, max_size = 200 * 1024 * 1024, ttl = 7 * 24 * 60 * 60):
+    self.directory = directory
+    self.max_size = max_size
+    self.ttl = ttl
+    # Total size of the bodies in the cache, kept up to date as entries are added, so the directory only needs to be scanned
+    # when the cache is over max_size (None until it's scanned the first time). Entries added by other processes are counted
+    # the next time it's scanned.
+    self.size = None
+    self.size_lock = threading.Lock()
+  
+  # Get the base file path for a cache key (a tuple of strings or numbers)
+  def path(self, key):
+    key_string = '|'.join([str(k) for k in key])
+    return os.path.join(self.directory, hashlib.sha256(key_string.encode('utf-8')).hexdigest())
+  
+  # Get a temporary file path to write a file to before it's moved into place
+  # Each process and thread uses its own temporary files, so threads writing the same entry at once don't write to the same file
+  def temporary_path(self, path):
+    return f'{path}.{os.getpid()}-{threading.get_ident()}.tmp'
+  
+  # Get a cache entry (metadata dictionary with the body added), or None if the key isn't cached
+  def get(self, key):
+    path = self.path(key)
+    try:
+      with open(path + '.json', 'r', encoding='utf-8') as f:
+        entry = json.load(f)
+      with open(path + '.body', 'rb') as f:
+        entry['body'] = f.read()
+    except (OSError, ValueError):
+      return None
+    return entry
+  
+  # Add or replace a cache entry
+  # Returns False if the entry couldn't be written (for example, if the directory isn't writable), so the content is only used uncached
+  def set(self, key, url, body, etag = None, last_modified = None):
+    path = self.path(key)
+    metadata = {
+      'url': url,
+      'etag': etag,
+      'lastModified': last_modified,
+      'fetched': time.time(),
+    }
+    # Write to temporary files first, so other processes never read a partial entry
+    body_temporary_path = self.temporary_path(path + '.body')
+    metadata_temporary_path = self.temporary_path(path + '.json')
+    try:
+      os.makedirs(self.directory, exist_ok = True)
+      with open(body_temporary_path, 'wb') as f:
+        f.write(body)
+      with open(metadata_temporary_path, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f)
+      try:
+        replaced_size = os.path.getsize(path + '.body')
+      except OSError:
+        replaced_size = 0
+      os.replace(body_temporary_path, path + '.body')
+      os.replace(metadata_temporary_path, path + '.json')
+    except OSError:
+      for temporary_path in (body_temporary_path, metadata_temporary_path):
+        try:
+          os.remove(temporary_path)
+        except OSError:
+          pass
+      return False
+    self.add_size(len(body) - replaced_size)
+    return True
+  
+  # Mark a cache entry as recently used, and optionally as recently validated
+  def touch(self, key, validated = False):
+    path = self.path(key)
+    try:
+      os.utime(path + '.body')
+      if validated:
+        with open(path + '.json', 'r', encoding='utf-8') as f:
+          metadata = json.load(f)
+        metadata['fetched'] = time.time()
+        metadata_temporary_path = self.temporary_path(path + '.json')
+        with open(metadata_temporary_path, 'w', encoding='utf-8') as f:
+          json.dump(metadata, f)
+        os.replace(metadata_temporary_path, path + '.json')
+    except (OSError, ValueError):
+      pass
+  
+  # Update the cache size after an entry is added or replaced, removing entries if it's larger than max_size
+  def add_size(self, size_change):
+    if self.max_size is None:
+      return
+    with self.size_lock:
+      if self.size is not None:
+        self.size += size_change
+      is_over_max_size = self.size is None or self.size > self.max_size
+    if is_over_max_size:
+      self.evict()
+  
+  # Remove least recently used entries until the cache is no larger than max_size
+  def evict(self):
+    if self.max_size is None:
+      return
+    entries = []
+    total_size = 0
+    try:
+      with os.scandir(self.directory) as it:
+        for dir_entry in it:
+          if dir_entry.name.endswith('.body'):
+            try:
+              stat = dir_entry.stat()
+            except OSError:
+              # Removed by another thread or process
+              continue
+            entries.append((stat.st_mtime, stat.st_size, dir_entry.path[:-len('.body')]))
+            total_size += stat.st_size
+    except OSError:
+      # The directory was removed or can't be read
+      return
+    for last_used, size, path in sorted(entries):
+      if total_size <= self.max_size:
+        break
+      for extension in ('.body', '.json'):
+        try:
+          os.remove(path + extension)
+        except OSError:
+          pass
+      total_size -= size
+    with self.size_lock:
+      self.size = total_size
+  
+  # Remove all entries
+  def clear(self):
+    try:
+      filenames = os.listdir(self.directory)
+    except OSError:
+      return
+    for filename in filenames:
+      if filename.endswith(('.body', '.json', '.tmp')):
+        try:
+          os.remove(os.path.join(self.directory, filename))
+        except OSError:
+          # Removed by another thread or process
+          pass
+    with self.size_lock:
+      self.size = 0
+  
+  # Get the body for a cache key, fetching (or revalidating) it from the URL if needed
+  # Returns a tuple: (body bytes or None, whether a network request was made)
+  def fetch(self, key, url):
+    chunks, requested = self.fetch_chunks(key, url)
+    return (b''.join(chunks) if chunks is not None else None), requested
+  
+  # Get the body for a cache key as chunks of bytes, like fetch. If it's fetched from the URL, chunks are read from the
+  # server as they're used, and the entry is added after the last chunk is read.
+  # Returns a tuple: (iterable of body chunks or None, whether a network request was made)
+  def fetch_chunks(self, key, url, chunk_size = 16384):
+    entry = self.get(key)
+    if entry and (self.ttl is None or time.time() - entry['fetched'] < self.ttl):
+      self.touch(key)
+      return [entry['body']], False
+    
+    headers = {}
+    if entry and entry.get('etag'):
+      headers['If-None-Match'] = entry['etag']
+    if entry and entry.get('lastModified'):
+      headers['If-Modified-Since'] = entry['lastModified']
+    r = network.get(url, headers = headers, stream = True)
+    
+    if r.status_code == 304 and entry:
+      r.close()
+      self.touch(key, validated = True)
+      return [entry['body']], True
+    if r and r.status_code == 200:
+      return self.iter_response_chunks(key, url, r, chunk_size), True
+    r.close()
+    return None, True
+  
+  # Yield the chunks of a response's body, adding it to the cache after the last chunk (it isn't added if reading stops early)
+  def iter_response_chunks(self, key, url, r, chunk_size):
+    chunks = []
+    with r:
+      for chunk in r.iter_content(chunk_size):
+        chunks.append(chunk)
+        yield chunk
+    self.set(key, url, b''.join(chunks), etag = r.headers.get('ETag'), last_modified = r.headers.get('Last-Modified'))
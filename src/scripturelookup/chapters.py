@@ -0,0 +1,117 @@
+# Python standard libraries
+import json
+import time
+import threading
+import collections
+
+
+# Parsed chapter content: the text of each paragraph, with verse paragraphs indexed by verse number
+class Chapter:
+  __slots__ = ('paragraphs', 'verse_positions', 'verse_paragraphs', 'is_sequential')
+  
+  # paragraphs is a list of paragraph text, and verses is a list of (verse number string, paragraph position) in document order
+  def __init__(self, paragraphs, verses):
+    self.paragraphs = paragraphs
+    # Verse number –> paragraph position (None if the number is used more than once, so it has to be looked up in verse_paragraphs)
+    self.verse_positions = {}
+    for verse_number, position in verses:
+      self.verse_positions[verse_number] = None if verse_number in self.verse_positions else position
+    self.verse_paragraphs = verses
+    # Whether verses are numbered 1, 2, 3, … with no other verses, so ranges of verses can be sliced
+    self.is_sequential = all(verse_number == str(number) for number, (verse_number, position) in enumerate(verses, start = 1))
+  
+  # Get the positions of the paragraphs for verse ranges, in document order
+  # verse_ranges is a list of (start, end) verses (numbers, or strings such as '7a'), like Reference.verse_ranges
+  # Ranges aren't listed out verse by verse, so the work depends on the size of the chapter, not the size of the range
+  def get_verse_positions(self, verse_ranges):
+    positions = set()
+    for start, end in verse_ranges:
+      if isinstance(start, int) and isinstance(end, int) and start != end:
+        if self.is_sequential:
+          # A range of verses in a sequentially numbered chapter
+          paragraphs_in_range = self.verse_paragraphs[max(start - 1, 0):max(end, 0)]
+        else:
+          paragraphs_in_range = [(verse_number, position) for verse_number, position in self.verse_paragraphs if verse_number.isascii() and verse_number.isdigit() and start <= int(verse_number) <= end]
+        for verse_number, position in paragraphs_in_range:
+          positions.add(position)
+        continue
+      for verse in ((start,) if start == end else (start, end)):
+        verse_number = str(verse)
+        if verse_number not in self.verse_positions:
+          continue
+        position = self.verse_positions[verse_number]
+        if position is None:
+          positions.update([paragraph_position for paragraph_verse_number, paragraph_position in self.verse_paragraphs if paragraph_verse_number == verse_number])
+        else:
+          positions.add(position)
+    return sorted(positions)
+  
+  # Iterate over the text of the paragraphs for verse ranges (or every paragraph, if there aren't any verses), in document order
+  def iter_paragraphs(self, verse_ranges = None):
+    if not verse_ranges:
+      yield from self.paragraphs
+      return
+    for position in self.get_verse_positions(verse_ranges):
+      yield self.paragraphs[position]
+
+
+# Parse chapter content from python-scripture-scraper (JSON) or ChurchofJesusChrist.org (HTML)
+def parse_chapter(response_text, source = 'python-scripture-scraper'):
+  paragraphs = []
+  verses = []
+  if source == 'python-scripture-scraper':
+    for position, paragraph in enumerate(json.loads(response_text)['paragraphs']):
+      number = paragraph['number']
+      if paragraph['type'] == 'verse':
+        verses.append((number, position))
+      paragraphs.append(f'{number} {paragraph["content"]}' if number else paragraph['content'])
+  elif source == 'ChurchofJesusChrist.org':
+    return parse_church_chapter((response_text,))
+  return Chapter(paragraphs, verses)
+
+
+# Parse a ChurchofJesusChrist.org chapter page from chunks of HTML (str, or UTF-8 bytes), as they're read (see data.get_chapter)
+def parse_church_chapter(chunks):
+  # Imported here, since it's slow to import and only needed for this source
+  from .extractor import iter_church_paragraphs
+  paragraphs = []
+  verses = []
+  for verse_number, paragraph in iter_church_paragraphs(chunks):
+    if verse_number:
+      verses.append((verse_number, len(paragraphs)))
+    paragraphs.append(paragraph)
+  return Chapter(paragraphs, verses)
+
+
+# In-memory cache of recently used chapters, so they don't need to be read and parsed again
+# When the cache has more than max_chapters chapters, the least recently used ones are removed. Chapters older than ttl seconds are reloaded.
+class ChapterCache:
+  def __init__(self, max_chapters = 64, ttl = 10 * 60):
+    self.max_chapters = max_chapters
+    self.ttl = ttl
+    # Cache key –> (time added, chapter)
+    self.chapters = collections.OrderedDict()
+    self.lock = threading.Lock()
+  
+  # Get a chapter, or None if it isn't cached
+  def get(self, key):
+    with self.lock:
+      entry = self.chapters.get(key)
+      if entry is None:
+        return None
+      if self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+        del self.chapters[key]
+        return None
+      self.chapters.move_to_end(key)
+      return entry[1]
+  
+  def set(self, key, chapter):
+    with self.lock:
+      self.chapters[key] = (time.monotonic(), chapter)
+      self.chapters.move_to_end(key)
+      while len(self.chapters) > self.max_chapters:
+        self.chapters.popitem(last = False)
+  
+  def clear(self):
+    with self.lock:
+      self.chapters.clear()
@@ -0,0 +1,303 @@
+# Python standard libraries
+import os
+import sys
+import json
+import random
+import itertools
+
+# Internal imports
+from . import data, lookup
+
+
+citation_index_version = 1
+
+# Largest chapter or verse position that can be stored in an interval (larger values are clamped)
+max_position = 999
+
+
+# Get the (start, end) positions covered by a reference, in canonical book/chapter/verse order
+# Positions are integers: (book position * 1000 + chapter position) * 1000 + verse. A whole chapter covers verses 0–999,
+# a whole book covers chapters 0–999, and a whole publication covers all of its books.
+# Returns an empty list if the reference isn't to a known publication, book, or chapter.
+def get_reference_intervals(reference):
+  publication_positions, book_positions, chapter_positions = lookup.get_traditional_positions()
+  if reference.book_slug is None:
+    publication_books = get_publication_book_positions().get(reference.publication_slug)
+    if not publication_books:
+      return []
+    return [(publication_books[0] * 1000000, publication_books[1] * 1000000 + 999999)]
+  
+  book_position = book_positions.get(reference.book_slug)
+  if book_position is None:
+    return []
+  if reference.chapter is None:
+    return [(book_position * 1000000, book_position * 1000000 + 999999)]
+  
+  chapter_position = chapter_positions[reference.book_slug].get(reference.chapter)
+  if chapter_position is None:
+    return []
+  chapter_start = (book_position * 1000 + min(chapter_position, max_position)) * 1000
+  if not reference.verse_ranges:
+    return [(chapter_start, chapter_start + 999)]
+  intervals = []
+  for start, end in reference.verse_ranges:
+    # Verses that aren't whole numbers (such as '7a') are indexed as the verse they're part of
+    start = get_verse_position(start)
+    end = get_verse_position(end)
+    if start is not None and end is not None and start <= end:
+      intervals.append((chapter_start + start, chapter_start + end))
+  return intervals
+
+
+# Get the position of a verse (the leading number of verses like '7a'), or None if it doesn't have one
+def get_verse_position(verse):
+  if not isinstance(verse, int):
+    digits = ''.join(itertools.takewhile(str.isdigit, str(verse)))
+    if not digits:
+      return None
+    verse = int(digits)
+  return min(verse, max_position)
+
+
+# First and last book positions for each publication (built once for each version of the metadata)
+@data.metadata_cache(maxsize = 1)
+def get_publication_book_positions():
+  return data.metadata.tables[build_publication_book_positions]
+
+def build_publication_book_positions(metadata = None):
+  metadata = metadata or data.metadata
+  publication_positions, book_positions, chapter_positions = metadata.tables[lookup.build_traditional_positions]
+  publication_book_positions = {}
+  for publication_slug, publication_info in metadata.scriptures['structure'].items():
+    positions = [book_positions[book_slug] for book_slug in publication_info['books']]
+    if positions:
+      publication_book_positions[publication_slug] = (min(positions), max(positions))
+  return publication_book_positions
+
+
+# Node in an interval treap: a binary search tree ordered by (start, end, citation ID), which is also a heap ordered
+# by priority (so it stays balanced). Each node stores the largest end in its subtree, so overlap queries can skip subtrees.
+class IntervalNode:
+  __slots__ = ('key', 'priority', 'left', 'right', 'max_end')
+  
+  def __init__(self, key, priority):
+    self.key = key
+    self.priority = priority
+    self.left = None
+    self.right = None
+    self.max_end = key[1]
+  
+  def update(self):
+    self.max_end = self.key[1]
+    if self.left and self.left.max_end > self.max_end:
+      self.max_end = self.left.max_end
+    if self.right and self.right.max_end > self.max_end:
+      self.max_end = self.right.max_end
+
+
+def rotate_right(node):
+  left = node.left
+  node.left = left.right
+  left.right = node
+  node.update()
+  left.update()
+  return left
+
+
+def rotate_left(node):
+  right = node.right
+  node.right = right.left
+  right.left = node
+  node.update()
+  right.update()
+  return right
+
+
+def insert_node(node, key, priority):
+  if node is None:
+    return IntervalNode(key, priority)
+  if key < node.key:
+    node.left = insert_node(node.left, key, priority)
+    if node.left.priority > node.priority:
+      node = rotate_right(node)
+  else:
+    node.right = insert_node(node.right, key, priority)
+    if node.right.priority > node.priority:
+      node = rotate_left(node)
+  node.update()
+  return node
+
+
+def delete_node(node, key):
+  if node is None:
+    return None
+  if key < node.key:
+    node.left = delete_node(node.left, key)
+  elif key > node.key:
+    node.right = delete_node(node.right, key)
+  else:
+    if node.left is None:
+      return node.right
+    if node.right is None:
+      return node.left
+    # Rotate the node down until it has at most one child, then remove it
+    if node.left.priority > node.right.priority:
+      node = rotate_right(node)
+      node.right = delete_node(node.right, key)
+    else:
+      node = rotate_left(node)
+      node.left = delete_node(node.left, key)
+  node.update()
+  return node
+
+
+# Build a balanced treap from keys that are already sorted (faster than inserting them one at a time)
+def build_nodes(sorted_keys):
+  def build(low, high, depth):
+    if low >= high:
+      return None
+    middle = (low + high) // 2
+    node = IntervalNode(sorted_keys[middle], 0)
+    node.left = build(low, middle, depth + 1)
+    node.right = build(middle + 1, high, depth + 1)
+    levels.setdefault(depth, []).append(node)
+    node.update()
+    return node
+  levels = {}
+  root = build(0, len(sorted_keys), 0)
+  # Give parents higher priorities than their children
+  priorities = sorted([random.random() for key in sorted_keys], reverse = True)
+  i = 0
+  for depth in sorted(levels):
+    for node in levels[depth]:
+      node.priority = priorities[i]
+      i += 1
+  return root
+
+
+# Yield the keys of nodes that overlap (start, end), in order
+def find_overlapping(node, start, end):
+  stack = []
+  while stack or node:
+    if node:
+      if node.max_end < start:
+        node = None
+        continue
+      stack.append(node)
+      node = node.left
+    else:
+      node = stack.pop()
+      if node.key[0] > end:
+        return
+      if node.key[1] >= start:
+        yield node.key
+      node = node.right
+
+
+# Index of which documents (such as talks or lessons) cite which scripture references
+# Citations are stored as intervals of canonical book/chapter/verse positions, so overlap queries take logarithmic time
+class CitationIndex:
+  def __init__(self, lang = 'en'):
+    self.lang = lang
+    self.root = None
+    # Citation ID –> (document ID, reference)
+    self.citations = {}
+    # Document ID –> set of citation IDs
+    self.documents = {}
+    self.next_citation_id = 1
+  
+  # Get references from a references string, a reference, or a list of references
+  def get_references(self, references, lang = None):
+    if isinstance(references, str):
+      return lookup.parse_references_string(references, lang = lang or self.lang)
+    elif isinstance(references, lookup.Reference):
+      return [references]
+    return list(references)
+  
+  # Add the references cited by a document, and return the number of citations added
+  # References that can't be indexed (for example, a chapter that doesn't exist) are skipped with a warning
+  def add(self, document_id, references, lang = None):
+    added = 0
+    for reference in self.get_references(references, lang = lang):
+      intervals = get_reference_intervals(reference)
+      if not intervals:
+        sys.stdout.write(f'Warning: Couldn’t index “{reference}” for document {document_id!r}\n')
+        continue
+      citation_id = self.next_citation_id
+      self.next_citation_id += 1
+      self.citations[citation_id] = (document_id, reference)
+      self.documents.setdefault(document_id, set()).add(citation_id)
+      for start, end in intervals:
+        self.root = insert_node(self.root, (start, end, citation_id), random.random())
+      added += 1
+    return added
+  
+  # Remove a document's citations (only the given references, if provided), and return the number of citations removed
+  def remove(self, document_id, references = None, lang = None):
+    citation_ids = set(self.documents.get(document_id, ()))
+    if references is not None:
+      references_to_remove = set(self.get_references(references, lang = lang))
+      citation_ids = {citation_id for citation_id in citation_ids if self.citations[citation_id][1] in references_to_remove}
+    for citation_id in citation_ids:
+      document_id, reference = self.citations.pop(citation_id)
+      for start, end in get_reference_intervals(reference):
+        self.root = delete_node(self.root, (start, end, citation_id))
+      self.documents[document_id].discard(citation_id)
+    if not self.documents.get(document_id, True):
+      del self.documents[document_id]
+    return len(citation_ids)
+  
+  # Get the citations (document ID, reference) that overlap any of the given references, in canonical order
+  def query_citations(self, references, lang = None):
+    intervals = []
+    for reference in self.get_references(references, lang = lang):
+      intervals.extend(get_reference_intervals(reference))
+    citation_ids = {}
+    for start, end in sorted(intervals):
+      for interval_start, interval_end, citation_id in find_overlapping(self.root, start, end):
+        citation_ids.setdefault(citation_id, (interval_start, interval_end))
+    return [self.citations[citation_id] for citation_id in sorted(citation_ids, key = lambda citation_id: (citation_ids[citation_id], citation_id))]
+  
+  # Get the IDs of documents that cite anything overlapping the given references
+  # Example: index.query('Alma 32:21-43')
+  def query(self, references, lang = None):
+    document_ids = {}
+    for document_id, reference in self.query_citations(references, lang = lang):
+      document_ids.setdefault(document_id, None)
+    return list(document_ids)
+  
+  # Number of citations in the index
+  def __len__(self):
+    return len(self.citations)
+  
+  # Save the index to a JSON file (document IDs must be strings or numbers)
+  def save(self, path):
+    citations = []
+    for citation_id, (document_id, reference) in self.citations.items():
+      citations.append([document_id, reference.lang, reference.publication_slug, reference.book_slug, reference.chapter, reference.verse_ranges, reference.context_verse_ranges])
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+      json.dump({'version': citation_index_version, 'lang': self.lang, 'citations': citations}, f, ensure_ascii=False)
+    os.replace(path + '.tmp', path)
+  
+  # Load an index that was saved with save()
+  # Positions are recalculated from the references, so saved indexes stay valid when the scripture metadata changes
+  @classmethod
+  def load(cls, path):
+    with open(path, 'r', encoding='utf-8') as f:
+      saved_index = json.load(f)
+    if saved_index.get('version') != citation_index_version:
+      raise ValueError(f'Unsupported citation index version: {saved_index.get("version")}')
+    index = cls(lang = saved_index['lang'])
+    keys = []
+    for document_id, lang, publication_slug, book_slug, chapter, verse_ranges, context_verse_ranges in saved_index['citations']:
+      reference = lookup.Reference(lang = lang, publication_slug = publication_slug, book_slug = book_slug, chapter = chapter, verse_ranges = [tuple(verse_range) for verse_range in verse_ranges], context_verse_ranges = [tuple(verse_range) for verse_range in context_verse_ranges])
+      intervals = get_reference_intervals(reference)
+      if not intervals:
+        continue
+      citation_id = index.next_citation_id
+      index.next_citation_id += 1
+      index.citations[citation_id] = (document_id, reference)
+      index.documents.setdefault(document_id, set()).add(citation_id)
+      keys.extend([(start, end, citation_id) for start, end in intervals])
+    index.root = build_nodes(sorted(keys))
+    return index
@@ -1,16 +1,21 @@
 # Python standard libraries
 import argparse
+import sys
+import json
 
 # Internal imports
 from . import data, numbers, lookup
 
 def main_cli():
   parser = argparse.ArgumentParser(description='Scripture lookup')
-  parser.add_argument('command', help='Command to run. Required.')
-  parser.add_argument('input', help='Input text to parse (one or more references).')
-  parser.add_argument('--lang', help='Output language. Default: "en".')
+  parser.add_argument('command', help='Command to run, or "serve" to run an HTTP server. Required.')
+  parser.add_argument('input', nargs='?', help='Input text to parse (one or more references). Use "-" to read inputs from stdin, one per line.')
+  parser.add_argument('--input-file', help='File to read inputs from, one per line.')
+  parser.add_argument('--jsonl', action='store_true', help='Output one JSON object per input line, with the line number, input, and result.')
+  parser.add_argument('--lang', help='Output language, or "auto" to detect the language of each reference from the input. Default: "en".')
   parser.add_argument('--separator', help='Separator when there are multiple results. Default: "\n".')
   parser.add_argument('--sort-by', help='Sort the returned references ("none", "traditional", or "label"). Default: "none".')
+  parser.add_argument('--merge', action='store_true', help='Combine references to the same chapter into one reference.')
   parser.add_argument('--source', help='Content source ("python-scripture-scraper" or "ChurchofJesusChrist.org"). Default: "python-scripture-scraper".')
   parser.add_argument('--link_class', help='Link "class" attribute.')
   parser.add_argument('--link_target', help='Link "target" attribute.')
@@ -19,23 +24,94 @@ def main_cli():
   parser.add_argument('--skip_fragment', action='store_true', help='Skip #frament in URLs.')
   parser.add_argument('--skip_book_name', action='store_true', help='Skip scripture book name in labels.')
   parser.add_argument('--abbreviated', action='store_true', help='Prefer abbreviated scripture book name in labels.')
+  parser.add_argument('--host', help='Host for "serve" to listen on. Default: "127.0.0.1".')
+  parser.add_argument('--port', type=int, help='Port for "serve" to listen on. Default: 8000.')
+  parser.add_argument('--warm-langs', help='Comma-separated languages for "serve" to build lookup tables for at startup. Default: the --lang language.')
+  parser.add_argument('--quiet', action='store_true', help='Don’t log each request for "serve".')
+  parser.add_argument('--profile', action='store_true', help='Write time spent in each stage, cache hit rates, and the slowest inputs to stderr as JSON (for "serve", include them in /stats).')
   
   args = parser.parse_args()
   
+  if args.profile:
+    # Imported here, since it's only needed with --profile
+    from . import profiling
+    profiling.enable()
+  
+  if args.command == 'serve':
+    # Imported here, since it imports http.server and is only needed for serve
+    from . import server
+    server.serve(
+      host = args.host or '127.0.0.1',
+      port = args.port if args.port is not None else 8000,
+      default_lang = args.lang or 'en',
+      warm_langs = args.warm_langs.split(',') if args.warm_langs else None,
+      quiet = args.quiet,
+    )
+    return
+  
   command = getattr(lookup, args.command)
-  result = command(
-    args.input,
-    lang = args.lang or 'en',
-    separator = args.separator or '\n',
-    sort_by = args.sort_by,
-    source = args.source or 'python-scripture-scraper',
-    link_class = args.link_class,
-    link_target = args.link_target,
-    use_query_parameters = args.use_query_parameters,
-    skip_lang = args.skip_lang,
-    skip_fragment = args.skip_fragment,
-    skip_book_name = args.skip_book_name,
-    abbreviated = args.abbreviated,
-  )
-  
-  print(result)
+  if args.command in lookup.commands_without_input:
+    print(get_output(command(lang = args.lang or 'en')))
+    return
+  
+  if args.input is None and not args.input_file:
+    parser.error('an input, "-" (stdin), or --input-file is required')
+  
+  def run_command(input_string):
+    return command(
+      input_string,
+      lang = args.lang or 'en',
+      separator = args.separator or '\n',
+      sort_by = args.sort_by,
+      merge = args.merge,
+      source = args.source or 'python-scripture-scraper',
+      link_class = args.link_class,
+      link_target = args.link_target,
+      use_query_parameters = args.use_query_parameters,
+      skip_lang = args.skip_lang,
+      skip_fragment = args.skip_fragment,
+      skip_book_name = args.skip_book_name,
+      abbreviated = args.abbreviated,
+    )
+  
+  if args.input_file:
+    with open(args.input_file, 'r', encoding='utf-8') as f:
+      run_lines(run_command, f, jsonl = args.jsonl)
+  elif args.input == '-':
+    run_lines(run_command, sys.stdin, jsonl = args.jsonl)
+  else:
+    result = run_command(args.input)
+    if args.jsonl:
+      print(json.dumps({'line': 1, 'input': args.input, 'result': lookup.get_json_result(result)}, ensure_ascii=False))
+    else:
+      print(get_output(result))
+  
+  if args.profile:
+    sys.stderr.write(json.dumps(profiling.disable().get_stats(), ensure_ascii=False, indent=2) + '\n')
+
+# Run a command on each line of a file, writing each result as soon as it's ready
+# Blank lines are skipped. If a line can't be processed, the error is reported and processing continues with the next line.
+def run_lines(run_command, lines, jsonl = False):
+  for line_number, line in enumerate(lines, start=1):
+    input_string = line.rstrip('\r\n')
+    if not input_string.strip():
+      continue
+    try:
+      result = run_command(input_string)
+      if jsonl:
+        output = json.dumps({'line': line_number, 'input': input_string, 'result': lookup.get_json_result(result)}, ensure_ascii=False)
+      else:
+        output = get_output(result)
+    except Exception as e:
+      if jsonl:
+        print(json.dumps({'line': line_number, 'input': input_string, 'error': str(e)}, ensure_ascii=False), flush=True)
+      else:
+        sys.stderr.write(f'Error: Couldn’t process line {line_number} (“{input_string}”): {e}\n')
+      continue
+    print(output, flush=True)
+
+# Get the text to print for a result: strings as they are, and other results (such as references or lists of languages) as JSON
+def get_output(result):
+  if isinstance(result, str):
+    return result
+  return json.dumps(lookup.get_json_result(result), ensure_ascii=False)
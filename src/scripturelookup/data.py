@@ -2,21 +2,26 @@
 import os
 import sys
 import json
-import time
 import re
+import threading
+import pickle
+import functools
+import collections
 
-# Third-party libraries
-import requests
-from bs4 import BeautifulSoup
+# Internal imports
+from . import cache, network, bundle, chapters, profiling
 
 
 data_directory = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'data')
 os.makedirs(data_directory, exist_ok = True)
 
+# Base URL for python-scripture-scraper sample data (metadata and chapter content)
+scraper_base_url = 'https://cdn.jsdelivr.net/gh/samuelbradshaw/python-scripture-scraper@main/sample'
+
 # Download JSON data
 def download_data(filename, filepath):
-  request_url = f'https://cdn.jsdelivr.net/gh/samuelbradshaw/python-scripture-scraper@main/sample/{filename}'
-  r = requests.get(request_url)
+  request_url = f'{scraper_base_url}/{filename}'
+  r = network.get(request_url)
   r.encoding = 'utf-8'
   if r and r.status_code == 200:
     data = r.content
@@ -25,30 +30,456 @@ def download_data(filename, filepath):
   else:
     sys.exit('\nError: Couldn’t download JSON data:\n{request_url}\n')
 
-# Load JSON data
+# Version of the compiled data format (increase this when the format changes, so older compiled files are regenerated)
+compiled_data_version = 1
+
+# Get the path of the compiled (pickle) version of a JSON data file
+def get_compiled_data_path(filename):
+  if filename.endswith('.min.json'):
+    filename = filename[:-len('.min.json')]
+  return os.path.join(data_directory, filename + '.pickle')
+
+# Get a signature for a JSON data file, used to check whether its compiled version is up to date
+def get_data_signature(filepath):
+  stat = os.stat(filepath)
+  return (compiled_data_version, stat.st_size, stat.st_mtime_ns)
+
+# Share identical strings, so the compiled file and loaded data are smaller
+def intern_strings(value):
+  if isinstance(value, dict):
+    return {sys.intern(k): intern_strings(v) for k, v in value.items()}
+  elif isinstance(value, list):
+    return [intern_strings(v) for v in value]
+  elif isinstance(value, str):
+    return sys.intern(value)
+  return value
+
+# Compile a JSON data file to a pickle file, which is faster to load, and return the data
+# The compiled file starts with a signature of the JSON file, followed by the data
+def compile_data(filename):
+  filepath = os.path.join(data_directory, filename)
+  with open(filepath, 'r', encoding='utf-8') as f:
+    data = intern_strings(json.load(f))
+  compiled_filepath = get_compiled_data_path(filename)
+  try:
+    with open(compiled_filepath + '.tmp', 'wb') as f:
+      pickle.dump(get_data_signature(filepath), f, protocol = pickle.HIGHEST_PROTOCOL)
+      pickle.dump(data, f, protocol = pickle.HIGHEST_PROTOCOL)
+    os.replace(compiled_filepath + '.tmp', compiled_filepath)
+  except OSError:
+    # The data directory may not be writable – the JSON data can still be used
+    pass
+  return data
+
+# Load compiled data, or return None if it doesn't exist or is out of date
+def load_compiled_data(filename):
+  try:
+    with open(get_compiled_data_path(filename), 'rb') as f:
+      if pickle.load(f) != get_data_signature(os.path.join(data_directory, filename)):
+        return None
+      return pickle.load(f)
+  except (OSError, pickle.UnpicklingError, EOFError):
+    return None
+
+# Load JSON data (from the compiled version, if it's up to date)
 def load_data(filename):
   filepath = os.path.join(data_directory, filename)
   if os.path.isfile(filepath):
-    with open(filepath, 'r', encoding='utf-8') as f:
-      return json.load(f)
+    data = load_compiled_data(filename)
+    if data is None:
+      data = compile_data(filename)
+    return data
   else:
     download_data(filename, filepath)
     return load_data(filename)
 
 # Update JSON data
 def update_data():
-  for filename in ('metadata-languages.min.json', 'metadata-scriptures.min.json',):
+  for filename in metadata_filenames:
     download_data(filename, os.path.join(data_directory, filename))
+    compile_data(filename)
+
+# Get the path of the file with HTTP validators (ETag and Last-Modified) for a JSON data file
+def get_validators_path(filename):
+  if filename.endswith('.min.json'):
+    filename = filename[:-len('.min.json')]
+  return os.path.join(data_directory, filename + '.http.json')
+
+# Load HTTP validators for a JSON data file (empty if it wasn't downloaded by reload_metadata)
+def load_validators(filename):
+  try:
+    with open(get_validators_path(filename), 'r', encoding='utf-8') as f:
+      return json.load(f)
+  except (OSError, ValueError):
+    return {}
+
+# Download JSON data if it changed on the server since it was last downloaded (If-None-Match / If-Modified-Since)
+# Returns a tuple: (data bytes, or None if it didn't change, HTTP validators)
+def download_data_if_modified(filename, force = False):
+  request_url = f'{scraper_base_url}/{filename}'
+  validators = {} if force or not os.path.isfile(os.path.join(data_directory, filename)) else load_validators(filename)
+  headers = {}
+  if validators.get('etag'):
+    headers['If-None-Match'] = validators['etag']
+  if validators.get('lastModified'):
+    headers['If-Modified-Since'] = validators['lastModified']
+  r = network.get(request_url, headers = headers)
+  if r.status_code == 304 and validators:
+    return None, validators
+  if r and r.status_code == 200:
+    return r.content, {'etag': r.headers.get('ETag'), 'lastModified': r.headers.get('Last-Modified')}
+  raise OSError(f'Couldn’t download JSON data (HTTP {r.status_code}):\n{request_url}')
+
+# Save downloaded JSON data (if it changed) and its HTTP validators, and compile it
+# Files are written to temporary files first, so other processes never read a partial file
+def save_data(filename, data, validators):
+  if data is not None:
+    filepath = os.path.join(data_directory, filename)
+    with open(filepath + '.tmp', 'wb') as f:
+      f.write(data)
+    os.replace(filepath + '.tmp', filepath)
+    compile_data(filename)
+  validators_path = get_validators_path(filename)
+  with open(validators_path + '.tmp', 'w', encoding='utf-8') as f:
+    json.dump(validators, f)
+  os.replace(validators_path + '.tmp', validators_path)
+
+
+# Punctuation types in the metadata, and the separator patterns built from them (with extra separators that are always supported)
+separator_patterns = {
+  'reference_separators_pattern': ('referenceSeparator', (';', '\n')),
+  'chapter_verse_separators_pattern': ('chapterVerseSeparator', (':',)),
+  'verse_group_separators_pattern': ('verseGroupSeparator', (',',)),
+  'verse_range_separators_pattern': ('verseRangeSeparator', ('-', '–', '〜')),
+  'opening_parenthesis_pattern': ('openingParenthesis', ('(',)),
+  'closing_parenthesis_pattern': ('closingParenthesis', (')',)),
+}
+
+# Lookup tables built from one version of the metadata, by (build function, *arguments), or by build function if there aren't any arguments
+# Tables are built the first time they're used, with build(*arguments, metadata = metadata). Example: metadata.tables[lookup.ParserTables, 'en']
+class MetadataTables(dict):
+  def __init__(self, metadata):
+    super().__init__()
+    self.metadata = metadata
+  
+  def __missing__(self, key):
+    profiler = profiling.profiler
+    if profiler:
+      start_time = profiler.start()
+    build, *args = key if isinstance(key, tuple) else (key,)
+    table = build(*args, metadata = self.metadata)
+    if profiler:
+      profiler.mark(f'table/{build.__name__}', start_time)
+    # If several threads build the same table at once, they all use the first one that's finished
+    return self.setdefault(key, table)
+
+# One version of the metadata (languages and scriptures), with the separator patterns and lookup tables built from it
+# A version isn't changed after it's built. reload_metadata builds a new version and replaces data.metadata with it,
+# so every lookup table built from the old version is replaced at the same time.
+class Metadata:
+  def __init__(self, languages, scriptures):
+    self.languages = languages
+    self.scriptures = scriptures
+    punctuation = scriptures['summary']['punctuation']
+    for name, (punctuation_type, extra_separators) in separator_patterns.items():
+      setattr(self, name, r'|'.join([re.escape(s.strip()) for s in punctuation[punctuation_type]] + [re.escape(s) for s in extra_separators]))
+    self.tables = MetadataTables(self)
+
+# Check that metadata has the structure that lookups depend on, raising ValueError if it doesn't
+def validate_metadata(metadata):
+  try:
+    if not metadata.languages['languages'] or not metadata.languages['mapToBcp47']:
+      raise ValueError('no languages')
+    if not metadata.scriptures['structure']:
+      raise ValueError('no publications')
+    for publication_slug, publication_info in metadata.scriptures['structure'].items():
+      for book_slug, book_info in publication_info['books'].items():
+        if not isinstance(book_info['churchChapters'], list) or 'churchUri' not in book_info:
+          raise ValueError(f'invalid book: {publication_slug}/{book_slug}')
+    if 'en' not in metadata.scriptures['languages']:
+      raise ValueError('no English names')
+    for lang, language_data in metadata.scriptures['languages'].items():
+      for key in ('translatedNames', 'numerals', 'punctuation'):
+        if key not in language_data:
+          raise ValueError(f'no “{key}” for “{lang}”')
+    metadata.scriptures['summary']['churchAvailability'].items()
+    metadata.scriptures['mapToSlug'].items()
+    for name in separator_patterns:
+      re.compile(getattr(metadata, name))
+  except (KeyError, TypeError, AttributeError, re.error) as e:
+    raise ValueError(f'Invalid metadata: {e!r}') from e
+  except ValueError as e:
+    raise ValueError(f'Invalid metadata: {e}') from e
+
+
+# Metadata files, and the names of the module attributes for the current version of the metadata
+# Metadata is loaded the first time it's used (for example, data.scriptures), rather than when this module is imported
+metadata_filenames = ('metadata-languages.min.json', 'metadata-scriptures.min.json',)
+metadata_names = (
+  'metadata',
+  'languages',
+  'scriptures',
+  *separator_patterns,
+)
+metadata_lock = threading.Lock()
+reload_lock = threading.Lock()
+
+# Functions cached with metadata_cache: (module globals, name, function, maxsize)
+metadata_cached_functions = []
+
+# Whether the GIL is disabled (in free-threaded builds of Python 3.13+)
+free_threaded = not getattr(sys, '_is_gil_enabled', lambda: True)()
+
+# Cache a function's results, for metadata_cache
+# In free-threaded builds, functools.lru_cache locks on every call, so threads calling the same function would wait for each other.
+# A dictionary is used instead, since reading it doesn't lock. Results aren't added once it has maxsize results.
+def make_metadata_cache(function, maxsize):
+  if not free_threaded:
+    return functools.lru_cache(maxsize = maxsize)(function)
+  results = {}
+  @functools.wraps(function)
+  def cached_function(*args, **kwargs):
+    key = (args, tuple(kwargs.items())) if kwargs else args
+    result = results.get(key)
+    if result is None:
+      result = function(*args, **kwargs)
+      if len(results) < maxsize:
+        results[key] = result
+    return result
+  return cached_function
+
+# Decorator that caches a function's results until the metadata changes
+# When the metadata changes, the function's module attribute is replaced with a new cache, so results for the old metadata
+# aren't returned after that (lookups in progress can still finish with the old cache). Call the function through its module.
+def metadata_cache(maxsize = 32):
+  def decorator(function):
+    metadata_cached_functions.append((function.__globals__, function.__name__, function, maxsize))
+    return make_metadata_cache(function, maxsize)
+  return decorator
+
+# Make a version of the metadata the current one, with module attributes for each part of it (i.e. data.scriptures)
+def set_metadata(new_metadata):
+  global metadata
+  globals().update({name: getattr(new_metadata, name) for name in metadata_names if name != 'metadata'})
+  # Set metadata last, since it's used to check whether metadata is loaded
+  metadata = new_metadata
+  for module_globals, name, function, maxsize in metadata_cached_functions:
+    module_globals[name] = make_metadata_cache(function, maxsize)
+
+# Load metadata and separator patterns (if they aren't already loaded)
+def load_metadata():
+  with metadata_lock:
+    if 'metadata' in globals():
+      return
+    set_metadata(Metadata(load_data('metadata-languages.min.json'), load_data('metadata-scriptures.min.json')))
+
+# Download metadata if it changed on the server (or always, if force is True), and switch to it without restarting
+# The new metadata is validated, and every lookup table that was built for the current metadata is built again for the
+# new metadata before it's used. Then it replaces the current metadata all at once, so lookups never see half-built tables.
+# If the download or validation fails, the current metadata is kept and the error is raised.
+# Returns True if the metadata changed.
+def reload_metadata(force = False):
+  with reload_lock:
+    load_metadata()
+    current_metadata = metadata
+    downloads = {}
+    for filename in metadata_filenames:
+      data, validators = download_data_if_modified(filename, force = force)
+      # Data that's the same as the current file doesn't need to be reloaded
+      if data is not None:
+        with open(os.path.join(data_directory, filename), 'rb') as f:
+          if f.read() == data:
+            data = None
+      downloads[filename] = (data, validators)
+    if all(data is None for data, validators in downloads.values()):
+      for filename, (data, validators) in downloads.items():
+        save_data(filename, None, validators)
+      return False
+    
+    # Build the new version of the metadata and its lookup tables, while the current version is still used
+    def get_downloaded_value(filename, current_value):
+      data = downloads[filename][0]
+      if data is None:
+        return current_value
+      try:
+        return intern_strings(json.loads(data))
+      except ValueError as e:
+        raise ValueError(f'Invalid metadata: {filename} isn’t valid JSON ({e})') from e
+    try:
+      new_metadata = Metadata(get_downloaded_value('metadata-languages.min.json', current_metadata.languages), get_downloaded_value('metadata-scriptures.min.json', current_metadata.scriptures))
+      validate_metadata(new_metadata)
+      for key in list(current_metadata.tables):
+        new_metadata.tables[key]
+    except (KeyError, TypeError, AttributeError) as e:
+      raise ValueError(f'Invalid metadata: {e!r}') from e
+    
+    for filename, (data, validators) in downloads.items():
+      save_data(filename, data, validators)
+    with metadata_lock:
+      set_metadata(new_metadata)
+    # Chapter URLs may have changed
+    if chapter_cache:
+      chapter_cache.clear()
+    return True
+
+# Load metadata or the content bundle the first time they're used
+def __getattr__(name):
+  if name in metadata_names:
+    load_metadata()
+    return globals()[name]
+  elif name == 'content_bundle':
+    return get_content_bundle()
+  raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+# Get the user's cache directory for this package (XDG_CACHE_HOME or ~/.cache on Linux, ~/Library/Caches on macOS, and LOCALAPPDATA on Windows)
+# The package directory isn't used for caches, since it often isn't writable
+def get_user_cache_directory():
+  if sys.platform == 'win32':
+    base_directory = os.environ.get('LOCALAPPDATA') or os.path.expanduser(os.path.join('~', 'AppData', 'Local'))
+  elif sys.platform == 'darwin':
+    base_directory = os.path.expanduser(os.path.join('~', 'Library', 'Caches'))
+  else:
+    base_directory = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser(os.path.join('~', '.cache'))
+  return os.path.join(base_directory, 'scripturelookup')
+
+# Cache for chapter content (set to None to disable)
+# Chapters that can't be written to the cache (for example, if the directory isn't writable) are still used, but they aren't cached
+default_content_cache_directory = os.path.join(get_user_cache_directory(), 'content-cache')
+content_cache = cache.ContentCache(default_content_cache_directory)
+
+# Configure the chapter content cache
+# max_size is in bytes, and ttl is the number of seconds before a cached chapter is revalidated with the server
+def configure_content_cache(directory = None, max_size = 200 * 1024 * 1024, ttl = 7 * 24 * 60 * 60, enabled = True):
+  global content_cache
+  if enabled:
+    content_cache = cache.ContentCache(directory or default_content_cache_directory, max_size = max_size, ttl = ttl)
+  else:
+    content_cache = None
+
+# In-memory cache of recently used chapters, parsed and indexed by verse (set to None to disable)
+chapter_cache = chapters.ChapterCache()
+
+# Configure the in-memory chapter cache
+# ttl is the number of seconds before a chapter is read again (from the content bundle, the content cache, or the server)
+def configure_chapter_cache(max_chapters = 64, ttl = 10 * 60, enabled = True):
+  global chapter_cache
+  chapter_cache = chapters.ChapterCache(max_chapters = max_chapters, ttl = ttl) if enabled else None
+
+# Local content bundle, if one has been downloaded (see update_content), and the path of the configured bundle
+default_content_bundle_path = os.path.join(data_directory, 'content-bundle.sqlite')
+content_bundle_path = default_content_bundle_path
+content_bundle_lock = threading.Lock()
 
-languages = load_data('metadata-languages.min.json')
-scriptures = load_data('metadata-scriptures.min.json')
+# Get the local content bundle (opened the first time it's used), or None if there isn't one
+def get_content_bundle():
+  global content_bundle
+  if 'content_bundle' not in globals():
+    with content_bundle_lock:
+      if 'content_bundle' not in globals():
+        content_bundle = bundle.open_bundle(content_bundle_path)
+  return content_bundle
 
-reference_separators_pattern = r'|'.join([re.escape(s.strip()) for s in scriptures['summary']['punctuation']['referenceSeparator']] + [re.escape(';'), re.escape('\n')])
-chapter_verse_separators_pattern = r'|'.join([re.escape(s.strip()) for s in scriptures['summary']['punctuation']['chapterVerseSeparator']] + [re.escape(':')])
-verse_group_separators_pattern = r'|'.join([re.escape(s.strip()) for s in scriptures['summary']['punctuation']['verseGroupSeparator']] + [re.escape(',')])
-verse_range_separators_pattern = r'|'.join([re.escape(s.strip()) for s in scriptures['summary']['punctuation']['verseRangeSeparator']] + [re.escape('-'), re.escape('–'), re.escape('〜')])
-opening_parenthesis_pattern = r'|'.join([re.escape(s.strip()) for s in scriptures['summary']['punctuation']['openingParenthesis']] + [re.escape('(')])
-closing_parenthesis_pattern = r'|'.join([re.escape(s.strip()) for s in scriptures['summary']['punctuation']['closingParenthesis']] + [re.escape(')')])
+# Make a bundle the local content bundle (or None to disable it), closing the one it replaces
+def set_content_bundle(new_content_bundle):
+  global content_bundle
+  with content_bundle_lock:
+    replaced_content_bundle = globals().get('content_bundle')
+    content_bundle = new_content_bundle
+    if replaced_content_bundle and replaced_content_bundle is not new_content_bundle:
+      replaced_content_bundle.close()
+
+# Configure the local content bundle. update_content adds content to the bundle at this path, unless it's given another path.
+def configure_content_bundle(path = None, enabled = True):
+  global content_bundle_path
+  content_bundle_path = path or default_content_bundle_path
+  set_content_bundle(bundle.open_bundle(content_bundle_path) if enabled else None)
+
+# Download chapter content into the local content bundle, so it can be looked up without a network connection
+# If publications is None, all publications are downloaded
+def update_content(lang = 'en', publications = None, path = None, workers = 8):
+  # Imported here, since it's slow to import and only needed for downloads
+  import concurrent.futures
+  load_metadata()
+  source = 'python-scripture-scraper'
+  if lang != 'en':
+    sys.stdout.write(f'Warning: Content from {source} is only available in English – downloading “en” (English) instead of “{lang}”.\n')
+    lang = 'en'
+  
+  chapter_requests = {}
+  for publication_slug, publication_data in scriptures['structure'].items():
+    if publications and publication_slug not in publications:
+      continue
+    for book_slug, book_data in publication_data['books'].items():
+      for chapter in book_data['churchChapters']:
+        cache_key, request_url = get_chapter_request(publication_slug, book_slug, chapter, None, lang = lang, source = source)
+        chapter_requests[cache_key] = request_url
+  
+  # Download chapters
+  def download_chapter(request_url):
+    r = network.get(request_url)
+    r.encoding = 'utf-8'
+    if r and r.status_code == 200:
+      return r.text
+    return None
+  chapters = []
+  with concurrent.futures.ThreadPoolExecutor(max_workers = workers) as executor:
+    for (cache_key, request_url), text in zip(chapter_requests.items(), executor.map(download_chapter, chapter_requests.values())):
+      if text is None:
+        sys.stdout.write(f'Warning: Couldn’t download chapter content:\n{request_url}\n')
+      else:
+        chapters.append((cache_key, text))
+  
+  path = path or content_bundle_path
+  current_content_bundle = get_content_bundle()
+  if current_content_bundle and current_content_bundle.path == path:
+    current_content_bundle.set_many(chapters)
+  else:
+    new_content_bundle = bundle.ContentBundle(path)
+    new_content_bundle.set_many(chapters)
+    if path == content_bundle_path:
+      set_content_bundle(new_content_bundle)
+    else:
+      # Bundles at other paths aren't used for lookups (see configure_content_bundle)
+      new_content_bundle.close()
+  return len(chapters)
+
+# Fetch content from a URL, using the local content bundle and content cache if they're enabled
+# Returns a tuple: (text or None, whether a network request was made)
+def fetch_content(cache_key, url):
+  current_content_bundle = get_content_bundle()
+  if current_content_bundle:
+    text = current_content_bundle.get(cache_key)
+    if text is not None:
+      return text, False
+  
+  if content_cache:
+    body, requested = content_cache.fetch(cache_key, url)
+    return (body.decode('utf-8') if body is not None else None), requested
+  
+  r = network.get(url)
+  r.encoding = 'utf-8'
+  if r and r.status_code == 200:
+    return r.text, True
+  return None, True
+
+# Fetch content like fetch_content, but as chunks (text, or UTF-8 bytes), which are read from the server as they're used
+# Returns a tuple: (iterable of chunks or None, whether a network request was made)
+def fetch_content_chunks(cache_key, url, chunk_size = 16384):
+  current_content_bundle = get_content_bundle()
+  if current_content_bundle:
+    text = current_content_bundle.get(cache_key)
+    if text is not None:
+      return [text], False
+  
+  if content_cache:
+    return content_cache.fetch_chunks(cache_key, url, chunk_size = chunk_size)
+  
+  r = network.get(url, stream = True)
+  if r and r.status_code == 200:
+    return r.iter_content(chunk_size), True
+  r.close()
+  return None, True
 
 
 # Get the BCP 47 language tag for a given language code
@@ -58,6 +489,7 @@ def get_bcp47(lang):
   elif lang and 'Hans' in lang:
     lang = 'cmn-Hans'
   
+  load_metadata()
   bcp47 = languages.get('mapToBcp47', {}).get(lang)
   if not bcp47:
     bcp47 = 'en'
@@ -67,59 +499,114 @@ def get_bcp47(lang):
   return bcp47
 
 
+# Get the cache key and URL for a given chapter's content, or (None, None) if the source isn't supported
+def get_chapter_request(publication_slug, book_slug, chapter, church_url, lang = 'en', source = 'python-scripture-scraper'):
+  if source == 'python-scripture-scraper':
+    # Content from this source is only available in English
+    return (source, 'en', publication_slug, book_slug, chapter), f'{scraper_base_url}/en-json/{publication_slug}/{book_slug}/{book_slug}-{chapter}.json'
+  elif source == 'ChurchofJesusChrist.org' and church_url:
+    return (source, lang, publication_slug, book_slug, chapter), church_url
+  return None, None
+
+
+# Get a parsed chapter (see chapters.Chapter), from the chapter cache if it's there, or None if the chapter couldn't be fetched
+def get_chapter(cache_key, request_url, source = 'python-scripture-scraper'):
+  if chapter_cache:
+    chapter = chapter_cache.get(cache_key)
+    if chapter is not None:
+      return chapter
+  if source == 'ChurchofJesusChrist.org':
+    # Pages are parsed as they're downloaded
+    chunks, requested = fetch_content_chunks(cache_key, request_url)
+    if chunks is None:
+      return None
+    chapter = chapters.parse_church_chapter(chunks)
+  else:
+    response_text, requested = fetch_content(cache_key, request_url)
+    if response_text is None:
+      return None
+    chapter = chapters.parse_chapter(response_text, source = source)
+  if chapter_cache:
+    chapter_cache.set(cache_key, chapter)
+  return chapter
+
+
 # Get the content for a given chapter verse from python-scripture-scraper or ChurchofJesusChrist.org
-def request_content(publication_slug, book_slug, chapter, verse_groups, church_url, lang = 'en', source = 'python-scripture-scraper'):
-  text_content = ''
-  
+# If the chapter was already fetched (see iter_contents), it can be passed in as fetched_chapters (cache key –> chapter or response text)
+def request_content(publication_slug, book_slug, chapter, verse_ranges, church_url, lang = 'en', source = 'python-scripture-scraper', fetched_chapters = None):
   if not publication_slug and book_slug and chapter:
-    return text_content
+    return ''
   
-  verse_numbers = []
-  if verse_groups:
-    for verse_group in verse_groups:
-      for verse_number in verse_group:
-        verse_numbers.append(str(verse_number))
+  cache_key, request_url = get_chapter_request(publication_slug, book_slug, chapter, church_url, lang = lang, source = source)
+  if not request_url:
+    return ''
+  if fetched_chapters and cache_key in fetched_chapters:
+    parsed_chapter = fetched_chapters[cache_key]
+    if isinstance(parsed_chapter, str):
+      parsed_chapter = chapters.parse_chapter(parsed_chapter, source = source)
+  else:
+    parsed_chapter = get_chapter(cache_key, request_url, source = source)
+  if parsed_chapter is None:
+    return ''
   
+  content_parts = [paragraph + '\n\n' for paragraph in parsed_chapter.iter_paragraphs(verse_ranges)]
+  content_parts.append('---------------------\n')
   if source == 'python-scripture-scraper':
-    request_url = f'https://cdn.jsdelivr.net/gh/samuelbradshaw/python-scripture-scraper@main/sample/en-json/{publication_slug}/{book_slug}/{book_slug}-{chapter}.json'
-    r = requests.get(request_url)
-    r.encoding = 'utf-8'
-    if r and r.status_code == 200:
-      chapter_data = r.json()
-      
-      if verse_numbers:
-        for paragraph in chapter_data['paragraphs']:
-          if paragraph['type'] == 'verse' and paragraph['number'] in verse_numbers:
-            text_content += paragraph['number'] + ' ' + paragraph['content'] + '\n\n'
-      else:
-        for paragraph in chapter_data['paragraphs']:
-          text_content += (paragraph['number'] + ' ' if paragraph['number'] else '') + paragraph['content'] + '\n\n'
-      
-      text_content += '---------------------\n'
-      text_content += 'Source: https://github.com/samuelbradshaw/python-scripture-scraper/tree/main/sample\n'
-      text_content += 'Public domain.\n'
-  
-  elif source == 'ChurchofJesusChrist.org' and church_url:
-    r = requests.get(church_url)
-    r.encoding = 'utf-8'
-    if r and r.status_code == 200:
-      soup = BeautifulSoup(r.text, 'html.parser')
-      paragraphs = soup.select('header [data-aid], .body-block [data-aid]')
-      if verse_numbers:
-        for paragraph in paragraphs:
-          verse_number_span = paragraph.select_one('.verse-number')
-          if verse_number_span and verse_number_span.text.strip() in verse_numbers:
-            text_content += paragraph.text.strip() + '\n\n'
-      else:
-        for paragraph in paragraphs:
-          text_content += paragraph.text.strip() + '\n\n'
-        
-      text_content += '---------------------\n'
-      text_content += f'Source: {church_url}\n'
-      text_content += 'Some content from this source may be subject to copyright.\n'
-      
-      # Pause for 1 second between requests to avoid overloading server
-      time.sleep(1)
+    content_parts.append('Source: https://github.com/samuelbradshaw/python-scripture-scraper/tree/main/sample\n')
+    content_parts.append('Public domain.\n')
+  elif source == 'ChurchofJesusChrist.org':
+    content_parts.append(f'Source: {church_url}\n')
+    content_parts.append('Some content from this source may be subject to copyright.\n')
+  return ''.join(content_parts)
+
+
+# Get the content for several chapters or verses (each a dictionary of request_content arguments), yielding each one in order as soon as it's ready
+# Up to `workers` chapters are fetched ahead at the same time (servers are still rate limited, see network.rate_limits), so memory use is bounded however many requests there are
+def iter_contents(content_requests, workers = 8):
+  # Imported here, since it's slow to import and only needed for downloads
+  import concurrent.futures
+  workers = max(1, workers)
+  with concurrent.futures.ThreadPoolExecutor(max_workers = workers) as executor:
+    # Requests that are waiting to be yielded, with their chapter cache keys
+    pending_requests = collections.deque()
+    # Cache key –> future for chapters needed by pending requests, and how many pending requests need them
+    chapter_futures = {}
+    chapter_counts = collections.Counter()
     
-  return text_content
+    def is_next_ready():
+      cache_key = pending_requests[0][1]
+      return cache_key is None or chapter_futures[cache_key].done()
+    
+    def next_content():
+      content_request, cache_key = pending_requests.popleft()
+      if cache_key is None:
+        return request_content(**content_request)
+      parsed_chapter = chapter_futures[cache_key].result()
+      chapter_counts[cache_key] -= 1
+      if not chapter_counts[cache_key]:
+        del chapter_futures[cache_key], chapter_counts[cache_key]
+      return request_content(**content_request, fetched_chapters = {cache_key: parsed_chapter})
+    
+    for content_request in content_requests:
+      source = content_request.get('source', 'python-scripture-scraper')
+      cache_key, request_url = get_chapter_request(content_request['publication_slug'], content_request['book_slug'], content_request['chapter'], content_request['church_url'], lang = content_request.get('lang', 'en'), source = source)
+      if not request_url:
+        cache_key = None
+      elif cache_key not in chapter_futures:
+        chapter_futures[cache_key] = executor.submit(get_chapter, cache_key, request_url, source)
+      if cache_key is not None:
+        chapter_counts[cache_key] += 1
+      pending_requests.append((content_request, cache_key))
+      # Yield content as soon as its chapter is ready, and keep up to `workers` chapters fetching ahead of the next request to yield
+      while pending_requests and (len(chapter_futures) > workers or is_next_ready()):
+        yield next_content()
+    
+    while pending_requests:
+      yield next_content()
+
+
+# Get the content for several chapters or verses (each a dictionary of request_content arguments), in the same order
+# Requests for the same chapter share one download (see iter_contents and the chapter cache), and up to `workers` chapters are fetched at the same time
+def request_contents(content_requests, workers = 8):
+  return list(iter_contents(content_requests, workers = workers))
 
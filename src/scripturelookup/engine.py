@@ -0,0 +1,91 @@
+# Thread-safe engine for looking up references from many threads at once (for example, in a multi-threaded server)
+# Example:
+#   lookup_engine = engine.Engine(lang = 'en', warm_langs = ('en', 'fr'))
+#   lookup_engine.get_label('jean 3:16', lang = 'fr')
+#
+# What threads share, and how:
+#   Lookup tables (parser tables, label tables, indexes, and scanners) are built from one version of the metadata, and aren't
+#   changed after they're built, so every thread reads the same tables without locks. The engine builds the tables for its
+#   languages when it's created, so the first lookups don't have to.
+#   ICU collators are kept for each thread (lookup.CollatorPool), since PyICU objects aren't safe to share between threads.
+#   Caches (chapters, content, and cached functions) and the HTTP session use their own locks.
+#   reload_metadata builds new tables before switching to them, so lookups in progress keep the tables they started with.
+# CitationIndex objects are changed by add and remove, so they shouldn't be changed while other threads query them.
+
+# Internal imports
+from . import data, lookup
+
+
+class Engine:
+  def __init__(self, lang = 'en', warm_langs = None):
+    self.lang = lang
+    self.warm_langs = tuple(warm_langs or (lang,))
+    self.warm_up()
+  
+  # Load metadata and build lookup tables for the warm languages
+  # Tables that are in use are rebuilt by reload_metadata before it switches metadata, so they don't need to be warmed up again
+  def warm_up(self):
+    data.load_metadata()
+    lookup.get_normalized_slug_index()
+    lookup.get_scripture_index()
+    for lang in self.warm_langs:
+      if lang == 'auto':
+        lookup.get_language_detector()
+        continue
+      lang = data.get_bcp47(lang)
+      lookup.get_parser_tables(lang)
+      for abbreviated in (False, True):
+        lookup.get_label_table(lang, abbreviated)
+  
+  # Version of the metadata that lookups use (see data.Metadata)
+  @property
+  def metadata(self):
+    return data.metadata
+  
+  # Download metadata if it changed on the server, and switch to it without restarting (see data.reload_metadata)
+  def reload_metadata(self, force = False):
+    return data.reload_metadata(force = force)
+  
+  def parse_references_string(self, input_string, lang = None, sort_by = None, merge = False):
+    return lookup.parse_references_string(input_string, lang = lang or self.lang, sort_by = sort_by, merge = merge)
+  
+  def sort_references(self, references, lang = None, sort_by = None):
+    return lookup.sort_references(references, lang = lang or self.lang, sort_by = sort_by)
+  
+  def detect_lang(self, input_string, default = None):
+    return lookup.detect_lang(input_string, default = default or self.lang)
+  
+  def find_references(self, text, lang = None, chunk_size = 65536):
+    return lookup.find_references(text, lang = lang or self.lang, chunk_size = chunk_size)
+  
+  # Commands, with the same options as the functions in lookup (see README.md)
+  
+  def get_content(self, input_string, lang = None, **options):
+    return lookup.get_content(input_string, lang = lang or self.lang, **options)
+  
+  def get_label(self, input_string, lang = None, **options):
+    return lookup.get_label(input_string, lang = lang or self.lang, **options)
+  
+  def get_church_uri(self, input_string, lang = None, **options):
+    return lookup.get_church_uri(input_string, lang = lang or self.lang, **options)
+  
+  def get_church_url(self, input_string, lang = None, **options):
+    return lookup.get_church_url(input_string, lang = lang or self.lang, **options)
+  
+  def get_church_link(self, input_string, lang = None, **options):
+    return lookup.get_church_link(input_string, lang = lang or self.lang, **options)
+  
+  def get_reference_objects(self, input_string, lang = None, **options):
+    return lookup.get_reference_objects(input_string, lang = lang or self.lang, **options)
+  
+  def get_reference_attributes(self, input_string, lang = None, **options):
+    return lookup.get_reference_attributes(input_string, lang = lang or self.lang, **options)
+  
+  def get_langs(self, **options):
+    return lookup.get_langs(**options)
+  
+  def get_punctuation(self, lang = None, **options):
+    return lookup.get_punctuation(lang = lang or self.lang, **options)
+  
+  def get_numerals(self, lang = None, **options):
+    return lookup.get_numerals(lang = lang or self.lang, **options)
@@ -0,0 +1,159 @@
+# Extracts chapter content from ChurchofJesusChrist.org pages as they're read, without building a document tree (BeautifulSoup isn't needed)
+
+# Python standard libraries
+import codecs
+import collections
+import html.parser
+
+
+# Extracts paragraphs from ChurchofJesusChrist.org chapter pages as HTML is fed in, without building a document tree
+# Paragraphs are elements with a data-aid attribute in the chapter's header or body blocks (like the CSS selector "header [data-aid], .body-block [data-aid]")
+# Text is extracted the same way as BeautifulSoup's Tag.text. Each finished paragraph is available from pop_paragraphs() as (verse number or None, text), in document order.
+class ChurchChapterParser(html.parser.HTMLParser):
+  # Elements that don't have end tags
+  void_elements = frozenset(('area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param', 'source', 'track', 'wbr'))
+  # Elements whose text isn't part of a paragraph's text
+  hidden_elements = frozenset(('script', 'style', 'template', 'rt', 'rp'))
+  # Elements where text that's only whitespace is kept as-is (elsewhere, it's replaced with a single newline or space)
+  preformatted_elements = frozenset(('pre', 'textarea'))
+  
+  def __init__(self):
+    super().__init__(convert_charrefs = True)
+    # Stack of open elements: (tag, whether descendants are in the header or a body block, paragraph started by the element or None, verse number text parts collected by the element or None)
+    self.open_elements = []
+    # Paragraphs that have been started but not popped, in document order: [verse number text parts or None, text parts, whether the paragraph is finished]
+    self.paragraphs = collections.deque()
+    # Paragraphs and verse numbers whose elements are open, which collect text as it's fed in
+    self.open_paragraphs = []
+    self.open_verse_numbers = []
+    # Text since the last tag (HTMLParser can split text between calls to handle_data)
+    self.text_parts = []
+    self.hidden_depth = 0
+    self.preformatted_depth = 0
+  
+  # Add the text since the last tag to open paragraphs and verse numbers
+  def end_text(self):
+    if not self.text_parts:
+      return
+    text = ''.join(self.text_parts)
+    self.text_parts = []
+    if not self.preformatted_depth and not text.strip(' \n\t\f\r'):
+      text = '\n' if '\n' in text else ' '
+    for paragraph in self.open_paragraphs:
+      paragraph[1].append(text)
+    for verse_number in self.open_verse_numbers:
+      verse_number.append(text)
+  
+  def handle_data(self, data):
+    if not self.hidden_depth and self.open_paragraphs:
+      self.text_parts.append(data)
+  
+  def handle_starttag(self, tag, attrs):
+    self.end_text()
+    in_chapter = self.open_elements[-1][1] if self.open_elements else False
+    paragraph = None
+    verse_number = None
+    classes = ()
+    for name, value in attrs:
+      if name == 'class' and value:
+        classes = value.split()
+      elif name == 'data-aid' and in_chapter:
+        paragraph = [None, [], False]
+    if 'verse-number' in classes:
+      # The first verse number in each open paragraph
+      for open_paragraph in self.open_paragraphs:
+        if open_paragraph[0] is None:
+          verse_number = verse_number if verse_number is not None else []
+          open_paragraph[0] = verse_number
+    if paragraph:
+      self.paragraphs.append(paragraph)
+    if tag in self.void_elements:
+      if paragraph:
+        paragraph[2] = True
+      return
+    self.open_elements.append((tag, in_chapter or tag == 'header' or 'body-block' in classes, paragraph, verse_number))
+    if paragraph:
+      self.open_paragraphs.append(paragraph)
+    if verse_number is not None:
+      self.open_verse_numbers.append(verse_number)
+    if tag in self.hidden_elements:
+      self.hidden_depth += 1
+    if tag in self.preformatted_elements:
+      self.preformatted_depth += 1
+  
+  def handle_startendtag(self, tag, attrs):
+    self.handle_starttag(tag, attrs)
+    if tag not in self.void_elements:
+      self.handle_endtag(tag)
+  
+  def handle_endtag(self, tag):
+    self.end_text()
+    # End tags close the most recent open element with the same tag (and any elements opened after it), and are ignored if there isn't one
+    for depth in range(len(self.open_elements) - 1, -1, -1):
+      if self.open_elements[depth][0] == tag:
+        break
+    else:
+      return
+    while len(self.open_elements) > depth:
+      self.close_element(self.open_elements.pop())
+  
+  def close_element(self, element):
+    tag, in_chapter, paragraph, verse_number = element
+    # Elements close in the reverse order they were opened, so their paragraph and verse number are the last ones opened
+    if paragraph:
+      paragraph[2] = True
+      self.open_paragraphs.pop()
+    if verse_number is not None:
+      self.open_verse_numbers.pop()
+    if tag in self.hidden_elements:
+      self.hidden_depth -= 1
+    if tag in self.preformatted_elements:
+      self.preformatted_depth -= 1
+  
+  # Comments and declarations aren't part of the text, but separate text before and after them
+  def handle_comment(self, data):
+    self.end_text()
+  
+  def handle_decl(self, decl):
+    self.end_text()
+  
+  def handle_pi(self, data):
+    self.end_text()
+  
+  def handle_unknown_decl(self, data):
+    self.end_text()
+    if data.startswith('CDATA['):
+      self.handle_data(data[len('CDATA['):])
+      self.end_text()
+  
+  def close(self):
+    super().close()
+    self.end_text()
+    # Elements that weren't closed end with the document
+    while self.open_elements:
+      self.close_element(self.open_elements.pop())
+  
+  # Remove and return the paragraphs that are finished (and have no unfinished paragraphs before them), as (verse number or None, text)
+  def pop_paragraphs(self):
+    paragraphs = []
+    while self.paragraphs and self.paragraphs[0][2]:
+      verse_number, text_parts, finished = self.paragraphs.popleft()
+      paragraphs.append((''.join(verse_number or ()).strip() or None, ''.join(text_parts).strip()))
+    return paragraphs
+
+
+# Iterate over the paragraphs of a ChurchofJesusChrist.org chapter page as (verse number or None, text), given chunks of HTML (str, or UTF-8 bytes)
+# Paragraphs are yielded as soon as they're complete, so a page can be processed while it's downloaded
+def iter_church_paragraphs(chunks):
+  parser = ChurchChapterParser()
+  decoder = None
+  for chunk in chunks:
+    if isinstance(chunk, bytes):
+      decoder = decoder or codecs.getincrementaldecoder('utf-8')(errors = 'replace')
+      chunk = decoder.decode(chunk)
+    parser.feed(chunk)
+    yield from parser.pop_paragraphs()
+  if decoder:
+    parser.feed(decoder.decode(b'', final = True))
+  parser.close()
+  yield from parser.pop_paragraphs()
@@ -1,128 +1,479 @@
 # Python standard libraries
 import sys
 import re
+import bisect
+import warnings
+import threading
 import unicodedata
-
-# Third-party libraries
-import icu
+import functools
+import itertools
+import collections
+import collections.abc
 
 # Internal imports
-from . import data, numbers
+from . import data, numbers, verses, profiling
+
+
+# Language-specific tables used when parsing references (book names, punctuation, and compiled patterns)
+# These are built once per language and reused for every parse
+class ParserTables:
+  def __init__(self, lang = 'en', metadata = None):
+    metadata = metadata or data.metadata
+    self.lang = lang
+    punctuation = metadata.scriptures['summary']['punctuation']
+    
+    # Leading or trailing punctuation to strip from inputs
+    self.punctuation_to_strip = ''.join(punctuation['referenceSeparator'] + punctuation['verseGroupSeparator'] + punctuation['verseRangeSeparator']) + '(;,.'
+    
+    # Separator patterns
+    self.reference_separators = re.compile(metadata.reference_separators_pattern)
+    self.chapter_verse_separators = re.compile(metadata.chapter_verse_separators_pattern)
+    self.verse_group_separators = re.compile(metadata.verse_group_separators_pattern)
+    self.verse_group_separators_repeated = re.compile(rf'(?:{metadata.verse_group_separators_pattern})+')
+    self.verse_range_separators = re.compile(metadata.verse_range_separators_pattern)
+    self.opening_parenthesis = re.compile(metadata.opening_parenthesis_pattern)
+    self.closing_parenthesis = re.compile(metadata.closing_parenthesis_pattern)
+    self.chapter_range = re.compile(rf'\d+{metadata.verse_range_separators_pattern}\d+')
+    self.trailing_text = re.compile(rf'^.*?\d((?:\:|{metadata.closing_parenthesis_pattern})?\s+[^{metadata.opening_parenthesis_pattern}|\s]+)$')
+    self.chapter = re.compile(rf'^.*?(\d(?:\d|\s|{metadata.chapter_verse_separators_pattern}|{metadata.verse_range_separators_pattern}|{metadata.verse_group_separators_pattern})*)$')
+    
+    # Book names and abbreviations in this language, longest first
+    scripture_book_names = set()
+    for volume_data in metadata.scriptures['structure'].values():
+      for book_slug in volume_data['books'].keys():
+        book_info = metadata.scriptures['languages'][lang]['translatedNames'].get(book_slug)
+        if book_info:
+          book_name = (book_info.get('name') or '').replace('\xa0', ' ')
+          if book_name:
+            scripture_book_names.add(book_name)
+          book_abbrev = (book_info.get('abbrev') or '').replace('\xa0', ' ')
+          if book_abbrev:
+            scripture_book_names.add(book_abbrev)
+    scripture_book_names = sorted(scripture_book_names, key=lambda x: (-len(x), x))
+    
+    # Book names that contain commas, paired with the same name without commas. Example: ("JST, Genesis", "JST Genesis")
+    self.book_names_with_commas = []
+    scripture_book_names_without_commas = []
+    for scripture_book_name in scripture_book_names:
+      scripture_book_name_without_comma = self.verse_group_separators.sub('', scripture_book_name)
+      scripture_book_names_without_commas.append(scripture_book_name_without_comma)
+      if self.verse_group_separators.search(scripture_book_name):
+        self.book_names_with_commas.append((scripture_book_name, scripture_book_name_without_comma))
+    
+    # Pattern for finding the start of each book name (used to split whitespace-separated references)
+    scripture_book_names_pattern = '|'.join([re.escape(sbn) for sbn in scripture_book_names_without_commas])
+    self.book_name_starts = re.compile(rf'(?:^|[^\-])\b({scripture_book_names_pattern})', flags=re.IGNORECASE)
 
 
-natural_sort_collators = {}
+# Get parser tables for a given BCP 47 language tag (built once for each version of the metadata)
+@data.metadata_cache(maxsize = 32)
+def get_parser_tables(lang = 'en'):
+  return data.metadata.tables[ParserTables, lang]
 
-class Reference:
-  def __init__(self, lang = 'en', publication_slug = None, book_slug = None, chapter = None, verse_groups = [], context_verse_groups = []):
+
+# Precomputed values for rendering labels in a given language: punctuation, book and chapter names, and formatted numbers
+# Names and numbers are built with the table, and the table isn't changed after that, so threads can share it without locks
+# (names and numbers that aren't in the table, such as chapter ranges, are built each time they're used)
+class LabelTable:
+  # Numbers from 1 to prebuilt_number_limit are formatted when the table is built (no chapter has more than 176 verses)
+  prebuilt_number_limit = 200
+  
+  def __init__(self, lang = 'en', abbreviated = False, metadata = None):
+    self.metadata = metadata or data.metadata
     self.lang = lang
-    self.publication_slug = publication_slug
-    self.book_slug = book_slug
-    self.chapter = chapter
-    self.verse_groups = verse_groups
-    self.context_verse_groups = context_verse_groups
+    self.abbreviated = abbreviated
+    self.translated_names = self.metadata.scriptures['languages'][lang]['translatedNames']
+    self.english_translated_names = self.metadata.scriptures['languages']['en']['translatedNames']
+    self.numerals = self.metadata.scriptures['languages'][lang]['numerals']
+    punctuation = self.metadata.scriptures['languages'][lang]['punctuation']
+    self.book_chapter_separator = punctuation['bookChapterSeparator']
+    self.chapter_verse_separator = punctuation['chapterVerseSeparator']
+    self.verse_range_separator = punctuation['verseRangeSeparator']
+    self.verse_group_separator = punctuation['verseGroupSeparator']
+    self.opening_parenthesis = punctuation['openingParenthesis']
+    self.closing_parenthesis = punctuation['closingParenthesis']
+    prebuilt_numbers = range(1, self.prebuilt_number_limit + 1)
+    self.formatted_numbers = dict(zip(prebuilt_numbers, numbers.format_many(prebuilt_numbers, target_lang = lang, target_custom_numerals = self.numerals)))
+    structure = self.metadata.scriptures['structure']
+    self.publication_names = {publication_slug: self.get_name(publication_slug) for publication_slug in structure}
+    self.book_names = {}
+    self.chapter_names = {}
+    for publication_info in structure.values():
+      for book_slug, book_info in publication_info['books'].items():
+        self.book_names[book_slug] = self.get_book_name(book_slug)
+        for chapter in book_info['churchChapters']:
+          if chapter not in self.chapter_names:
+            self.chapter_names[chapter] = self.get_chapter_name(chapter)
+  
+  # Get a translated name (or abbreviation), falling back to English
+  def get_name(self, slug):
+    name = self.translated_names.get(slug, {}).get('name') or self.english_translated_names.get(slug, {}).get('name')
+    if self.abbreviated:
+      name = self.translated_names.get(slug, {}).get('abbrev') or name
+    return name
+  
+  def get_book_name(self, book_slug):
+    # Books with a different name in labels (i.e. "Psalm 23" instead of "Psalms 23")
+    name_slug = label_book_slugs.get(book_slug, book_slug)
+    return self.get_name(name_slug) or ''
+  
+  def get_formatted_number(self, number):
+    return numbers.get_formatted_number(number, target_lang = self.lang, target_custom_numerals = self.numerals)
+  
+  # Get localized chapter name
+  def get_chapter_name(self, chapter):
+    chapter_name = (
+      self.translated_names.get(chapter, {}).get('name') or
+      self.english_translated_names.get(chapter, {}).get('name') or
+      self.format_number(chapter) or
+      self.format_chapter_range(chapter or '') or
+      chapter
+    )
+    if self.abbreviated:
+      chapter_name = self.translated_names.get(chapter, {}).get('abbrev') or chapter_name
+    return chapter_name
+  
+  def publication_name(self, publication_slug):
+    if publication_slug in self.publication_names:
+      return self.publication_names[publication_slug]
+    return self.get_name(publication_slug)
+  
+  def book_name(self, book_slug):
+    book_name = self.book_names.get(book_slug)
+    if book_name is None:
+      book_name = self.get_book_name(book_slug)
+    return book_name
+  
+  def format_number(self, number):
+    formatted_number = self.formatted_numbers.get(number)
+    if formatted_number is None:
+      formatted_number = self.get_formatted_number(number)
+    return formatted_number
+  
+  def chapter_name(self, chapter):
+    chapter_name = self.chapter_names.get(chapter)
+    if chapter_name is None:
+      chapter_name = self.get_chapter_name(chapter)
+    return chapter_name
+  
+  # Format a chapter range (i.e. "56-57") with localized numbers and punctuation
+  def format_chapter_range(self, chapter_string):
+    parser_tables = self.metadata.tables[ParserTables, self.lang]
+    new_groups = []
+    for group in parser_tables.verse_group_separators.split(chapter_string):
+      new_range_parts = []
+      for range_part in parser_tables.verse_range_separators.split(group):
+        new_chapter_verse_parts = [self.format_number(num) for num in parser_tables.chapter_verse_separators.split(range_part)]
+        new_range_parts.append(self.chapter_verse_separator.join(new_chapter_verse_parts))
+      new_groups.append(self.verse_range_separator.join(new_range_parts))
+    return self.verse_group_separator.join(new_groups)
+  
+  # Format verse ranges with localized numbers and punctuation
+  # Example: ((1, 2), (5, 7)) –> '1–2, 5–7'
+  def format_verse_ranges(self, verse_ranges):
+    formatted_ranges = []
+    for start, end in verse_ranges:
+      if start == end:
+        formatted_ranges.append(self.format_number(start))
+      else:
+        formatted_ranges.append(self.format_number(start) + self.verse_range_separator + self.format_number(end))
+    return self.verse_group_separator.join(formatted_ranges)
+
+
+# Book slugs to use for book names in labels
+label_book_slugs = {
+  'psalms': 'psalm',
+  'sections': 'doctrine-and-covenants',
+  'official-declarations': 'official-declaration',
+  'facsimiles': 'facsimile',
+  'jst-psalms': 'jst-psalm',
+}
+
+# Slugs in mapToSlug that the parser replaces with another book's slug
+parser_book_slugs = {
+  'psalm': 'psalms',
+  'section': 'sections',
+  'jst-psalms': 'jst-psalm',
+  'official-declaration': 'official-declarations',
+}
+
+
+# Get the label table for a given BCP 47 language tag (built once for each version of the metadata)
+@data.metadata_cache(maxsize = 64)
+def get_label_table(lang = 'en', abbreviated = False):
+  return data.metadata.tables[LabelTable, lang, abbreviated]
+
+
+# Direct lookups between publication and book slugs, Church URIs, and chapters, built once from the scripture structure
+class ScriptureIndex:
+  def __init__(self, metadata = None):
+    metadata = metadata or data.metadata
+    # Slug –> Church URI
+    self.publication_church_uris = {}
+    self.book_church_uris = {}
+    # Church URI –> slug (publications and books)
+    self.slugs_by_church_uri = {}
+    # Book slug –> publication slug
+    self.publications_by_book = {}
+    # Book slug –> list of chapters
+    self.chapters_by_book = {}
+    self.publication_slugs = frozenset(metadata.scriptures['structure'].keys())
+    for publication_slug, publication_info in metadata.scriptures['structure'].items():
+      self.publication_church_uris[publication_slug] = publication_info.get('churchUri')
+      self.slugs_by_church_uri.setdefault(publication_info.get('churchUri'), publication_slug)
+      for book_slug, book_info in publication_info['books'].items():
+        self.book_church_uris.setdefault(book_slug, book_info['churchUri'])
+        self.slugs_by_church_uri.setdefault(book_info['churchUri'], book_slug)
+        self.publications_by_book[book_slug] = publication_slug
+        self.chapters_by_book[book_slug] = book_info['churchChapters']
+    # Books that the parser gives another slug (see parser_book_slugs) have the same Church URI
+    for book_slug, parser_book_slug in parser_book_slugs.items():
+      if book_slug in self.book_church_uris:
+        self.book_church_uris.setdefault(parser_book_slug, self.book_church_uris[book_slug])
+
+
+# Get the scripture index (built once for each version of the metadata)
+@data.metadata_cache(maxsize = 1)
+def get_scripture_index():
+  return data.metadata.tables[ScriptureIndex]
+
+
+# Get the chapter part of a Church URI (e.g. /3)
+def get_church_uri_chapter(chapter, lang = 'en'):
+  chapter = str(chapter)
+  parser_tables = get_parser_tables(lang)
+  if parser_tables.chapter_range.match(chapter):
+    # Chapter range – only use the first chapter
+    chapter = parser_tables.verse_range_separators.split(chapter)[0]
+  return '/' + chapter
+
+
+# Get the verses part of a Church URI (e.g. .1-3(1-5) or ?id=p1-p3&context=p1-p5)
+def get_church_uri_verses(verse_ranges, context_verse_ranges = (), use_query_parameters = False):
+  if use_query_parameters:
+    uri_verses = '?id=' + convert_verse_ranges_to_uri_string(verse_ranges, verse_number_prefix = 'p')
+    if context_verse_ranges:
+      uri_verses += '&context=' + convert_verse_ranges_to_uri_string(context_verse_ranges, verse_number_prefix = 'p')
+  else:
+    uri_verses = '.' + convert_verse_ranges_to_uri_string(verse_ranges)
+    if context_verse_ranges:
+      uri_verses += '(' + convert_verse_ranges_to_uri_string(context_verse_ranges) + ')'
+  return uri_verses
+
+
+# Format verse ranges for a Church URI (always with Western Arabic numerals)
+# Example: ((1, 2), (5, 7)) –> '1-2,5-7' or 'p1-p2,p5-p7'
+def convert_verse_ranges_to_uri_string(verse_ranges, verse_number_prefix = ''):
+  uri_ranges = []
+  for start, end in verse_ranges:
+    if start == end:
+      uri_ranges.append(verse_number_prefix + format_uri_verse(start))
+    else:
+      uri_ranges.append(verse_number_prefix + format_uri_verse(start) + '-' + verse_number_prefix + format_uri_verse(end))
+  return ','.join(uri_ranges)
+
+
+# Format a verse for a Church URI (whole numbers are formatted directly, other verses go through the numbers module)
+def format_uri_verse(verse):
+  if isinstance(verse, int) and verse >= 0:
+    return str(verse)
+  return numbers.get_formatted_number(verse, target_lang = 'en')
+
+
+# Pattern for the parts of a Church URI or URL
+# Example: https://www.churchofjesuschrist.org/study/scriptures/ot/gen/3?id=p1-p3&context=p1-p5&lang=eng#p1
+# Example: gospellibrary://content/scriptures/ot/gen/3.1-3(1-5)
+church_uri_pattern = re.compile(r'/scriptures/(?P<path>[^?#.]*)(?:\.(?P<verses>[^?#(]*)(?:\((?P<context>[^)?#]*)\)?)?)?[^?#]*(?:\?(?P<query>[^#]*))?(?:#(?P<fragment>.*))?')
+church_uri_id_pattern = re.compile(r'(?:^|&)id=([^&]*)')
+church_uri_context_pattern = re.compile(r'(?:^|&)context=([^&]*)')
+
+
+# Split a Church URI or URL into book, chapter, verses, and context verses strings
+def parse_church_uri(input_string):
+  uri_match = church_uri_pattern.search(input_string)
+  book_string = '/scriptures/' + uri_match.group('path').rstrip('/')
+  chapter_string = None
+  if book_string.count('/') > 3:
+    book_string, chapter_string = book_string.rsplit('/', 1)
+  
+  verses_string = uri_match.group('verses')
+  context_verses_string = uri_match.group('context')
+  if verses_string is None and uri_match.group('query'):
+    id_match = church_uri_id_pattern.search(uri_match.group('query'))
+    if id_match:
+      verses_string = id_match.group(1)
+      context_match = church_uri_context_pattern.search(uri_match.group('query'))
+      if context_match:
+        context_verses_string = context_match.group(1)
+  if verses_string is None and uri_match.group('fragment'):
+    verses_string = uri_match.group('fragment')
+  return book_string, chapter_string, verses_string, context_verses_string
+
+
+# Positions of publications, books, and chapters in traditional order (built once for each version of the metadata)
+@data.metadata_cache(maxsize = 1)
+def get_traditional_positions():
+  return data.metadata.tables[build_traditional_positions]
+
+def build_traditional_positions(metadata = None):
+  metadata = metadata or data.metadata
+  publication_positions = {}
+  book_positions = {}
+  chapter_positions = {}
+  for publication_slug, publication_info in metadata.scriptures['structure'].items():
+    publication_positions.setdefault(publication_slug, len(publication_positions) + 1)
+    for book_slug, book_info in publication_info['books'].items():
+      book_positions.setdefault(book_slug, len(book_positions) + 1)
+      chapter_positions.setdefault(book_slug, {})
+      for chapter in book_info['churchChapters']:
+        chapter_positions[book_slug].setdefault(chapter, len(chapter_positions[book_slug]) + 1)
+  return publication_positions, book_positions, chapter_positions
+
+
+# Positions of books in alphabetical order by translated book name, for a given BCP 47 language tag (built once for each version of the metadata)
+@data.metadata_cache(maxsize = 32)
+def get_label_positions(lang = 'en'):
+  return data.metadata.tables[build_label_positions, lang]
+
+def build_label_positions(lang = 'en', metadata = None):
+  metadata = metadata or data.metadata
+  # Imported here, since PyICU is slow to import and only needed for sorting
+  import icu
+  bcp47 = lang
+  if lang.endswith('Hant'):
+    bcp47 = 'zh-Hant'
+  elif lang.endswith('Hans'):
+    bcp47 = 'zh-Hans'
+  collation_index = icu.AlphabeticIndex(icu.Locale(bcp47 + '-u-ka-shifted')).addLabels(icu.Locale('en' + '-u-ka-shifted'))
+  translated_names = metadata.scriptures['languages'][lang]['translatedNames']
+  publication_positions, book_positions, chapter_positions = metadata.tables[build_traditional_positions]
+  for book_slug in book_positions:
+    book_name = translated_names.get(book_slug, {}).get('name') or book_slug
+    collation_index.addRecord(book_name or '', book_slug)
+  label_positions = {}
+  for (bucket_label, label_type) in collation_index:
+    while collation_index.nextRecord():
+      label_positions.setdefault(collation_index.recordData, len(label_positions) + 1)
+  return label_positions
+
+
+# Convert verse groups to verse ranges, splitting groups with verses that aren't consecutive into separate ranges
+# Verses that aren't whole numbers get their own ranges, except in a group of two, which is a range from the first verse to
+# the second (as returned by convert_verse_ranges_to_groups)
+# Example: [[1, 2], [5, 6, 7], [9, 11], ['9a']] –> ((1, 2), (5, 7), (9, 9), (11, 11), ('9a', '9a'))
+def convert_verse_groups_to_ranges(verse_groups):
+  verse_ranges = []
+  for verse_group in (verse_groups or []):
+    if len(verse_group) == 2 and not (isinstance(verse_group[0], int) and isinstance(verse_group[1], int)):
+      verse_ranges.append(tuple(verse_group))
+      continue
+    group_start = len(verse_ranges)
+    for verse in verse_group:
+      if len(verse_ranges) > group_start and isinstance(verse, int) and isinstance(verse_ranges[-1][1], int) and verse == verse_ranges[-1][1] + 1:
+        verse_ranges[-1] = (verse_ranges[-1][0], verse)
+      else:
+        verse_ranges.append((verse, verse))
+  return tuple(verse_ranges)
+
+
+# Convert verse ranges to verse groups
+# Example: ((1, 2), (5, 7), ('9a', '9a')) –> [[1, 2], [5, 6, 7], ['9a']]
+def convert_verse_ranges_to_groups(verse_ranges):
+  if not verse_ranges:
+    return None
+  verse_groups = []
+  for start, end in verse_ranges:
+    if isinstance(start, int) and isinstance(end, int):
+      verse_groups.append(list(range(start, end + 1)))
+    elif start == end:
+      verse_groups.append([start])
+    else:
+      verse_groups.append([start, end])
+  return verse_groups
+
+
+# Sortable value for a number that might be a string (such as '7a' or 'fac-1') or None
+def get_mixed_sort_value(value):
+  if value is None:
+    return (0, 0, '')
+  elif isinstance(value, int):
+    return (1, value, '')
+  return (2, 0, str(value))
+
+
+# A scripture reference (publication, book, chapter, and verses)
+# References are immutable, so they can be used as dictionary keys or in sets
+# Verses are stored as ranges, for example ((1, 2), (5, 7)) for verses 1–2 and 5–7
+class Reference:
+  __slots__ = ('lang', 'publication_slug', 'book_slug', 'chapter', 'verse_ranges', 'context_verse_ranges')
+  
+  def __init__(self, lang = 'en', publication_slug = None, book_slug = None, chapter = None, verse_groups = None, context_verse_groups = None, verse_ranges = None, context_verse_ranges = None):
+    object.__setattr__(self, 'lang', lang)
+    object.__setattr__(self, 'publication_slug', publication_slug)
+    object.__setattr__(self, 'book_slug', book_slug)
+    object.__setattr__(self, 'chapter', chapter)
+    object.__setattr__(self, 'verse_ranges', tuple(verse_ranges) if verse_ranges else convert_verse_groups_to_ranges(verse_groups))
+    object.__setattr__(self, 'context_verse_ranges', tuple(context_verse_ranges) if context_verse_ranges else convert_verse_groups_to_ranges(context_verse_groups))
+  
+  def __setattr__(self, name, value):
+    raise AttributeError('Reference objects are immutable')
+  
+  def __delattr__(self, name):
+    raise AttributeError('Reference objects are immutable')
+  
+  def __reduce__(self):
+    return (self.__class__, (self.lang, self.publication_slug, self.book_slug, self.chapter, None, None, self.verse_ranges, self.context_verse_ranges))
+  
+  # Verse groups, with every verse listed (e.g. [[1, 2], [5, 6, 7]]), or None if there aren't any verses
+  @property
+  def verse_groups(self):
+    return convert_verse_ranges_to_groups(self.verse_ranges)
+  
+  # Context verse groups, with every verse listed, or None if there aren't any context verses
+  @property
+  def context_verse_groups(self):
+    return convert_verse_ranges_to_groups(self.context_verse_ranges)
   
   # Get a localized label (e.g. Old Testament, Genesis 1, Helaman 5:12, etc.)
   def label(self, skip_book_name = False, abbreviated = False):
-    translated_names = data.scriptures['languages'][self.lang]['translatedNames']
-    english_translated_names = data.scriptures['languages']['en']['translatedNames']
+    label_table = get_label_table(self.lang, abbreviated)
     
     if self.publication_slug and not self.book_slug:
-      publication_name = translated_names.get(self.publication_slug, {}).get('name') or english_translated_names.get(self.publication_slug, {}).get('name')
-      if abbreviated:
-        publication_name = translated_names.get(self.publication_slug, {}).get('abbrev') or publication_name
-      return publication_name
+      return label_table.publication_name(self.publication_slug)
     
     if not self.book_slug:
       skip_book_name = True
     
-    label = ''
-    book_slug = self.book_slug
+    label_parts = []
     if not skip_book_name:
-      if book_slug == 'psalms':
-        book_slug = 'psalm'
-      elif book_slug == 'sections':
-        book_slug = 'doctrine-and-covenants'
-      elif book_slug == 'official-declarations':
-        book_slug = 'official-declaration'
-      elif book_slug == 'facsimiles':
-        book_slug = 'facsimile'
-      elif book_slug == 'jst-psalms':
-        book_slug = 'jst-psalm'
-      
-      book_name = translated_names.get(book_slug, {}).get('name') or english_translated_names.get(book_slug, {}).get('name') or ''
-      if abbreviated:
-        book_name = translated_names.get(book_slug, {}).get('abbrev') or book_name
-      label += book_name
+      label_parts.append(label_table.book_name(self.book_slug))
     
     if self.chapter:
-      punctuation = data.scriptures['languages'][self.lang]['punctuation']
-      numerals = data.scriptures['languages'][self.lang]['numerals']
       if not skip_book_name:
-        label += punctuation['bookChapterSeparator']
-      
-      # Get localized chapter name
-      def format_chapter_range(chapter_string):
-        groups = re.split(data.verse_group_separators_pattern, chapter_string)
-        new_groups = []
-        for group in groups:
-          range_parts = re.split(data.verse_range_separators_pattern, group)
-          new_range_parts = []
-          for range_part in range_parts:
-            chapter_verse_parts = re.split(data.chapter_verse_separators_pattern, range_part)
-            new_chapter_verse_parts = []
-            for num in chapter_verse_parts:
-              new_chapter_verse_parts.append(numbers.get_formatted_number(num, target_lang = self.lang, target_custom_numerals = numerals))
-            new_range_parts.append(punctuation['chapterVerseSeparator'].join(new_chapter_verse_parts))
-          new_groups.append(punctuation['verseRangeSeparator'].join(new_range_parts))
-        return punctuation['verseGroupSeparator'].join(new_groups)
-      chapter_name = (
-        translated_names.get(self.chapter, {}).get('name') or
-        english_translated_names.get(self.chapter, {}).get('name') or
-        numbers.get_formatted_number(self.chapter, target_lang = self.lang, target_custom_numerals = numerals) or
-        format_chapter_range(self.chapter or '') or
-        self.chapter
-      )
-      if abbreviated:
-        chapter_name = translated_names.get(self.chapter, {}).get('abbrev') or chapter_name
-      label += chapter_name
+        label_parts.append(label_table.book_chapter_separator)
+      label_parts.append(label_table.chapter_name(self.chapter))
       
       # Get localized verses
-      if self.verse_groups:
-        label += punctuation['chapterVerseSeparator']
-        label += convert_verse_groups_to_string(self.verse_groups, punctuation['verseRangeSeparator'], punctuation['verseGroupSeparator'], numerals, lang = self.lang)
-        if self.context_verse_groups:
-          label += punctuation['openingParenthesis'] + convert_verse_groups_to_string(self.context_verse_groups, punctuation['verseRangeSeparator'], punctuation['verseGroupSeparator'], numerals, lang = self.lang) + punctuation['closingParenthesis']
+      if self.verse_ranges:
+        label_parts.append(label_table.chapter_verse_separator)
+        label_parts.append(label_table.format_verse_ranges(self.verse_ranges))
+        if self.context_verse_ranges:
+          label_parts.append(label_table.opening_parenthesis + label_table.format_verse_ranges(self.context_verse_ranges) + label_table.closing_parenthesis)
     
-    return label
+    return ''.join(label_parts)
   
   # Get the Church URI (e.g. /scriptures/ot, /scriptures/bofm/1-ne/3.7)
   def church_uri(self, use_query_parameters = False):
+    scripture_index = get_scripture_index()
     if self.publication_slug and not self.book_slug:
-      uri = data.scriptures['structure'].get(self.publication_slug, {}).get('churchUri')
-      return uri
+      return scripture_index.publication_church_uris.get(self.publication_slug)
     
-    uri = ''
-    for publication_data in data.scriptures['structure'].values():
-      for slug, book_data in publication_data['books'].items():
-        if slug == self.book_slug:
-          uri += book_data['churchUri']
-          break
+    uri = scripture_index.book_church_uris.get(self.book_slug, '')
     
     if uri and self.chapter:
-      chapter = str(self.chapter)
-      if re.match(rf'\d+{data.verse_range_separators_pattern}\d+', chapter):
-        # Chapter range – only use the first chapter
-        chapter = re.split(data.verse_range_separators_pattern, chapter)[0]
-      uri += '/' + str(chapter)
-      if self.verse_groups:
-        if use_query_parameters:
-          uri += '?id=' + convert_verse_groups_to_string(self.verse_groups, '-', ',', verse_number_prefix = 'p')
-          if self.context_verse_groups:
-            uri += '&context=' + convert_verse_groups_to_string(self.context_verse_groups, '-', ',', verse_number_prefix = 'p')
-        else:
-          uri += '.' + convert_verse_groups_to_string(self.verse_groups, '-', ',')
-          if self.context_verse_groups:
-            uri += '(' + convert_verse_groups_to_string(self.context_verse_groups, '-', ',') + ')'
+      uri += get_church_uri_chapter(self.chapter, self.lang)
+      if self.verse_ranges:
+        uri += get_church_uri_verses(self.verse_ranges, self.context_verse_ranges, use_query_parameters)
     
     return uri
   
@@ -135,8 +486,8 @@ class Reference:
         return ''
       church_lang = data.languages['languages'][self.lang]['churchLang']
       url += f'&lang={church_lang}' if '?' in url else f'?lang={church_lang}'
-    if self.verse_groups and not skip_fragment:
-      url += '#p' + str(self.verse_groups[0][0])
+    if self.verse_ranges and not skip_fragment:
+      url += '#p' + str(self.verse_ranges[0][0])
     return url
   
   # Get an HTML link to the Church website
@@ -152,18 +503,171 @@ class Reference:
   
   # Get chapter or verse content
   def content(self, source):
-    return data.request_content(self.publication_slug, self.book_slug, self.chapter, self.verse_groups, self.church_url(), lang = self.lang, source = source)
+    return data.request_content(**self.content_request(source))
   
-  # Get chapter or verse content
+  # Get the arguments for requesting chapter or verse content (see data.request_content)
+  def content_request(self, source):
+    return {
+      'publication_slug': self.publication_slug,
+      'book_slug': self.book_slug,
+      'chapter': self.chapter,
+      'verse_ranges': self.verse_ranges,
+      'church_url': self.church_url(),
+      'lang': self.lang,
+      'source': source,
+    }
+  
+  # Get the reference as a dictionary
   def attributes(self):
-    return self.__dict__
+    return {
+      'lang': self.lang,
+      'publication_slug': self.publication_slug,
+      'book_slug': self.book_slug,
+      'chapter': self.chapter,
+      'verse_groups': self.verse_groups,
+      'context_verse_groups': self.context_verse_groups,
+    }
+  
+  # Get a key for sorting references in traditional order (publication, book, chapter, then verses)
+  def canonical_sort_key(self):
+    publication_positions, book_positions, chapter_positions = get_traditional_positions()
+    chapter_position = chapter_positions.get(self.book_slug, {}).get(self.chapter)
+    return (
+      publication_positions.get(self.publication_slug, 0 if self.publication_slug is None else len(publication_positions) + 1), self.publication_slug or '',
+      book_positions.get(self.book_slug, 0 if self.book_slug is None else len(book_positions) + 1), self.book_slug or '',
+      (1, chapter_position, '') if chapter_position else get_mixed_sort_value(self.chapter),
+      tuple((get_mixed_sort_value(start), get_mixed_sort_value(end)) for start, end in self.verse_ranges),
+      tuple((get_mixed_sort_value(start), get_mixed_sort_value(end)) for start, end in self.context_verse_ranges),
+      self.lang or '',
+    )
+  
+  # Verse set operations
+  # References in the same chapter are combined verse by verse. A chapter without verses includes every verse in the chapter,
+  # a book without a chapter includes every chapter in the book, and a publication without a book includes every book.
+  
+  # Get the verses as a VerseRangeSet, or None if the reference is to the whole chapter (or a whole book or publication)
+  def verse_range_set(self):
+    return verses.VerseRangeSet(self.verse_ranges) if self.verse_ranges else None
+  
+  # Whether the other reference is in the same chapter as this one
+  def same_chapter(self, other):
+    return self.chapter is not None and (self.publication_slug, self.book_slug, self.chapter) == (other.publication_slug, other.book_slug, other.chapter)
+  
+  # Whether this reference's publication, book, or chapter includes all of the other reference
+  def covers(self, other):
+    if self.publication_slug != other.publication_slug:
+      return False
+    if self.book_slug is None:
+      return self.publication_slug is not None or other.book_slug is None
+    if self.book_slug != other.book_slug:
+      return False
+    return self.chapter is None or self.chapter == other.chapter and not self.verse_ranges
+  
+  # Copy of this reference with different verses
+  def with_verse_ranges(self, verse_ranges, context_verse_ranges = ()):
+    return Reference(lang = self.lang, publication_slug = self.publication_slug, book_slug = self.book_slug, chapter = self.chapter, verse_ranges = verse_ranges, context_verse_ranges = context_verse_ranges)
+  
+  # Whether every verse in the other reference is also in this reference
+  def contains(self, other):
+    if self.same_chapter(other) and self.verse_ranges and other.verse_ranges:
+      return self.verse_range_set().issuperset(other.verse_range_set())
+    return self.covers(other)
+  
+  # Whether any verse is in both references
+  def overlaps(self, other):
+    if self.same_chapter(other) and self.verse_ranges and other.verse_ranges:
+      return self.verse_range_set().overlaps(other.verse_range_set())
+    return self.covers(other) or other.covers(self)
+  
+  # Get a reference with the verses in either reference
+  # Raises ValueError if the result can't be written as one reference (for example, verses in different chapters)
+  def union(self, other):
+    if self.same_chapter(other) and self.verse_ranges and other.verse_ranges:
+      context_verse_ranges = verses.VerseRangeSet(self.context_verse_ranges) | verses.VerseRangeSet(other.context_verse_ranges)
+      return self.with_verse_ranges((self.verse_range_set() | other.verse_range_set()).to_ranges(), context_verse_ranges.to_ranges())
+    elif self.covers(other):
+      return self
+    elif other.covers(self):
+      return other
+    raise ValueError(f'“{self}” and “{other}” can’t be combined into one reference')
+  
+  # Get a reference with the verses in both references, or None if they don't overlap
+  def intersection(self, other):
+    if self.same_chapter(other) and self.verse_ranges and other.verse_ranges:
+      verse_range_set = self.verse_range_set() & other.verse_range_set()
+      return self.with_verse_ranges(verse_range_set.to_ranges()) if verse_range_set else None
+    elif self.covers(other):
+      return other
+    elif other.covers(self):
+      return self
+    return None
+  
+  # Get a reference with the verses in this reference that aren't in the other reference, or None if there are none left
+  # Raises ValueError if the result can't be written without knowing how many verses or chapters there are (for example, a whole chapter minus one verse)
+  def difference(self, other):
+    if self.same_chapter(other) and self.verse_ranges and other.verse_ranges:
+      verse_range_set = self.verse_range_set() - other.verse_range_set()
+      return self.with_verse_ranges(verse_range_set.to_ranges()) if verse_range_set else None
+    elif other.covers(self):
+      return None
+    elif self.covers(other):
+      raise ValueError(f'“{other}” can’t be removed from “{self}”')
+    return self
+  
+  def __or__(self, other):
+    return self.union(other)
+  
+  def __and__(self, other):
+    return self.intersection(other)
+  
+  def __sub__(self, other):
+    return self.difference(other)
+  
+  def __contains__(self, other):
+    return self.contains(other)
+  
+  # Get a key for sorting references by book order ('traditional') or alphabetically by book name ('label'), for use with sorted()
+  # Within a book, references are sorted by chapter, first verse, and number of verses
+  def sort_key(self, sort_by = 'traditional', lang = None):
+    if sort_by not in ('traditional', 'label'):
+      raise ValueError(f'Unsupported sort_by value: {sort_by}')
+    book_position = 0
+    chapter_position = 0
+    verse_position = 0
+    number_of_verses = 0
+    publication_positions, book_positions, chapter_positions = get_traditional_positions()
+    if self.book_slug in book_positions:
+      if sort_by == 'traditional':
+        book_position = book_positions[self.book_slug]
+      elif sort_by == 'label':
+        book_position = get_label_positions(lang or self.lang)[self.book_slug]
+      
+      if self.chapter in chapter_positions[self.book_slug]:
+        chapter_position = chapter_positions[self.book_slug][self.chapter] if isinstance(self.chapter, int) else 1000
+        if self.verse_ranges:
+          verse_position = self.verse_ranges[0][0] if isinstance(self.verse_ranges[0][0], int) else 1000
+          number_of_verses = sum([(end - start + 1) if isinstance(start, int) and isinstance(end, int) else 1 for start, end in self.verse_ranges])
+    # Ties are broken by comparing the references themselves (see __lt__), which is only needed occasionally
+    return (book_position, chapter_position, verse_position, number_of_verses, self)
   
   def __str__(self):
     return self.label()
   
+  def __repr__(self):
+    return f'Reference(lang={self.lang!r}, publication_slug={self.publication_slug!r}, book_slug={self.book_slug!r}, chapter={self.chapter!r}, verse_ranges={self.verse_ranges!r}, context_verse_ranges={self.context_verse_ranges!r})'
+  
+  def __eq__(self, other):
+    if not isinstance(other, Reference):
+      return NotImplemented
+    return (self.lang, self.publication_slug, self.book_slug, self.chapter, self.verse_ranges, self.context_verse_ranges) == (other.lang, other.publication_slug, other.book_slug, other.chapter, other.verse_ranges, other.context_verse_ranges)
+  
+  def __hash__(self):
+    return hash((self.lang, self.publication_slug, self.book_slug, self.chapter, self.verse_ranges, self.context_verse_ranges))
+  
   def __lt__(self, other):
-    # TODO: Provide better algorithm for sorting
-    return 0 < 1
+    if not isinstance(other, Reference):
+      return NotImplemented
+    return self.canonical_sort_key() < other.canonical_sort_key()
 
 
 # Normalize text by removing anything that's not a letter or number, and converting to lowercase. This allows for a fuzzy comparison between input text and a known list of values.
@@ -173,17 +677,496 @@ def normalizeForCompare(text):
   return normalized_text
 
 
-# Parse verses into verse groups
-# Example: '1-2,5-7,9' –> [[1, 2], [5, 6, 7], [9]]
-def parse_verses_string(verses_string, lang = 'en'):
+# Index of book slugs by normalized key (see normalizeForCompare), for fuzzy lookups without scanning every key in mapToSlug
+# If several keys normalize to the same value, the first key in mapToSlug wins, and the other slugs are recorded as ambiguous
+# (slugs that the parser replaces with the same book, such as jst-psalm and jst-psalms, aren't ambiguous)
+class NormalizedSlugIndex:
+  def __init__(self, map_to_slug):
+    self.slugs = {}
+    self.ambiguous = {}
+    # Ambiguous keys that have been looked up (each one is only reported once)
+    self.reported = set()
+    for key, value in map_to_slug.items():
+      normalized_key = normalizeForCompare(key)
+      if normalized_key not in self.slugs:
+        self.slugs[normalized_key] = value
+        continue
+      first_value = self.slugs[normalized_key]
+      if parser_book_slugs.get(value, value) != parser_book_slugs.get(first_value, first_value):
+        self.ambiguous.setdefault(normalized_key, [first_value])
+        if value not in self.ambiguous[normalized_key]:
+          self.ambiguous[normalized_key].append(value)
+  
+  # Get the book slug for a given string, or None if there isn't a match
+  # The first lookup of each ambiguous key is reported with a warning (on stderr, so it isn't mixed with output)
+  def get(self, text):
+    normalized_text = normalizeForCompare(text)
+    slug = self.slugs.get(normalized_text)
+    if normalized_text in self.ambiguous and normalized_text not in self.reported:
+      self.reported.add(normalized_text)
+      warnings.warn(f'“{text}” could refer to any of {", ".join(self.ambiguous[normalized_text])} – using “{slug}”.', stacklevel = 2)
+    return slug
+
+
+# Get the normalized slug index (built once for each version of the metadata)
+@data.metadata_cache(maxsize = 1)
+def get_normalized_slug_index():
+  return data.metadata.tables[build_normalized_slug_index]
+
+def build_normalized_slug_index(metadata = None):
+  return NormalizedSlugIndex((metadata or data.metadata).scriptures['mapToSlug'])
+
+
+# Whether a character is a letter or number in a script that puts spaces between words
+# (Chinese, Japanese, Thai, and similar scripts don't, so book names can touch the text around them)
+def is_spaced_word_character(character):
+  if not character.isalnum():
+    return False
+  code_point = ord(character)
+  return not (
+    0x0E00 <= code_point <= 0x0EFF or  # Thai, Lao
+    0x1000 <= code_point <= 0x109F or  # Myanmar
+    0x1780 <= code_point <= 0x17FF or  # Khmer
+    0x2E80 <= code_point <= 0x9FFF or  # CJK, kana
+    0xF900 <= code_point <= 0xFAFF or  # CJK compatibility
+    0xFF00 <= code_point <= 0xFFEF     # Full-width forms
+  )
+
+
+# Lowercase text for matching book names, keeping every character at the same offset
+def fold_text(text):
+  folded_text = text.lower()
+  if len(folded_text) != len(text):
+    folded_text = ''.join([character.lower() if len(character.lower()) == 1 else character for character in text])
+  return folded_text.replace('\xa0', ' ')
+
+
+# Aho–Corasick automaton for finding many names in text at once, in one pass
+# Names are lowercase (see fold_text), and each name has a value (such as a book slug)
+class NameAutomaton:
+  def __init__(self, names):
+    self.max_name_length = max([len(name) for name in names]) if names else 0
+    
+    # Trie of names
+    self.transitions = [{}]
+    self.depths = [0]
+    self.values = [None]
+    for name, value in names.items():
+      state = 0
+      for character in name:
+        next_state = self.transitions[state].get(character)
+        if next_state is None:
+          next_state = len(self.transitions)
+          self.transitions[state][character] = next_state
+          self.transitions.append({})
+          self.depths.append(self.depths[state] + 1)
+          self.values.append(None)
+        state = next_state
+      self.values[state] = (len(name), value)
+    
+    # Failure links (the longest proper suffix that's also in the trie), and the names that end at each state
+    # (length, value), longest first
+    self.failures = [0] * len(self.transitions)
+    self.matches = [()] * len(self.transitions)
+    queue = collections.deque(self.transitions[0].values())
+    while queue:
+      state = queue.popleft()
+      self.matches[state] = ((self.values[state],) if self.values[state] else ()) + self.matches[self.failures[state]]
+      for character, next_state in self.transitions[state].items():
+        failure = self.failures[state]
+        while failure and character not in self.transitions[failure]:
+          failure = self.failures[failure]
+        self.failures[next_state] = self.transitions[failure].get(character, 0)
+        queue.append(next_state)
+  
+  # Get the names that start at a position (length, value), longest first
+  def get_names_at(self, folded_text, position, end_position):
+    names = []
+    state = 0
+    for character in folded_text[position:min(end_position, position + self.max_name_length)]:
+      state = self.transitions[state].get(character)
+      if state is None:
+        break
+      if self.values[state]:
+        names.append(self.values[state])
+    names.reverse()
+    return names
+  
+  # Yield (end position, state) for each position in folded text where at least one name ends
+  def find_ends(self, folded_text):
+    transitions = self.transitions
+    failures = self.failures
+    matches = self.matches
+    state = 0
+    for position, character in enumerate(folded_text):
+      while state and character not in transitions[state]:
+        state = failures[state]
+      state = transitions[state].get(character, 0)
+      if matches[state]:
+        yield position + 1, state
+
+
+# Automaton for finding references in free-form text: an Aho–Corasick automaton of book names and abbreviations
+# (in the language and in English), and patterns for the chapter and verses after each name
+# Text is scanned once, so the time is proportional to the length of the text, not the number of book names
+class ReferenceScanner:
+  # Longest text to check for a chapter and verses after a book name
+  max_tail_length = 256
+  
+  def __init__(self, lang = 'en', metadata = None):
+    metadata = metadata or data.metadata
+    self.lang = lang
+    scripture_index = metadata.tables[ScriptureIndex]
+    book_slugs_by_label_slug = {label_slug: book_slug for book_slug, label_slug in label_book_slugs.items()}
+    
+    # Lowercase book name –> (book slug, whether the name must be capitalized)
+    # Short names like "Ex" or "Job" must be capitalized, so they aren't found in ordinary words
+    names = {}
+    name_slugs = {}
+    for names_lang in dict.fromkeys([lang, 'en']):
+      for slug, name_info in metadata.scriptures['languages'][names_lang]['translatedNames'].items():
+        book_slug = book_slugs_by_label_slug.get(slug, slug)
+        if book_slug not in scripture_index.publications_by_book:
+          continue
+        for name in (name_info.get('name'), name_info.get('abbrev')):
+          if not name:
+            continue
+          name_slugs.setdefault(name, set()).add(book_slug)
+          letters = [character for character in name if character.isalpha()]
+          requires_capital = len(letters) <= 3 and letters[0].isupper() if letters else False
+          variants = [name, name.rstrip('.')]
+          # English roman numerals. Example: "II Corinthians"
+          if names_lang == 'en' and re.match(r'[1-4]\s', name):
+            variants.append(('I', 'II', 'III', 'IV')[int(name[0]) - 1] + name.rstrip('.')[1:])
+          for variant in variants:
+            names.setdefault(fold_text(variant), (name, book_slug, requires_capital))
+    # Names shared by several books (i.e. James and Jacob in some languages) use the same book as the parser
+    for folded_name, (name, book_slug, requires_capital) in names.items():
+      mapped_slug = metadata.scriptures['mapToSlug'].get(name)
+      mapped_slug = book_slugs_by_label_slug.get(mapped_slug, mapped_slug)
+      if len(name_slugs[name]) > 1 and mapped_slug in name_slugs[name]:
+        book_slug = mapped_slug
+      names[folded_name] = (book_slug, requires_capital)
+    self.automaton = NameAutomaton(names)
+    self.max_name_length = self.automaton.max_name_length
+    
+    # Chapter and verse patterns. Example: " 3:16–18, 20 (14–21)"
+    # Numbers can be decimal digits in any script, or the language's own numerals (i.e. Geʽez numerals in Amharic)
+    numeral_system = numbers.get_target_numeral_system(lang, target_custom_numerals = metadata.scriptures['languages'][lang]['numerals'])
+    numerals = ''.join(sorted([character for character in getattr(numeral_system, 'characters', ()) if not character.isdecimal()]))
+    digit = rf'[\d{re.escape(numerals)}]' if numerals else r'\d'
+    self.numerals_pattern = re.compile(rf'[{re.escape(numerals)}]+') if numerals else None
+    cv = metadata.chapter_verse_separators_pattern
+    vr = metadata.verse_range_separators_pattern
+    verse = rf'{digit}+(?:[a-z](?![^\W\d_]))?'
+    verse_range = rf'{verse}(?:\s?(?:{vr})\s?{digit}+(?:(?:{cv}){digit}+)?(?:[a-z](?![^\W\d_]))?)?'
+    verse_ranges = rf'{verse_range}(?:\s?(?:{metadata.verse_group_separators_pattern})\s?{verse_range})*'
+    self.chapter_pattern = re.compile(rf'\s?{digit}+(?:\s?(?:{vr})\s?{digit}+)?')
+    self.chapter_verse_separator_pattern = re.compile(rf'(?:{cv})(?={verse})')
+    self.verse_range_pattern = re.compile(verse_range)
+    # Verses after a comma, unless they're another chapter. Example: "John 3:16, 18" but not "John 3:16, 4:1"
+    self.verse_group_pattern = re.compile(rf'\s?(?:{metadata.verse_group_separators_pattern})\s?(?={digit}+(?!{digit}|(?:{cv}){digit}))')
+    self.context_pattern = re.compile(rf'\s?(?:{metadata.opening_parenthesis_pattern})\s?{verse_ranges}\s?(?:{metadata.closing_parenthesis_pattern})')
+    # Another chapter and verses in the same book. Example: "; 4:1" or ", 4:1"
+    self.continuation_pattern = re.compile(rf'\s?(?:(?!\n)(?:{metadata.reference_separators_pattern}|{metadata.verse_group_separators_pattern}))\s?(?={digit}+(?:{cv}){verse})')
+  
+  # Get the longest reference that starts with a book name at a position, as (name end, end, book slug), or None
+  def match_reference(self, text, folded_text, start):
+    # Names must be whole words
+    if start > 0 and is_spaced_word_character(text[start - 1]) and is_spaced_word_character(text[start]):
+      return None
+    for length, (book_slug, requires_capital) in self.automaton.get_names_at(folded_text, start, len(text)):
+      name_end = start + length
+      if name_end < len(text) and text[name_end].isalpha() and is_spaced_word_character(text[name_end]) and is_spaced_word_character(text[name_end - 1]):
+        continue
+      if requires_capital and next((character.islower() for character in text[start:name_end] if character.isalpha()), False):
+        continue
+      end = self.match_tail(text, folded_text, name_end)
+      if end is not None:
+        return name_end, end, book_slug
+    return None
+  
+  # Convert the language's own numerals in a chapter and verses string to decimal numbers, which the parser can read
+  # Example: ' ፲፯፥፴፯' –> ' 17፥37'
+  def convert_numerals(self, tail):
+    if self.numerals_pattern is None:
+      return tail
+    return self.numerals_pattern.sub(lambda numeral_match: str(numbers.convert_number_to_int(numeral_match.group(0)) or numeral_match.group(0)), tail)
+  
+  # Get the end of the chapter and verses after a book name (or None if there isn't a chapter)
+  def match_tail(self, text, folded_text, position):
+    end_position = min(len(text), position + self.max_tail_length)
+    chapter_match = self.chapter_pattern.match(text, position, end_position)
+    if not chapter_match:
+      return None
+    separator_match = self.chapter_verse_separator_pattern.match(text, chapter_match.end(), end_position)
+    if not separator_match:
+      # Chapter without verses
+      return chapter_match.end()
+    tail_end = self.verse_range_pattern.match(text, separator_match.end(), end_position).end()
+    while True:
+      verse_group_match = self.verse_group_pattern.match(text, tail_end, end_position)
+      # Stop before the next reference. Example: "John 3:16, 1 Nephi 3:7"
+      if not verse_group_match or self.automaton.get_names_at(folded_text, verse_group_match.end(), end_position):
+        break
+      tail_end = self.verse_range_pattern.match(text, verse_group_match.end(), end_position).end()
+    context_match = self.context_pattern.match(text, tail_end, end_position)
+    if context_match:
+      tail_end = context_match.end()
+    return tail_end
+  
+  # Find references in text, yielding (start, end, book slug, chapter and verses string) for each one
+  # Text is given in chunks (for large files). Chunks are combined until there's enough text to scan past the end of the
+  # previous scan, and the end of each scan is kept, so references that cross chunks are found the same way.
+  def scan(self, chunks):
+    overlap = self.max_name_length + 2 * self.max_tail_length + 2
+    text = ''
+    offset = 0
+    scanned_to = 0
+    resume = 0
+    previous_book_slug = None
+    pending_chunks = []
+    pending_length = 0
+    for chunk in itertools.chain(chunks, [None]):
+      if chunk is not None:
+        pending_chunks.append(chunk)
+        pending_length += len(chunk)
+        if pending_length < 2 * overlap:
+          continue
+      text = text + ''.join(pending_chunks)
+      pending_chunks = []
+      pending_length = 0
+      safe_end = len(text) if chunk is None else len(text) - overlap
+      for start, tail_start, end, book_slug in self.scan_text(text, max(scanned_to, resume) - offset, safe_end, previous_book_slug if resume >= scanned_to else None):
+        yield offset + start, offset + end, book_slug, text[tail_start:end]
+        resume = offset + end
+        previous_book_slug = book_slug
+      # Keep a character before the unscanned text, for word boundaries
+      cut = max(0, safe_end - 1)
+      scanned_to = offset + safe_end
+      text = text[cut:]
+      offset += cut
+  
+  # Scan text for references that start between minimum_start and safe_end, yielding (start, tail start, end, book slug)
+  # If continuation_book_slug is given, a reference to another chapter in that book can start at minimum_start
+  # A reference that ends at or after safe_end isn't checked for other chapters until the next scan
+  def scan_text(self, text, minimum_start, safe_end, continuation_book_slug = None):
+    folded_text = fold_text(text)
+    transitions = self.automaton.transitions
+    failures = self.automaton.failures
+    matches = self.automaton.matches
+    depths = self.automaton.depths
+    position = minimum_start
+    book_slug = continuation_book_slug
+    state = 0
+    checked_starts = set()
+    while position < len(text) and position < safe_end + self.max_name_length:
+      if book_slug:
+        if position >= safe_end:
+          return
+        # Other chapters in the same book. Example: "John 3:16; 4:1"
+        continuation_match = self.continuation_pattern.match(text, position, min(len(text), position + self.max_tail_length))
+        if continuation_match:
+          start = continuation_match.end()
+          end = self.match_tail(text, folded_text, start)
+          if end:
+            yield start, start, end, book_slug
+            position = end
+            continue
+        book_slug = None
+      
+      character = folded_text[position]
+      while state and character not in transitions[state]:
+        state = failures[state]
+      state = transitions[state].get(character, 0)
+      position += 1
+      if not matches[state]:
+        continue
+      # A name ends here. Check every start that could begin a name (the current state and its failure links), from the
+      # earliest, so a longer name that started earlier wins. Example: "JST, Ephesians 4:21", not "Ephesians 4:21"
+      suffix_state = state
+      while suffix_state:
+        start = position - depths[suffix_state]
+        suffix_state = failures[suffix_state]
+        if start < minimum_start or start >= safe_end or start in checked_starts:
+          continue
+        checked_starts.add(start)
+        reference_match = self.match_reference(text, folded_text, start)
+        if reference_match:
+          name_end, end, book_slug = reference_match
+          yield start, name_end, end, book_slug
+          minimum_start = position = end
+          state = 0
+          break
+
+
+# Get the reference scanner for a given BCP 47 language tag (built once for each version of the metadata)
+@data.metadata_cache(maxsize = 32)
+def get_reference_scanner(lang = 'en'):
+  return data.metadata.tables[ReferenceScanner, lang]
+
+
+# Detects the language of references from the book names in them, with one automaton of the names in every language
+# Each book name found adds its length to the score of every language that uses the name
+class LanguageDetector:
+  def __init__(self, metadata = None):
+    metadata = metadata or data.metadata
+    # Lowercase name –> languages that use the name
+    names = {}
+    for lang, language_data in metadata.scriptures['languages'].items():
+      for name_info in language_data['translatedNames'].values():
+        for name in (name_info.get('name'), name_info.get('abbrev')):
+          if name:
+            for variant in (name, name.rstrip('.')):
+              names.setdefault(fold_text(variant), set()).add(lang)
+    self.automaton = NameAutomaton({name: frozenset(langs) for name, langs in names.items()})
+    # Order for breaking ties: languages with more scripture books on the Church website first
+    lang_order = sorted(metadata.scriptures['languages'], key = lambda lang: -sum(len(book_slugs) for book_slugs in (metadata.scriptures['languages'][lang].get('churchAvailability') or {}).values()))
+    self.lang_positions = {lang: position for position, lang in enumerate(lang_order)}
+    self.reference_separators = re.compile(metadata.reference_separators_pattern)
+  
+  # Get the best language from scores (or None if there aren't any). Ties go to the first of preferred_langs that is tied.
+  def get_best_lang(self, scores, preferred_langs = ('en',)):
+    if not scores:
+      return None
+    top_score = max(scores.values())
+    top_langs = [lang for lang, score in scores.items() if score == top_score]
+    for lang in preferred_langs:
+      if lang in top_langs:
+        return lang
+    return min(top_langs, key = self.lang_positions.get)
+  
+  # Find the book names in a string, in one pass over the text, as a list of (start, length, languages that use the name)
+  # Names inside a longer name (i.e. "歌" in "雅歌") don't count
+  def find_names(self, input_string):
+    found_names = []
+    for end, state in self.automaton.find_ends(fold_text(input_string)):
+      for length, langs in self.automaton.matches[state]:
+        start = end - length
+        # Names must be whole words
+        if start > 0 and is_spaced_word_character(input_string[start - 1]) and is_spaced_word_character(input_string[start]):
+          continue
+        if end < len(input_string) and input_string[end].isalpha() and is_spaced_word_character(input_string[end]) and is_spaced_word_character(input_string[end - 1]):
+          continue
+        # Names are found in order of end position, so a longer name can only contain the names just before it
+        while found_names and found_names[-1][0] >= start:
+          found_names.pop()
+        found_names.append((start, length, langs))
+        break
+    return found_names
+  
+  # Get language scores for each reference (the text between reference separators)
+  def get_segment_scores(self, input_string):
+    separator_ends = [separator_match.end() for separator_match in self.reference_separators.finditer(input_string)]
+    segment_scores = [{} for i in range(len(separator_ends) + 1)]
+    for start, length, langs in self.find_names(input_string):
+      scores = segment_scores[bisect.bisect_right(separator_ends, start)]
+      for lang in langs:
+        scores[lang] = scores.get(lang, 0) + length
+    return separator_ends, segment_scores
+  
+  # Get the language with the highest total score
+  def get_total_lang(self, segment_scores, default = 'en'):
+    total_scores = {}
+    for scores in segment_scores:
+      for lang, score in scores.items():
+        total_scores[lang] = total_scores.get(lang, 0) + score
+    return self.get_best_lang(total_scores, (default, 'en')) or default
+  
+  # Get the most likely language of the references in a string
+  def detect(self, input_string, default = 'en'):
+    return self.get_total_lang(self.get_segment_scores(input_string)[1], default)
+  
+  # Split a string into runs of references in the same language, as (language, text)
+  # Names used by several languages (i.e. "Alma") keep the language of the reference before them, then the language of the whole string
+  # References without a book name (i.e. "4:1" in "Jean 3:16; 4:1") and Church URIs use the language before them
+  def split(self, input_string, default = 'en'):
+    separator_ends, segment_scores = self.get_segment_scores(input_string)
+    boundaries = [0] + separator_ends + [len(input_string)]
+    total_lang = self.get_total_lang(segment_scores, default)
+    
+    runs = []
+    run_lang = total_lang
+    run_start = 0
+    for i, scores in enumerate(segment_scores):
+      if '/scriptures/' in input_string[boundaries[i]:boundaries[i + 1]]:
+        continue
+      lang = self.get_best_lang(scores, (run_lang, total_lang, default, 'en'))
+      if lang and lang != run_lang:
+        if boundaries[i] > run_start:
+          runs.append((run_lang, input_string[run_start:boundaries[i]]))
+        run_lang = lang
+        run_start = boundaries[i]
+    runs.append((run_lang, input_string[run_start:]))
+    return runs
+  
+  # Split free-form text into runs in the same language, as (language, text), starting a new run at each book name in another language
+  # Unlike split, references in different languages don't need to be separated by reference separators
+  def split_at_names(self, input_string, default = 'en'):
+    name_scores = [(start, {lang: length for lang in langs}) for start, length, langs in self.find_names(input_string)]
+    total_lang = self.get_total_lang([scores for start, scores in name_scores], default)
+    
+    runs = []
+    run_lang = total_lang
+    run_start = 0
+    for start, scores in name_scores:
+      lang = self.get_best_lang(scores, (run_lang, total_lang, default, 'en'))
+      if lang != run_lang:
+        if start > run_start:
+          runs.append((run_lang, input_string[run_start:start]))
+        run_lang = lang
+        run_start = start
+    runs.append((run_lang, input_string[run_start:]))
+    return runs
+
+
+# Get the language detector (built once for each version of the metadata)
+@data.metadata_cache(maxsize = 1)
+def get_language_detector():
+  return data.metadata.tables[LanguageDetector]
+
+
+# Get the most likely language (BCP 47 language tag) of the references in a string, from the book names in it
+# Returns the default language if there aren't any book names. Example: detect_lang('Jean 3:16') –> 'fr'
+def detect_lang(input_string, default = 'en'):
+  return get_language_detector().detect(input_string, default)
+
+
+# ICU collators for natural sort order (sorts '7a' after '7' and '10' after '9'), by language, for each thread
+# PyICU objects aren't safe to use from several threads at once, so each thread creates its own collators the first time it needs them
+class CollatorPool(threading.local):
+  def __init__(self):
+    self.collators = {}
+  
+  def get(self, lang = 'en'):
+    collator = self.collators.get(lang)
+    if collator is None:
+      # Imported here, since PyICU is slow to import and only needed for sorting
+      import icu
+      collator = icu.Collator.createInstance(icu.Locale(lang))
+      collator.setAttribute(icu.UCollAttribute.NUMERIC_COLLATION, icu.UCollAttributeValue.ON)
+      self.collators[lang] = collator
+    return collator
+
+natural_sort_collators = CollatorPool()
+
+# Get the natural sort collator for a language, for the current thread
+def get_natural_sort_collator(lang = 'en'):
+  return natural_sort_collators.get(lang)
+
+
+# Parse verses into verse ranges, without listing out individual verses
+# Example: '1-2,5-7,9' –> ((1, 2), (5, 7), (9, 9))
+def parse_verse_ranges(verses_string, lang = 'en'):
   verses_string = (verses_string or '').replace('p', '').strip()
   if not verses_string:
-    return None
+    return ()
   
-  unique_verses = set()
-  all_verses_are_integers = True
-  for verse_group_string in re.split(rf'(?:{data.verse_group_separators_pattern})+', verses_string):
-    verse_strings = re.split(data.verse_range_separators_pattern, verse_group_string)
+  parser_tables = get_parser_tables(lang)
+  int_ranges = []
+  other_verses = set()
+  for verse_group_string in parser_tables.verse_group_separators_repeated.split(verses_string):
+    verse_strings = parser_tables.verse_range_separators.split(verse_group_string)
     lower_int = numbers.convert_number_to_int(verse_strings[0])
     upper_int = numbers.convert_number_to_int(verse_strings[-1])
     
@@ -196,33 +1179,46 @@ def parse_verses_string(verses_string, lang = 'en'):
         if digits_to_add > 0:
           new_reversed_upper_str = reversed_upper_str + reversed_lower_str[-digits_to_add:]
           upper_int = int(new_reversed_upper_str[::-1])
-      unique_verses.update(range(lower_int, upper_int + 1))
+      if lower_int <= upper_int:
+        int_ranges.append((lower_int, upper_int))
     else:
-      all_verses_are_integers = False
-      unique_verses.update([lower_int, upper_int])
+      other_verses.update([lower_int, upper_int])
   
-  if all_verses_are_integers:
-    verses = sorted(unique_verses)
-  else:
-    if lang not in natural_sort_collators:
-      natural_sort_collators[lang] = icu.Collator.createInstance(icu.Locale(lang))
-      natural_sort_collators[lang].setAttribute(icu.UCollAttribute.NUMERIC_COLLATION, icu.UCollAttributeValue.ON)
-    verses = sorted([str(v) for v in unique_verses], key=natural_sort_collators[lang].getSortKey)
-    verses = [numbers.convert_number_to_int(v) for v in verses]
+  int_ranges = verses.merge_ranges(int_ranges)
+  if not other_verses:
+    return int_ranges
   
-  verse_groups = []
-  previous_verse = -1
-  for verse in verses:
-    if isinstance(verse, int):
-      if verse == previous_verse + 1:
-        verse_groups[-1].append(verse)
-      else:
-        verse_groups.append([verse])
-      previous_verse = verse
-    else:
-      verse_groups.append([verse])
-      previous_verse = -1
-  return verse_groups
+  # Verses that aren't whole numbers (such as '7a') are placed in natural sort order, splitting
+  # any range they fall inside of, so '6-8,7a' –> ((6, 7), ('7a', '7a'), (8, 8))
+  sort_key = get_natural_sort_collator(lang).getSortKey
+  other_verses = sorted([(sort_key(str(v)), numbers.convert_number_to_int(str(v))) for v in other_verses])
+  verse_ranges = []
+  i = 0
+  for start, end in int_ranges:
+    while i < len(other_verses) and other_verses[i][0] < sort_key(str(end)):
+      other_verse_key, other_verse = other_verses[i]
+      if other_verse_key > sort_key(str(start)):
+        # Find the last verse in the range that sorts before this one
+        low, high = start, end
+        while low < high:
+          middle = (low + high + 1) // 2
+          if sort_key(str(middle)) < other_verse_key:
+            low = middle
+          else:
+            high = middle - 1
+        verse_ranges.append((start, low))
+        start = low + 1
+      verse_ranges.append((other_verse, other_verse))
+      i += 1
+    verse_ranges.append((start, end))
+  verse_ranges.extend([(other_verse, other_verse) for other_verse_key, other_verse in other_verses[i:]])
+  return tuple(verse_ranges)
+
+
+# Parse verses into verse groups
+# Example: '1-2,5-7,9' –> [[1, 2], [5, 6, 7], [9]]
+def parse_verses_string(verses_string, lang = 'en'):
+  return convert_verse_ranges_to_groups(parse_verse_ranges(verses_string, lang))
 
 
 # Format verse groups to a localized string
@@ -239,12 +1235,46 @@ def convert_verse_groups_to_string(verse_groups, verse_range_separator, verse_gr
 
 
 # Parse one or more scripture references, URIs, URLs, or slugs
-def parse_references_string(input_string, lang = 'en', sort_by = None):
+def parse_references_string(input_string, lang = 'en', sort_by = None, merge = False):
+  # Stages are timed if profiling is enabled (see profiling.py)
+  profiler = profiling.profiler
+  if profiler:
+    start_time = stage_time = profiler.start()
+  
+  # Detect the language of each run of references, and parse each run in its language
+  if lang == 'auto':
+    references = []
+    runs = get_language_detector().split(input_string)
+    if profiler:
+      profiler.mark('parse/detect_lang', stage_time)
+    for run_lang, run_string in runs:
+      references.extend(parse_references_string(run_string, lang = run_lang))
+    if profiler:
+      stage_time = profiler.start()
+    if merge:
+      references = merge_references(references)
+    references = sort_references(references, lang = references[0].lang if references else 'en', sort_by = sort_by)
+    if profiler and (merge or sort_by):
+      profiler.mark('parse/merge_and_sort', stage_time)
+    return references
+  
   lang = data.get_bcp47(lang)
+  parser_tables = get_parser_tables(lang)
+  punctuation_to_strip = parser_tables.punctuation_to_strip
+  original_input_string = input_string
   
   # Remove leading or trailing whitespace and punctuation
-  punctuation_to_strip = ''.join(data.scriptures['summary']['punctuation']['referenceSeparator'] + data.scriptures['summary']['punctuation']['verseGroupSeparator'] + data.scriptures['summary']['punctuation']['verseRangeSeparator']) + '(;,.'
   input_string = input_string.strip().strip(punctuation_to_strip).rstrip(':').strip()
+  if profiler:
+    stage_time = profiler.mark('parse/prepare', stage_time)
+  
+  # Church URIs and URLs don't need to be normalized, and normalizing could change them (i.e. "enos" in a URI looks like a book name)
+  uri_strings = parser_tables.reference_separators.sub(' ', input_string).split()
+  if uri_strings and all('/scriptures/' in uri_string for uri_string in uri_strings):
+    references = parse_input_list(uri_strings, lang, sort_by = sort_by, merge = merge)
+    if profiler:
+      profiler.mark_input('parse_references_string', original_input_string, lang, start_time)
+    return references
   
   # If language is English, replace roman numerals with numbers. Example: 'II Corinthians" –> "2 Corinthians"
   if lang == 'en':
@@ -252,61 +1282,73 @@ def parse_references_string(input_string, lang = 'en', sort_by = None):
     input_string = re.sub(r'\bii\s', '2', input_string, flags=re.IGNORECASE)
     input_string = re.sub(r'\biii\s', '3', input_string, flags=re.IGNORECASE)
     input_string = re.sub(r'\biv\s', '4', input_string, flags=re.IGNORECASE)
+    if profiler:
+      stage_time = profiler.mark('parse/roman_numerals', stage_time)
   
   # Remove commas from book names so further normalization doesn't try to split it into two references. Example: "JST, Genesis 1" –> "JST Genesis 1"
   input_string = input_string.replace('\xa0', ' ')
-  scripture_book_names = set()
-  scripture_book_names_without_commas = []
-  for volume_data in data.scriptures['structure'].values():
-    for book_slug in volume_data['books'].keys():
-      book_info = data.scriptures['languages'][lang]['translatedNames'].get(book_slug)
-      if book_info:
-        book_name = (book_info.get('name') or '').replace('\xa0', ' ')
-        if book_name:
-          scripture_book_names.add(book_name)
-        book_abbrev = (book_info.get('abbrev') or '').replace('\xa0', ' ')
-        if book_abbrev:
-          scripture_book_names.add(book_abbrev)
-  scripture_book_names = sorted(scripture_book_names, key=lambda x: (-len(x), x))
-  for scripture_book_name in scripture_book_names:
-    scripture_book_name_without_comma = re.sub(data.verse_group_separators_pattern, '', scripture_book_name)
-    scripture_book_names_without_commas.append(scripture_book_name_without_comma)
-    if scripture_book_name in input_string and re.search(data.verse_group_separators_pattern, scripture_book_name):
+  for scripture_book_name, scripture_book_name_without_comma in parser_tables.book_names_with_commas:
+    if scripture_book_name in input_string:
       input_string = input_string.replace(scripture_book_name, scripture_book_name_without_comma)
+  if profiler:
+    stage_time = profiler.mark('parse/book_name_commas', stage_time)
   
   # Normalize whitespace-separated references. Example: "Genesis 1:2 1 Nephi 3:7" –> "; Genesis 1:2 ; 1 Nephi 3:7"
-  scripture_book_names_pattern = '|'.join([re.escape(sbn) for sbn in scripture_book_names_without_commas])
-  input_string = re.sub(rf'(?:^|[^\-])\b({scripture_book_names_pattern})', r'; \1', input_string, flags=re.IGNORECASE)
+  input_string = parser_tables.book_name_starts.sub(r'; \1', input_string)
+  if profiler:
+    stage_time = profiler.mark('parse/book_name_starts', stage_time)
   
   # Normalize lists and ranges. Example: "Genesis 12:1, 2, and 3; verses 1 and 4; John 2 through 7" –> "Genesis 12:1, 2,,3; verses 1,4; John 2–7"
   input_string = re.sub(r'\s+(?:and|y|e|et|&)\s+(\d+)', r',\1', input_string)
   input_string = re.sub(r'\s+(?:through|thru|to|al|a|à)\s+(\d+)', r'–\1', input_string)
+  if profiler:
+    stage_time = profiler.mark('parse/lists_and_ranges', stage_time)
   
   # Normalize verse sets. Example: "chapter 3 verse 7; vv. 3, 6" –> "chapter 3:7; :3, 6"
   input_string = re.sub(r'(?:^|\s)(?:verses|verse|vv\.|v\.|versículos|versículo|versets|verset)\s(\d+)', r':\1', input_string).replace('::', ':')
+  if profiler:
+    stage_time = profiler.mark('parse/verse_sets', stage_time)
   
   # Normalize chapter sets. Example: "Genesis 1, 2, 4–5, Exodus 10; Alma 32" –> "Genesis 1; 2; 4–5; Exodus 10; Alma 32"
-  if re.search(data.verse_group_separators_pattern, input_string) and not re.search(data.chapter_verse_separators_pattern, input_string):
-    input_string = re.sub(rf'(?:{data.verse_group_separators_pattern})+', ';', input_string)
+  if parser_tables.verse_group_separators.search(input_string) and not parser_tables.chapter_verse_separators.search(input_string):
+    input_string = parser_tables.verse_group_separators_repeated.sub(';', input_string)
+  if profiler:
+    stage_time = profiler.mark('parse/chapter_sets', stage_time)
   
   # Normalize chapter:verse sets. Example: "Genesis 6:7a, 6:13a, 15; 1 Nephi 3:7 (twice), 8:21" –> "Genesis 6:7a; 6:13a, 15; 1 Nephi 3:7 (twice); 8:21"
-  if re.search(data.chapter_verse_separators_pattern, input_string):
-    references_list = re.split(data.reference_separators_pattern, input_string)
+  if parser_tables.chapter_verse_separators.search(input_string):
+    references_list = parser_tables.reference_separators.split(input_string)
     new_references_list = []
     for reference in references_list:
-      reference_parts = re.split(data.verse_group_separators_pattern, reference)
+      reference_parts = parser_tables.verse_group_separators.split(reference)
       reference_input_string = ''
       for part in reference_parts:
         if reference_input_string == '':
           reference_input_string += part
-        elif re.search(data.chapter_verse_separators_pattern, part):
+        elif parser_tables.chapter_verse_separators.search(part):
           reference_input_string += ';' + part
         else:
           reference_input_string += ',' + part
       new_references_list.append(reference_input_string)
     input_string = ';'.join(new_references_list)
   
-  input_list = re.split(data.reference_separators_pattern, input_string)
+  input_list = parser_tables.reference_separators.split(input_string)
+  if profiler:
+    profiler.mark('parse/chapter_verse_sets', stage_time)
+  references = parse_input_list(input_list, lang, sort_by = sort_by, merge = merge)
+  if profiler:
+    profiler.mark_input('parse_references_string', original_input_string, lang, start_time)
+  return references
+
+
+# Parse a list of normalized reference strings (or Church URIs and URLs), with one reference in each string
+def parse_input_list(input_list, lang = 'en', sort_by = None, merge = False):
+  profiler = profiling.profiler
+  if profiler:
+    stage_time = profiler.start()
+  parser_tables = get_parser_tables(lang)
+  scripture_index = get_scripture_index()
+  punctuation_to_strip = parser_tables.punctuation_to_strip
   
   references = []
   previous_book_slug = None
@@ -318,7 +1360,7 @@ def parse_references_string(input_string, lang = 'en', sort_by = None):
       continue
     
     # Remove trailing text. Example: "1 John 3:2 2" –> "1 John 3:2"
-    trailing_text_match = re.match(rf'^.*?\d((?:\:|{data.closing_parenthesis_pattern})?\s+[^{data.opening_parenthesis_pattern}|\s]+)$', input_string)
+    trailing_text_match = parser_tables.trailing_text.match(input_string)
     if trailing_text_match:
       trailing_text_string = trailing_text_match.group(1)
       input_string = input_string.removesuffix(trailing_text_string)
@@ -337,36 +1379,14 @@ def parse_references_string(input_string, lang = 'en', sort_by = None):
       # Example: gospellibrary://content/scriptures/ot/gen/3.1-3
       # Example: http://lds.org/scriptures/ot/gen/3.1-3?lang=eng
       # Example: https://www.churchofjesuschrist.org/study/scriptures/ot/gen/3?id=p1-p3&lang=eng#p1
-      
-      unparsed = '/scriptures/' + input_string.split('/scriptures/')[1]
-      query_string = None
-      if '?' in unparsed:
-        unparsed, query_string = unparsed.split('?')
-      
-      # Get verses string
-      if '.' in unparsed:
-        unparsed, verses_string = unparsed.split('.')
-        if '(' in verses_string:
-          verses_string, context_verses_string = verses_string.replace(')', '').split('(')
-      elif query_string:
-        if 'id=' in query_string:
-          verses_string = query_string.split('id=')[1].split('&')[0]
-          if 'context=' in query_string:
-            context_verses_string = query_string.split('context=')[1].split('&')[0]
-        elif '#' in query_string:
-          verses_string = query_string.split('#')[1]
-      
-      # Get chapter string and book string
-      book_string = unparsed
-      if book_string.count('/') > 3:
-        book_string, chapter_string = book_string.rsplit('/', 1)
-      
+      book_string, chapter_string, verses_string, context_verses_string = parse_church_uri(input_string)
+    
     else:
       # Scripture reference or slug
       # Examples: Old Testament; 1 Nephi; Matthew 1; Helaman 5:12; words-of-mormon
       
       # Get verses string
-      parts = re.split(data.chapter_verse_separators_pattern, input_string)
+      parts = parser_tables.chapter_verse_separators.split(input_string)
       if len(parts) == 2:
         # Regular chapter and verse found
         unparsed, verses_string = parts
@@ -374,27 +1394,24 @@ def parse_references_string(input_string, lang = 'en', sort_by = None):
         # Chapter only, or special case like 'Genesis 7:17–8:9' or 'Genesis 1–5'
         unparsed = input_string
         verses_string = ''
-      verses_string, context_verses_string = (re.split(data.opening_parenthesis_pattern, re.sub(data.closing_parenthesis_pattern, '', verses_string)) + [''])[:2]
+      verses_string, context_verses_string = (parser_tables.opening_parenthesis.split(parser_tables.closing_parenthesis.sub('', verses_string)) + [''])[:2]
       
       # Get chapter string and book string
       book_string = unparsed
-      chapter_match = re.match(rf'^.*?(\d(?:\d|\s|{data.chapter_verse_separators_pattern}|{data.verse_range_separators_pattern}|{data.verse_group_separators_pattern})*)$', book_string)
+      chapter_match = parser_tables.chapter.match(book_string)
       if chapter_match:
         chapter_string = chapter_match.group(1)
         book_string = book_string.removesuffix(chapter_string).strip()
     
-    verse_groups = parse_verses_string(verses_string)
-    context_verse_groups = parse_verses_string(context_verses_string)
+    verse_ranges = parse_verse_ranges(verses_string)
+    context_verse_ranges = parse_verse_ranges(context_verses_string)
     chapter = numbers.convert_number_to_int(chapter_string)
     book_slug = None
     skip_book_name = False
     if book_string:
-      book_slug = data.scriptures['mapToSlug'].get(book_string, None)
+      book_slug = scripture_index.slugs_by_church_uri.get(book_string) or data.scriptures['mapToSlug'].get(book_string, None)
       if not book_slug:
-        for key, value in data.scriptures['mapToSlug'].items():
-          if normalizeForCompare(book_string) == normalizeForCompare(key):
-            book_slug = value
-            break
+        book_slug = get_normalized_slug_index().get(book_string)
       # Special handling for Abraham facsimiles
       if book_slug == 'facsimiles' or (not book_slug and 'fac' in book_string.lower()):
         if previous_book_slug == 'abraham' and not previous_chapter:
@@ -402,18 +1419,12 @@ def parse_references_string(input_string, lang = 'en', sort_by = None):
         book_slug = 'abraham'
         if chapter:
           chapter = f'fac-{chapter}'
-        elif verse_groups:
-          chapter = f'fac-{verse_groups[0][0]}'
-          verse_groups = None
+        elif verse_ranges:
+          chapter = f'fac-{verse_ranges[0][0]}'
+          verse_ranges = None
       # Special handling for Psalms and similar cases
-      elif book_slug == 'psalm':
-        book_slug = 'psalms'
-      elif book_slug == 'section':
-        book_slug = 'sections'
-      elif book_slug == 'jst-psalms':
-        book_slug = 'jst-psalm'
-      elif book_slug == 'official-declaration':
-        book_slug = 'official-declarations'
+      else:
+        book_slug = parser_book_slugs.get(book_slug, book_slug)
     else:
       book_slug = previous_book_slug
     
@@ -423,51 +1434,195 @@ def parse_references_string(input_string, lang = 'en', sort_by = None):
         chapter = previous_chapter
     
     publication_slug = None
-    if book_slug in data.scriptures['structure'].keys():
+    if book_slug in scripture_index.publication_slugs:
       publication_slug = book_slug
       book_slug = None
     else:
-      for pub_slug, pub_data in data.scriptures['structure'].items():
-        if book_slug in pub_data['books'].keys():
-          publication_slug = pub_slug
+      publication_slug = scripture_index.publications_by_book.get(book_slug)
     
-    reference = Reference(lang = lang, publication_slug = publication_slug, book_slug = book_slug, chapter = chapter, verse_groups = verse_groups, context_verse_groups = context_verse_groups)
+    reference = Reference(lang = lang, publication_slug = publication_slug, book_slug = book_slug, chapter = chapter, verse_ranges = verse_ranges, context_verse_ranges = context_verse_ranges)
     references.append(reference)
     
     previous_chapter = chapter
     previous_book_slug = book_slug
+  if profiler:
+    stage_time = profiler.mark('parse/resolve', stage_time)
+  
+  if merge:
+    references = merge_references(references)
+    if profiler:
+      stage_time = profiler.mark('parse/merge', stage_time)
+  references = sort_references(references, lang = lang, sort_by = sort_by)
+  if profiler and sort_by:
+    profiler.mark('parse/sort', stage_time)
+  return references
+
+
+# Combine references to the same chapter (or book or publication) into one reference, at the position of the first one
+# Overlapping and adjacent verses are merged. Example: 'John 3:16; John 3:17-18' –> 'John 3:16–18'
+def merge_references(references):
+  merged_references = []
+  positions = {}
+  for reference in references:
+    key = (reference.publication_slug, reference.book_slug, reference.chapter)
+    if key in positions:
+      merged_references[positions[key]] = merged_references[positions[key]].union(reference)
+    else:
+      positions[key] = len(merged_references)
+      merged_references.append(reference)
+  return merged_references
+
+
+# Get Church website URLs for many references (same as calling church_url() on each one)
+# Chapter URIs, verse strings, and lang parameters are only built once for each distinct value, so large lists are faster
+def get_church_urls(references, skip_lang = False, skip_fragment = False):
+  scripture_index = get_scripture_index()
+  church_availability = data.scriptures['summary']['churchAvailability']
+  chapter_uris = {}
+  verse_uris = {}
+  lang_parameters = {}
+  urls = []
+  for reference in references:
+    book_uri = scripture_index.book_church_uris.get(reference.book_slug)
+    if not book_uri or not reference.chapter:
+      # Publications, whole books, and references without a Church URI
+      urls.append(reference.church_url(skip_lang = skip_lang, skip_fragment = skip_fragment))
+      continue
+    
+    chapter_key = (reference.book_slug, reference.chapter, reference.lang)
+    chapter_uri = chapter_uris.get(chapter_key)
+    if chapter_uri is None:
+      chapter_uri = chapter_uris[chapter_key] = book_uri + get_church_uri_chapter(reference.chapter, reference.lang)
+    url = 'https://www.churchofjesuschrist.org/study' + chapter_uri
+    if reference.verse_ranges:
+      verses_key = (reference.verse_ranges, reference.context_verse_ranges)
+      verse_uri = verse_uris.get(verses_key)
+      if verse_uri is None:
+        verse_uri = verse_uris[verses_key] = get_church_uri_verses(reference.verse_ranges, reference.context_verse_ranges, use_query_parameters = True)
+      url += verse_uri
     
-  return sort_references(references, lang = lang, sort_by = sort_by)
+    if not skip_lang:
+      lang_key = (reference.lang, reference.publication_slug)
+      lang_parameter = lang_parameters.get(lang_key)
+      if lang_parameter is None:
+        lang_parameter = ''
+        if reference.publication_slug and reference.lang in church_availability[reference.publication_slug]:
+          lang_parameter = 'lang=' + data.languages['languages'][reference.lang]['churchLang']
+        lang_parameters[lang_key] = lang_parameter
+      if not lang_parameter:
+        # Not available on the Church website in this language
+        urls.append('')
+        continue
+      url += ('&' if reference.verse_ranges else '?') + lang_parameter
+    if reference.verse_ranges and not skip_fragment:
+      url += '#p' + str(reference.verse_ranges[0][0])
+    urls.append(url)
+  return urls
 
 
-# Functions that can be called via Python or from the command line (see README.md for more information)
+# Find scripture references in free-form text (such as a talk or lesson), yielding (start, end, reference) for each one
+# Start and end are character offsets in the text. Book names must be followed by a chapter (e.g. "Alma 32" or "Alma 32:21").
+# Text can be a string, a file, or an iterable of strings (such as lines). Files and iterables are scanned a chunk at a time.
+# If lang is 'auto', the language of each part of the text is detected from its book names (see LanguageDetector.split_at_names),
+# and each part is scanned in its language. The whole text is read before it's scanned.
+# Example: list(find_references('Read John 3:16 and Alma 32:21.')) –> [(5, 14, <John 3:16>), (19, 29, <Alma 32:21>)]
+def find_references(text, lang = 'en', chunk_size = 65536):
+  if isinstance(text, str):
+    chunks = [text]
+  elif hasattr(text, 'read'):
+    chunks = iter(functools.partial(text.read, chunk_size), '')
+  else:
+    chunks = text
+  
+  if lang == 'auto':
+    offset = 0
+    for run_lang, run_text in get_language_detector().split_at_names(''.join(chunks)):
+      for start, end, reference in find_references(run_text, lang = run_lang):
+        yield offset + start, offset + end, reference
+      offset += len(run_text)
+    return
+  
+  scanner = get_reference_scanner(lang)
+  for start, end, book_slug, tail in scanner.scan(chunks):
+    references = parse_input_list([f'{book_slug} {scanner.convert_numerals(tail)}'], lang)
+    if references and references[0].book_slug:
+      yield start, end, references[0]
 
-def get_content(input_string, lang = 'en', separator = '\n', source = 'python-scripture-scraper', **kwargs):
-  references = parse_references_string(input_string, lang = lang)
-  return separator.join([ref.content(source = source) for ref in references])
 
-def get_label(input_string, lang = 'en', separator = '\n', sort_by = None, skip_book_name = False, abbreviated = False, **kwargs):
-  references = parse_references_string(input_string, lang = lang, sort_by = sort_by)
-  return separator.join([ref.label(skip_book_name = skip_book_name, abbreviated = abbreviated) for ref in references])
+# Parse one input string, returning the exception instead of raising it if the input can't be parsed
+def parse_references_string_or_error(input_string, lang = 'en', sort_by = None, merge = False):
+  try:
+    return parse_references_string(input_string, lang = lang, sort_by = sort_by, merge = merge)
+  except Exception as e:
+    return e
 
-def get_church_uri(input_string, separator = '\n', sort_by = None, use_query_parameters = False, **kwargs):
-  references = parse_references_string(input_string, lang = lang, sort_by = sort_by)
-  return separator.join([ref.church_uri(use_query_parameters = use_query_parameters) for ref in references])
 
-def get_church_url(input_string, lang = 'en', separator = '\n', sort_by = None, skip_lang = False, skip_fragment = False, **kwargs):
-  references = parse_references_string(input_string, lang = lang, sort_by = sort_by)
-  return separator.join([ref.church_url(skip_lang = skip_lang, skip_fragment = skip_fragment) for ref in references])
+# Build the tables used to parse a language (or to detect the language, if lang is 'auto'), for parse_many's worker processes
+def load_parser_tables(lang):
+  if lang == 'auto':
+    get_language_detector()
+  else:
+    get_parser_tables(lang)
+  get_normalized_slug_index()
+
 
-def get_church_link(input_string, lang = 'en', separator = '\n', sort_by = None, link_class = None, link_target = None, skip_book_name = False, abbreviated = False, skip_lang = False, skip_fragment = False, **kwargs):
-  references = parse_references_string(input_string, lang = lang, sort_by = sort_by)
-  return separator.join([ref.church_link(link_class = link_class, link_target = link_target, skip_book_name = skip_book_name, abbreviated = abbreviated, skip_lang = skip_lang, skip_fragment = skip_fragment) for ref in references])
+# Parse many input strings, yielding a list of references for each input (or the exception raised for that input), in input order
+# If workers is more than 1, inputs are parsed in a pool of worker processes, in batches of chunksize
+def parse_many(input_strings, lang = 'en', sort_by = None, merge = False, workers = None, chunksize = 64):
+  # The language of each input is detected when it's parsed (see parse_references_string)
+  if lang != 'auto':
+    lang = data.get_bcp47(lang)
+  parse_function = functools.partial(parse_references_string_or_error, lang = lang, sort_by = sort_by, merge = merge)
+  
+  if not workers or workers < 2:
+    for input_string in input_strings:
+      yield parse_function(input_string)
+    return
+  
+  # Imported here, since it's only needed for parsing in several processes
+  import multiprocessing
   
-def get_reference_objects(input_string, lang = 'en', sort_by = None, **kwargs):
-  return parse_references_string(input_string, lang = lang, sort_by = sort_by)
+  # The pool uses the platform's default start method rather than forcing 'fork' (which isn't safe in a process with other threads). Each worker
+  # builds the parser tables once when it starts (see load_parser_tables); they're built here first too, so forked workers inherit them.
+  load_parser_tables(lang)
+  with multiprocessing.Pool(workers, initializer = load_parser_tables, initargs = (lang,)) as pool:
+    yield from pool.imap(parse_function, input_strings, chunksize = chunksize)
+
+
+# Functions that can be called via Python or from the command line (see README.md for more information)
 
-def get_reference_attributes(input_string, lang = 'en', sort_by = None, **kwargs):
-  references = parse_references_string(input_string, lang = lang, sort_by = sort_by)
-  return [ref.attributes() for ref in references]
+def get_content(input_string, lang = 'en', separator = '\n', merge = False, source = 'python-scripture-scraper', workers = 8, **kwargs):
+  references = parse_references_string(input_string, lang = lang, merge = merge)
+  content_requests = profiling.timed('content_request', lambda: [ref.content_request(source = source) for ref in references])
+  return profiling.timed('request_contents', lambda: separator.join(data.iter_contents(content_requests, workers = workers)))
+
+# Get chapter or verse content for each reference, yielding each one as soon as it's ready (so long lists of chapters don't all need to be held in memory)
+def iter_content(input_string, lang = 'en', merge = False, source = 'python-scripture-scraper', workers = 8, **kwargs):
+  references = parse_references_string(input_string, lang = lang, merge = merge)
+  yield from data.iter_contents((ref.content_request(source = source) for ref in references), workers = workers)
+
+def get_label(input_string, lang = 'en', separator = '\n', sort_by = None, merge = False, skip_book_name = False, abbreviated = False, **kwargs):
+  references = parse_references_string(input_string, lang = lang, sort_by = sort_by, merge = merge)
+  return separator.join(profiling.timed('label', lambda: [ref.label(skip_book_name = skip_book_name, abbreviated = abbreviated) for ref in references]))
+
+def get_church_uri(input_string, lang = 'en', separator = '\n', sort_by = None, merge = False, use_query_parameters = False, **kwargs):
+  references = parse_references_string(input_string, lang = lang, sort_by = sort_by, merge = merge)
+  return separator.join(profiling.timed('church_uri', lambda: [ref.church_uri(use_query_parameters = use_query_parameters) for ref in references]))
+
+def get_church_url(input_string, lang = 'en', separator = '\n', sort_by = None, merge = False, skip_lang = False, skip_fragment = False, **kwargs):
+  references = parse_references_string(input_string, lang = lang, sort_by = sort_by, merge = merge)
+  return separator.join(profiling.timed('church_url', lambda: get_church_urls(references, skip_lang = skip_lang, skip_fragment = skip_fragment)))
+
+def get_church_link(input_string, lang = 'en', separator = '\n', sort_by = None, merge = False, link_class = None, link_target = None, skip_book_name = False, abbreviated = False, skip_lang = False, skip_fragment = False, **kwargs):
+  references = parse_references_string(input_string, lang = lang, sort_by = sort_by, merge = merge)
+  return separator.join(profiling.timed('church_link', lambda: [ref.church_link(link_class = link_class, link_target = link_target, skip_book_name = skip_book_name, abbreviated = abbreviated, skip_lang = skip_lang, skip_fragment = skip_fragment) for ref in references]))
+
+def get_reference_objects(input_string, lang = 'en', sort_by = None, merge = False, **kwargs):
+  return parse_references_string(input_string, lang = lang, sort_by = sort_by, merge = merge)
+
+def get_reference_attributes(input_string, lang = 'en', sort_by = None, merge = False, **kwargs):
+  references = parse_references_string(input_string, lang = lang, sort_by = sort_by, merge = merge)
+  return profiling.timed('attributes', lambda: [ref.attributes() for ref in references])
 
 def get_langs(**kwargs):
   return data.scriptures['languages'].keys()
@@ -478,54 +1633,28 @@ def get_punctuation(lang = 'en', **kwargs):
 def get_numerals(lang = 'en', **kwargs):
   return data.scriptures['languages'][lang]['numerals']
 
+# Commands that don't take an input string
+commands_without_input = ('get_langs', 'get_punctuation', 'get_numerals')
+
+# Convert a command's result to JSON types: references become their attributes, and other collections (such as the
+# languages from get_langs, or the chapters from iter_content) become lists. Raises TypeError for any other type.
+def get_json_result(result):
+  if result is None or isinstance(result, (str, int, float, bool)):
+    return result
+  if isinstance(result, Reference):
+    return result.attributes()
+  if isinstance(result, dict):
+    return {key: get_json_result(value) for key, value in result.items()}
+  if isinstance(result, (list, tuple, set, frozenset, collections.abc.KeysView, collections.abc.ValuesView, collections.abc.Iterator)):
+    return [get_json_result(value) for value in result]
+  raise TypeError(f'Results of type {type(result).__name__} can’t be converted to JSON')
+
 def sort_references(references, lang = 'en', sort_by = None):
   # Sort by book order or alphabetically by label
   if sort_by == 'traditional' or sort_by == 'label':
-    reference_tuples = []
-    book_slugs_by_book = []
-    book_slugs_by_label = []
-    chapters_by_book = {}
-    for publication_slug, publication_info in data.scriptures['structure'].items():
-      for book_slug, book_info in publication_info['books'].items():
-        chapters_by_book[book_slug] = book_info['churchChapters']
-        book_slugs_by_book.append(book_slug)
-    
-    if sort_by == 'label':
-      bcp47 = lang
-      if lang.endswith('Hant'):
-        bcp47 = 'zh-Hant'
-      elif lang.endswith('Hans'):
-        bcp47 = 'zh-Hans'
-      collation_index = icu.AlphabeticIndex(icu.Locale(bcp47 + '-u-ka-shifted')).addLabels(icu.Locale('en' + '-u-ka-shifted'))
-      for book_slug in book_slugs_by_book:
-        book_name = data.scriptures['languages'][lang]['translatedNames'].get(book_slug, {}).get('name') or book_slug
-        collation_index.addRecord(book_name or '', book_slug)
-      for (bucket_label, label_type) in collation_index:
-        while collation_index.nextRecord():
-          book_slugs_by_label.append(collation_index.recordData)
-    
-    for reference in references:
-      book_position = 0
-      chapter_position = 0
-      verse_position = 0
-      number_of_verses = 0
-      if reference.book_slug and reference.book_slug in book_slugs_by_book:
-        if sort_by == 'traditional':
-          book_position = book_slugs_by_book.index(reference.book_slug) + 1
-        elif sort_by == 'label':
-          book_position = book_slugs_by_label.index(reference.book_slug) + 1
-        
-        if reference.chapter and reference.chapter in chapters_by_book[reference.book_slug]:
-          chapter_position = (chapters_by_book[reference.book_slug].index(reference.chapter) + 1) if isinstance(reference.chapter, int) else 1000
-          if reference.verse_groups:
-            verse_position = reference.verse_groups[0][0] if isinstance(reference.verse_groups[0][0], int) else 1000
-            number_of_verses = sum([len(vg) for vg in reference.verse_groups])
-      
-      reference_tuple = (book_position, chapter_position, verse_position, number_of_verses, reference)
-      reference_tuples.append(reference_tuple)
-    sorted_reference_tuples = sorted(reference_tuples)
-    return [reference_tuple[4] for reference_tuple in sorted_reference_tuples]
+    lang = data.get_bcp47(lang)
+    return sorted(references, key = lambda reference: reference.sort_key(sort_by = sort_by, lang = lang))
   
   # Return original sort order
   else:
-    return references
\ No newline at end of file
+    return references
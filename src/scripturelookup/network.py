@@ -0,0 +1,80 @@
+# Python standard libraries
+import threading
+import time
+import urllib.parse
+
+
+# Shared HTTP session, so connections are reused between requests (including requests from several threads)
+session = None
+session_lock = threading.Lock()
+
+# Maximum requests per second for each host, to avoid overloading servers (hosts that aren't listed aren't rate limited)
+rate_limits = {
+  'www.churchofjesuschrist.org': 1,
+}
+rate_limiters = {}
+rate_limiters_lock = threading.Lock()
+
+
+# Token-bucket rate limiter
+# Allows up to `burst` requests at once, then `rate` requests per second
+class RateLimiter:
+  def __init__(self, rate, burst = 1):
+    self.rate = rate
+    self.burst = burst
+    self.tokens = burst
+    self.updated = time.monotonic()
+    self.lock = threading.Lock()
+  
+  # Wait until a request is allowed
+  def acquire(self):
+    with self.lock:
+      now = time.monotonic()
+      self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+      self.updated = now
+      # Tokens can go negative, so that threads waiting at the same time are spaced out in turn
+      self.tokens -= 1
+      wait = -self.tokens / self.rate if self.tokens < 0 else 0
+    if wait > 0:
+      time.sleep(wait)
+
+
+# Set the rate limit for a host (requests per second), or remove it if rate is None
+def set_rate_limit(host, rate, burst = 1):
+  with rate_limiters_lock:
+    if rate:
+      rate_limits[host] = rate
+      rate_limiters[host] = RateLimiter(rate, burst = burst)
+    else:
+      rate_limits.pop(host, None)
+      rate_limiters.pop(host, None)
+
+
+# Get the rate limiter for a host, or None if the host isn't rate limited
+def get_rate_limiter(host):
+  with rate_limiters_lock:
+    if host not in rate_limiters and rate_limits.get(host):
+      rate_limiters[host] = RateLimiter(rate_limits[host])
+    return rate_limiters.get(host)
+
+
+# Get the shared HTTP session (created the first time it's used)
+def get_session():
+  global session
+  with session_lock:
+    if session is None:
+      # Imported here, since it's slow to import and only needed for network requests
+      import requests
+      session = requests.Session()
+      session.mount('https://', requests.adapters.HTTPAdapter(pool_connections = 4, pool_maxsize = 16))
+      session.mount('http://', requests.adapters.HTTPAdapter(pool_connections = 4, pool_maxsize = 16))
+    return session
+
+
+# Make a GET request using the shared session, waiting first if the host is rate limited
+# If stream is True, the body is read as it's used (see requests' Response.iter_content)
+def get(url, headers = None, stream = False):
+  rate_limiter = get_rate_limiter(urllib.parse.urlsplit(url).hostname)
+  if rate_limiter:
+    rate_limiter.acquire()
+  return get_session().get(url, headers = headers, stream = stream)
@@ -1,10 +1,100 @@
 # Python standard libraries
-import sys
-import importlib
+import functools
+import threading
 
-# Third-party libraries
-GeezGeezify = importlib.import_module('geezify-python-main.geezify', package='...').Geezify
-GeezArabify = importlib.import_module('geezify-python-main.arabify', package='...').Arabify
+
+# Numbers from 1 to cached_number_limit are formatted once per numeral system, then looked up
+cached_number_limit = 1000
+
+
+# Numeral system that can format whole numbers and parse them back
+# Formatted numbers from 1 to cached_number_limit (and the reverse mapping, for parsing) are built the first time the system is used
+class NumeralSystem:
+  def __init__(self, name, format_function, parse_function = None, characters = ''):
+    self.name = name
+    self.format_function = format_function
+    self.parse_function = parse_function
+    # Characters used by the numeral system, to check whether a string can be parsed
+    self.characters = frozenset(characters)
+    self.formatted_numbers = None
+    self.parsed_numbers = None
+    self.lock = threading.Lock()
+  
+  def build_caches(self):
+    with self.lock:
+      if self.formatted_numbers is None:
+        formatted_numbers = [''] + [self.format_function(int_number) for int_number in range(1, cached_number_limit + 1)]
+        self.parsed_numbers = {formatted_number: int_number for int_number, formatted_number in enumerate(formatted_numbers) if formatted_number}
+        self.formatted_numbers = formatted_numbers
+  
+  # Format a positive whole number
+  def format(self, int_number):
+    if 0 < int_number <= cached_number_limit:
+      if self.formatted_numbers is None:
+        self.build_caches()
+      return self.formatted_numbers[int_number]
+    return self.format_function(int_number)
+  
+  # Whether a string only uses characters of this numeral system
+  def can_parse(self, number):
+    return self.parse_function is not None and self.characters.issuperset(number)
+  
+  # Parse a formatted number to an integer
+  def parse(self, number):
+    if self.parsed_numbers is None:
+      self.build_caches()
+    int_number = self.parsed_numbers.get(number)
+    if int_number is None:
+      int_number = self.parse_function(number)
+    return int_number
+
+
+# Numeral system where each decimal digit is replaced by another character, using str.translate
+class DigitNumeralSystem(NumeralSystem):
+  def __init__(self, name, digits):
+    self.digits = tuple(digits)
+    self.format_table = str.maketrans({str(i): digit for i, digit in enumerate(self.digits)})
+    parse_function = None
+    if all(len(digit) == 1 for digit in self.digits):
+      parse_table = str.maketrans(''.join(self.digits), '0123456789')
+      parse_function = lambda number: int(number.translate(parse_table))
+    super().__init__(name, lambda int_number: str(int_number).translate(self.format_table), parse_function, ''.join(self.digits))
+
+
+# Registry of numeral systems, by target format name
+numeral_systems = {}
+
+def register_numeral_system(numeral_system):
+  numeral_systems[numeral_system.name] = numeral_system
+
+# Get a numeral system for custom numerals 0–9 (cached)
+@functools.lru_cache(maxsize = 64)
+def get_custom_numeral_system(custom_numerals):
+  return DigitNumeralSystem('custom', custom_numerals)
+
+# Default target format for languages that don't use decimal numbers
+default_formats_by_lang = {
+  'ar': 'arabic-eastern',
+  'fa': 'arabic-extended',
+  'ur': 'arabic-extended',
+  'ne': 'devangari',
+  'km': 'khmer',
+  'my': 'myanmar',
+  'th': 'thai',
+  'am': 'geez',
+}
+
+# Numeral systems that convert_number_to_int can detect, in the order they're checked
+advanced_conversion_order = ('chinese', 'geez', 'roman', 'alphabet')
+
+
+# Get the numeral system for a target language, format, or custom numerals (or None for decimal-int or an unknown format)
+def get_target_numeral_system(target_lang = None, target_format = None, target_custom_numerals = []):
+  if target_custom_numerals:
+    return get_custom_numeral_system(tuple(target_custom_numerals))
+  if not target_format:
+    target_format = default_formats_by_lang.get(target_lang, 'decimal-string')
+  return numeral_systems.get(target_format)
 
 
 # Format a positive whole number to a specified language or numeral system
@@ -16,10 +106,10 @@ GeezArabify = importlib.import_module('geezify-python-main.arabify', package='..
 #   --- SIMPLE CONVERSION ---
 #   arabic-eastern (ex: ١٤) – default if target_lang is 'ar'
 #   arabic-extended (ex: ۱۴) – default if target_lang is 'fa' OR 'ur'
-#   devangari (ex: १४) – default if target_lang is 'ne'
+#   devangari (ex: १४) – default if target_lang is 'ne'
 #   khmer (ex: ១៤) – default if target_lang is 'km'
 #   myanmar (ex: ၁၄) – default if target_lang is 'my'
-#   thai (ex: ๑๔) – default if target_lang is 'th'
+#   thai (ex: ๑๔) – default if target_lang is 'th'
 #   custom – requires numerals 0–9 to be passed in as a list
 #   --- COMPLEX CONVERSION ---
 #   chinese-simplified (ex: 十四)
@@ -31,78 +121,32 @@ GeezArabify = importlib.import_module('geezify-python-main.arabify', package='..
 #   alphabet-upper (ex: 'N')
 #   alphabet-lower (ex: 'n')
 def get_formatted_number(number, target_lang = None, target_format = None, target_custom_numerals = []):
-  formatted_number = ''
-  
-  try:
-    int_number = abs(convert_number_to_int(number))
-  except:
+  int_number = convert_number_to_int(number)
+  if not isinstance(int_number, int):
     # Number can't be formatted (ex: 56-57 OR fac-1)
-    return formatted_number
-    
-  if target_custom_numerals:
-    target_format = 'custom'
-  if not target_format:
-    if target_lang in ('ar',):
-      target_format = 'arabic-eastern'
-    elif target_lang in ('fa', 'ur',):
-      target_format = 'arabic-extended'
-    elif target_lang in ('ne',):
-      target_format = 'devangari'
-    elif target_lang in ('km',):
-      target_format = 'khmer'
-    elif target_lang in ('my',):
-      target_format = 'myanmar'
-    elif target_lang in ('th',):
-      target_format = 'thai'
-    elif target_lang in ('am',):
-      target_format = 'geez'
+    return ''
+  if target_format == 'decimal-int' and not target_custom_numerals:
+    return abs(int_number)
+  numeral_system = get_target_numeral_system(target_lang, target_format, target_custom_numerals)
+  if numeral_system is None:
+    return ''
+  return numeral_system.format(abs(int_number))
+
+
+# Format several numbers to the same language or numeral system
+def format_many(numbers, target_lang = None, target_format = None, target_custom_numerals = []):
+  if target_format == 'decimal-int' and not target_custom_numerals:
+    return [get_formatted_number(number, target_format = target_format) for number in numbers]
+  numeral_system = get_target_numeral_system(target_lang, target_format, target_custom_numerals)
+  formatted_numbers = []
+  for number in numbers:
+    int_number = convert_number_to_int(number)
+    if numeral_system is None or not isinstance(int_number, int):
+      formatted_numbers.append('')
     else:
-      target_format = 'decimal-string'
-  
-  # Numerals 0–9: ['0', '1', '2', '3', '4', '5', '6', '7', '8', '9']
-  simple_numeral_mapping = {
-    'arabic-eastern': ['٠', '١', '٢', '٣', '٤', '٥', '٦', '٧', '٨', '٩'],
-    'arabic-extended': ['۰', '۱', '۲', '۳', '۴', '۵', '۶', '۷', '۸', '۹'],
-    'devangari': ['०', '१', '२', '३', '४', '५', '६', '७', '८', '९'],
-    'khmer': ['០', '១', '២', '៣', '៤', '៥', '៦', '៧', '៨', '៩'],
-    'myanmar': ['၀', '၁', '၂', '၃', '၄', '၅', '၆', '၇', '၈', '၉'],
-    'thai': ['๐', '๑', '๒', '๓', '๔', '๕', '๖', '๗', '๘', '๙'],
-    'custom': target_custom_numerals,
-  }
-  
-  if int_number is not None:
-    # Standard decimal
-    if target_format == 'decimal-int':
-      formatted_number = int_number
-    elif target_format == 'decimal-string':
-      formatted_number = str(int_number)
-    
-    # Simple conversion
-    elif target_format in ('arabic-eastern', 'arabic-extended', 'devangari', 'khmer', 'myanmar', 'thai', 'custom'):
-      formatted_number = ''
-      for digit in str(int_number):
-        formatted_number += simple_numeral_mapping[target_format][int(digit)]
-    
-    # Complex conversion
-    elif target_format == 'chinese-simplified':
-      formatted_number = format_number_chinese(int_number, script = 'Hans')
-    elif target_format == 'chinese-traditional':
-      formatted_number = format_number_chinese(int_number, script = 'Hant')
-    elif target_format == 'decimal-fullwidth':
-      formatted_number = format_number_fullwidth(int_number, convert_one_digit = True, convert_two_digits = False, convert_more_than_two_digits = False)
-    elif target_format == 'geez':
-      formatted_number = format_number_geez(int_number)
-    elif target_format == 'roman-upper':
-      formatted_number = format_number_roman(int_number, uppercase = True)
-    elif target_format == 'roman-lower':
-      formatted_number = format_number_roman(int_number, uppercase = False)
-    elif target_format == 'alphabet-upper':
-      formatted_number = format_number_alphabet(int_number, uppercase = True)
-    elif target_format == 'alphabet-lower':
-      formatted_number = format_number_alphabet(int_number, uppercase = False)
-  
-  return formatted_number
-  
+      formatted_numbers.append(numeral_system.format(abs(int_number)))
+  return formatted_numbers
+
 
 # Convert a formatted number to an integer
 def convert_number_to_int(number, advanced_conversion_types = ['chinese', 'geez']):
@@ -111,35 +155,83 @@ def convert_number_to_int(number, advanced_conversion_types = ['chinese', 'geez'
   if isinstance(number, int) or isinstance(number, float):
     int_number = int(number)
   
-  elif isinstance(number, str) and len(number) > 0:
+  elif isinstance(number, str) and number.strip():
     number = number.strip()
     try:
       int_number = int(number)
-    except:
-      if 'chinese' in advanced_conversion_types and all(char in ['〇', '零', '一', '二', '三', '四', '五', '六', '七', '八', '九', '十', '百', '千', '万', '萬', '亿', '億'] for char in number):
-        int_number = chinese_numerals_to_int(number)
-      elif 'geez' in advanced_conversion_types and all(char in ['፲', '፳', '፴', '፵', '፶', '፷', '፸', '፹', '፺', '፻'] for char in number):
-        int_number = geez_numerals_to_int(number)
-      elif 'roman' in advanced_conversion_types and all(char in ['I', 'V', 'X', 'L', 'C', 'D', 'M', 'i', 'v', 'x', 'l', 'c', 'd', 'm'] for char in number):
-        int_number = roman_numerals_to_int(number)
-      elif 'alphabet' in advanced_conversion_types and all(char in ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K', 'L', 'M', 'N', 'O', 'P', 'Q', 'R', 'S', 'T', 'U', 'V', 'W', 'X', 'Y', 'Z', 'a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j', 'k', 'l', 'm', 'n', 'o', 'p', 'q', 'r', 's', 't', 'u', 'v', 'w', 'x', 'y', 'z'] for char in number):
-        int_number = alphabet_numerals_to_int(number)
-      else:
-        int_number = number
+    except ValueError:
+      int_number = number
+      for conversion_type in advanced_conversion_order:
+        if conversion_type in advanced_conversion_types and numeral_systems[parsing_systems[conversion_type]].can_parse(number):
+          int_number = numeral_systems[parsing_systems[conversion_type]].parse(number)
+          break
   
   return int_number or None
 
 
+# Convert several formatted numbers to integers
+def parse_many(numbers, advanced_conversion_types = ['chinese', 'geez']):
+  return [convert_number_to_int(number, advanced_conversion_types = advanced_conversion_types) for number in numbers]
+
+
+chinese_digits = {'〇': 0, '零': 0, '一': 1, '二': 2, '两': 2, '兩': 2, '三': 3, '四': 4, '五': 5, '六': 6, '七': 7, '八': 8, '九': 9}
+chinese_small_units = {'十': 10, '拾': 10, '百': 100, '佰': 100, '千': 1000, '仟': 1000}
+chinese_large_units = {'万': 10000, '萬': 10000, '亿': 100000000, '億': 100000000}
+
 # Convert a formatted number (Chinese numerals) to an integer
+# Supports numbers with units (ex: 一百二十三) and digit-by-digit numbers (ex: 一二三)
 def chinese_numerals_to_int(number):
-  # TODO: Not yet implemented
-  sys.stdout.write('Warning: Conversion from Chinese numerals to an integer is not yet implemented.\n')
-  pass
+  if not any(char in chinese_small_units or char in chinese_large_units for char in number):
+    int_number = 0
+    for char in number:
+      int_number = int_number * 10 + chinese_digits[char]
+    return int_number
+  
+  total = 0
+  section = 0
+  digit = 0
+  for char in number:
+    if char in chinese_digits:
+      digit = chinese_digits[char]
+    elif char in chinese_small_units:
+      # A unit without a digit means one of that unit (ex: 十二 = 12)
+      section += (digit or 1) * chinese_small_units[char]
+      digit = 0
+    elif chinese_large_units[char] == 10000:
+      total += (section + digit) * 10000
+      section = 0
+      digit = 0
+    else:
+      total = (total + section + digit) * 100000000
+      section = 0
+      digit = 0
+  return total + section + digit
 
 
+geez_ones = ['', '፩', '፪', '፫', '፬', '፭', '፮', '፯', '፰', '፱']
+geez_tens = ['', '፲', '፳', '፴', '፵', '፶', '፷', '፸', '፹', '፺']
+geez_values = {**{numeral: i for i, numeral in enumerate(geez_ones) if numeral}, **{numeral: i * 10 for i, numeral in enumerate(geez_tens) if numeral}}
+
 # Convert a formatted number (Geʽez numerals) to an integer
+# ፻ multiplies the number before it by 100, and ፼ multiplies everything before it by 10,000 (ex: ፲፩፻፲፩ = 1111)
+# Adapted from geezify-python (see README.md)
 def geez_numerals_to_int(number):
-  return GeezArabify.arabify(number)
+  total = 0
+  group = 0
+  pair = 0
+  for i, char in enumerate(number):
+    if char == '፻':
+      group += (pair or 1) * 100
+      pair = 0
+    elif char == '፼':
+      group += pair
+      # ፼ at the start of a number means 10,000
+      total = (total + (group or (1 if i == 0 else 0))) * 10000
+      group = 0
+      pair = 0
+    else:
+      pair += geez_values[char]
+  return total + group + pair
 
 
 # Convert a formatted number (Roman numerals) to an integer
@@ -177,33 +269,80 @@ def alphabet_numerals_to_int(number):
   return recursive_letters_to_number(number)
 
 
-# Convert an integer to Chinese numerals
+# Convert an integer to Chinese numerals (ex: 10 –> 十, 105 –> 一百零五, 10001 –> 一万零一)
 def format_number_chinese(int_number, script = 'Hans'):
   int_number = int(int_number)
-  # TODO: Not yet implemented
-  sys.stdout.write('Warning: Conversion from an integer to Chinese numerals is not yet implemented.\n')
-  return str(int_number)
+  if int_number == 0:
+    return '零'
+  large_units = ('万', '亿') if script == 'Hans' else ('萬', '億')
+  
+  # Format a number below 10,000 (ex: 2030 –> 二千零三十)
+  def format_section(section, leading):
+    formatted_section = ''
+    pending_zero = False
+    for unit_value, unit in ((1000, '千'), (100, '百'), (10, '十'), (1, '')):
+      digit = section // unit_value % 10
+      if digit:
+        if pending_zero:
+          formatted_section += '零'
+          pending_zero = False
+        # 10–19 are written without 一 at the start of a number (ex: 十二)
+        if not (leading and unit_value == 10 and digit == 1 and not formatted_section):
+          formatted_section += '一二三四五六七八九'[digit - 1]
+        formatted_section += unit
+      elif formatted_section:
+        pending_zero = True
+    return formatted_section
+  
+  def format_recursive(n, leading):
+    for unit_value, unit in ((100000000, large_units[1]), (10000, large_units[0])):
+      if n >= unit_value:
+        high, low = divmod(n, unit_value)
+        formatted_number = format_recursive(high, leading) + unit
+        if low:
+          # Add 零 if there's a gap before the rest of the number (ex: 一万零一)
+          if low < unit_value // 10:
+            formatted_number += '零'
+          formatted_number += format_recursive(low, False)
+        return formatted_number
+    return format_section(n, leading)
+  
+  return format_recursive(int_number, True)
 
 
 # Convert an integer to fullwidth numerals
 def format_number_fullwidth(int_number, convert_one_digit = True, convert_two_digits = False, convert_more_than_two_digits = False):
   num_digits = len(str(int_number))
-  fullwidth_numerals = ['０', '１', '２',	'３',	'４',	'５',	'６',	'７',	'８',	'９']
-  
   if (num_digits == 1 and convert_one_digit) or (num_digits == 2 and convert_two_digits) or (num_digits > 2 and convert_more_than_two_digits):
-    formatted_number = ''
-    for digit in str(int_number):
-      formatted_number += fullwidth_numerals[int(digit)]
-  else:
-    formatted_number = str(int_number)
-  
-  return formatted_number
+    return str(int_number).translate(fullwidth_table)
+  return str(int_number)
+
+fullwidth_table = str.maketrans('0123456789', '０１２３４５６７８９')
 
 
 # Convert an integer to Geʽez numerals
+# Digits are written in pairs (ones and tens), joined by ፻ (hundred) and ፼ (ten thousand). A pair of ፩ before ፻ or ፼ is left out.
+# Adapted from geezify-python (see README.md)
 def format_number_geez(int_number):
   int_number = int(int_number)
-  return GeezGeezify.geezify(int_number)
+  pairs = []
+  while int_number:
+    int_number, pair = divmod(int_number, 100)
+    pairs.append(geez_tens[pair // 10] + geez_ones[pair % 10])
+  
+  formatted_number = ''
+  for i, pair in enumerate(pairs):
+    if i == 0:
+      formatted_number = pair
+    elif i % 2 == 0 and pair == '፩' and i == len(pairs) - 1:
+      formatted_number = '፼' + formatted_number
+    elif i % 2 == 0:
+      formatted_number = pair + '፼' + formatted_number
+    elif pair == '፩':
+      formatted_number = '፻' + formatted_number
+    elif pair:
+      formatted_number = pair + '፻' + formatted_number
+  return formatted_number
 
 
 # Convert an integer to Roman numerals
@@ -257,7 +396,7 @@ def format_number_alphabet(int_number, uppercase = True):
       return recursive_number_to_letters(n) + char
     else:
       return char
-
+  
   formatted_number = recursive_number_to_letters(int_number)
   
   if uppercase:
@@ -265,3 +404,28 @@ def format_number_alphabet(int_number, uppercase = True):
   
   return formatted_number
 
+
+# Built-in numeral systems
+register_numeral_system(NumeralSystem('decimal-string', str))
+register_numeral_system(DigitNumeralSystem('arabic-eastern', '٠١٢٣٤٥٦٧٨٩'))
+register_numeral_system(DigitNumeralSystem('arabic-extended', '۰۱۲۳۴۵۶۷۸۹'))
+register_numeral_system(DigitNumeralSystem('devangari', '०१२३४५६७८९'))
+register_numeral_system(DigitNumeralSystem('khmer', '០១២៣៤៥៦៧៨៩'))
+register_numeral_system(DigitNumeralSystem('myanmar', '၀၁၂၃၄၅၆၇၈၉'))
+register_numeral_system(DigitNumeralSystem('thai', '๐๑๒๓๔๕๖๗๘๙'))
+register_numeral_system(NumeralSystem('chinese-simplified', functools.partial(format_number_chinese, script = 'Hans'), chinese_numerals_to_int, list(chinese_digits) + list(chinese_small_units) + list(chinese_large_units)))
+register_numeral_system(NumeralSystem('chinese-traditional', functools.partial(format_number_chinese, script = 'Hant'), chinese_numerals_to_int, list(chinese_digits) + list(chinese_small_units) + list(chinese_large_units)))
+register_numeral_system(NumeralSystem('decimal-fullwidth', format_number_fullwidth))
+register_numeral_system(NumeralSystem('geez', format_number_geez, geez_numerals_to_int, list(geez_values) + ['፻', '፼']))
+register_numeral_system(NumeralSystem('roman-upper', functools.partial(format_number_roman, uppercase = True), roman_numerals_to_int, 'IVXLCDMivxlcdm'))
+register_numeral_system(NumeralSystem('roman-lower', functools.partial(format_number_roman, uppercase = False), roman_numerals_to_int, 'IVXLCDMivxlcdm'))
+register_numeral_system(NumeralSystem('alphabet-upper', functools.partial(format_number_alphabet, uppercase = True), alphabet_numerals_to_int, 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'))
+register_numeral_system(NumeralSystem('alphabet-lower', functools.partial(format_number_alphabet, uppercase = False), alphabet_numerals_to_int, 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'))
+
+# Numeral systems used to parse each advanced conversion type
+parsing_systems = {
+  'chinese': 'chinese-simplified',
+  'geez': 'geez',
+  'roman': 'roman-upper',
+  'alphabet': 'alphabet-upper',
+}
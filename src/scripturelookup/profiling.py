@@ -0,0 +1,162 @@
+# Opt-in profiling for parsing references and building labels, URLs, and content
+# Records call counts and time for each stage, cache hit rates, and the slowest inputs
+# When profiling isn't enabled, instrumented code only checks whether `profiler` is None
+# Example:
+#   with profiling.profile() as profiler:
+#     lookup.get_label('John 3:16; Alma 32:21')
+#   profiler.get_stats()
+
+# Python standard libraries
+import time
+import heapq
+import itertools
+import threading
+import contextlib
+
+
+# The active profiler, or None if profiling isn't enabled
+profiler = None
+
+# Maximum length of input strings in slow input samples
+max_sample_length = 200
+
+
+# Get functions with an lru_cache in the package, by name (i.e. "lookup.get_parser_tables")
+def get_cached_functions():
+  # Imported here, since those modules import this one
+  from . import lookup, numbers, citations
+  cached_functions = {}
+  for module in (lookup, numbers, citations):
+    module_name = module.__name__.rsplit('.', 1)[-1]
+    for name, value in vars(module).items():
+      if callable(getattr(value, 'cache_info', None)):
+        cached_functions[f'{module_name}.{name}'] = value
+  return cached_functions
+
+
+# Records stage times, cache hit rates, and slow inputs while it's the active profiler
+class Profiler:
+  def __init__(self, slow_input_count = 10):
+    self.slow_input_count = slow_input_count
+    # Stage –> [number of calls, total seconds]
+    self.stages = {}
+    # Heap of (seconds, order, input string, language), with the slowest inputs
+    self.slow_inputs = []
+    self.input_order = itertools.count()
+    self.started = time.perf_counter()
+    self.stopped = None
+    self.lock = threading.Lock()
+    self.cache_info_at_start = {name: function.cache_info() for name, function in get_cached_functions().items()}
+    self.cache_info_at_stop = None
+  
+  # Get the start time for a stage
+  def start(self):
+    return time.perf_counter()
+  
+  # Record a call to a stage that started at start_time, and return the current time (the start time for the next stage)
+  def mark(self, stage, start_time):
+    now = time.perf_counter()
+    with self.lock:
+      stage_stats = self.stages.get(stage)
+      if stage_stats is None:
+        stage_stats = self.stages[stage] = [0, 0.0]
+      stage_stats[0] += 1
+      stage_stats[1] += now - start_time
+    return now
+  
+  # Record parsing an input string that started at start_time, keeping it as a sample if it's one of the slowest
+  def mark_input(self, stage, input_string, lang, start_time):
+    seconds = self.mark(stage, start_time) - start_time
+    with self.lock:
+      sample = (seconds, next(self.input_order), input_string, lang)
+      if len(self.slow_inputs) < self.slow_input_count:
+        heapq.heappush(self.slow_inputs, sample)
+      elif self.slow_input_count and seconds > self.slow_inputs[0][0]:
+        heapq.heapreplace(self.slow_inputs, sample)
+  
+  # Stop recording cache hit rates (stages aren't recorded after the profiler is disabled)
+  def stop(self):
+    self.stopped = time.perf_counter()
+    self.cache_info_at_stop = {name: function.cache_info() for name, function in get_cached_functions().items()}
+  
+  # Get the recorded stats as a dictionary
+  def get_stats(self):
+    with self.lock:
+      stages = {stage: list(stage_stats) for stage, stage_stats in self.stages.items()}
+      slow_inputs = sorted(self.slow_inputs, reverse = True)
+    
+    stats = {
+      'elapsed_ms': round(((self.stopped or time.perf_counter()) - self.started) * 1000, 3),
+      'stages': {},
+      'caches': {},
+      'slow_inputs': [],
+    }
+    for stage, (calls, seconds) in sorted(stages.items(), key = lambda item: -item[1][1]):
+      stats['stages'][stage] = {
+        'calls': calls,
+        'total_ms': round(seconds * 1000, 3),
+        'mean_us': round(seconds / calls * 1000000, 3),
+      }
+    
+    cache_info_now = self.cache_info_at_stop or {name: function.cache_info() for name, function in get_cached_functions().items()}
+    for name, cache_info in cache_info_now.items():
+      start_info = self.cache_info_at_start.get(name)
+      # Caches are replaced when metadata is reloaded, so they can have fewer hits and misses than at the start
+      if start_info and (start_info.hits > cache_info.hits or start_info.misses > cache_info.misses):
+        start_info = None
+      hits = cache_info.hits - (start_info.hits if start_info else 0)
+      misses = cache_info.misses - (start_info.misses if start_info else 0)
+      if hits or misses:
+        stats['caches'][name] = {
+          'hits': hits,
+          'misses': misses,
+          'hit_rate': round(hits / (hits + misses), 4),
+          'size': cache_info.currsize,
+        }
+    
+    for seconds, order, input_string, lang in slow_inputs:
+      stats['slow_inputs'].append({
+        'input': input_string if len(input_string) <= max_sample_length else input_string[:max_sample_length] + '…',
+        'lang': lang,
+        'ms': round(seconds * 1000, 3),
+      })
+    return stats
+
+
+# Call a function as a stage, timing it if profiling is enabled. Example: profiling.timed('label', lambda: [ref.label() for ref in references])
+def timed(stage, function):
+  active_profiler = profiler
+  if active_profiler is None:
+    return function()
+  start_time = active_profiler.start()
+  result = function()
+  active_profiler.mark(stage, start_time)
+  return result
+
+
+# Start profiling (replacing the active profiler, if there is one), and return the new profiler
+def enable(slow_input_count = 10):
+  global profiler
+  profiler = Profiler(slow_input_count = slow_input_count)
+  return profiler
+
+# Stop profiling, and return the profiler that was active (or None)
+def disable():
+  global profiler
+  stopped_profiler = profiler
+  profiler = None
+  if stopped_profiler:
+    stopped_profiler.stop()
+  return stopped_profiler
+
+# Profile the code in a `with` block. The previous profiler (if any) is restored afterwards.
+@contextlib.contextmanager
+def profile(slow_input_count = 10):
+  global profiler
+  previous_profiler = profiler
+  active_profiler = enable(slow_input_count = slow_input_count)
+  try:
+    yield active_profiler
+  finally:
+    profiler = previous_profiler
+    active_profiler.stop()
@@ -0,0 +1,286 @@
+# HTTP server for looking up scripture references
+# Metadata and lookup tables are loaded once when the server starts, and kept in memory between requests
+# Usage: scripturelookup serve [--host 127.0.0.1] [--port 8000] [--lang en]
+
+# Python standard libraries
+import sys
+import json
+import time
+import threading
+import collections
+import urllib.parse
+import http.server
+
+# Internal imports
+from . import lookup, engine, profiling
+
+
+# Commands that can be called over HTTP (see README.md for more information)
+commands = (
+  'get_content',
+  'get_label',
+  'get_church_uri',
+  'get_church_url',
+  'get_church_link',
+  'get_reference_objects',
+  'get_reference_attributes',
+  'get_langs',
+  'get_punctuation',
+  'get_numerals',
+)
+# Commands that don't take an input
+commands_without_input = lookup.commands_without_input
+
+# Options that can be passed to commands, and their types
+option_types = {
+  'lang': str,
+  'separator': str,
+  'sort_by': str,
+  'merge': bool,
+  'source': str,
+  'link_class': str,
+  'link_target': str,
+  'use_query_parameters': bool,
+  'skip_lang': bool,
+  'skip_fragment': bool,
+  'skip_book_name': bool,
+  'abbreviated': bool,
+}
+
+# Limits for request bodies and batches
+max_body_size = 16 * 1024 * 1024
+max_batch_size = 10000
+
+
+# Error with an HTTP status code, returned to the client as {"error": message}
+class RequestError(Exception):
+  def __init__(self, status, message):
+    super().__init__(message)
+    self.status = status
+
+
+# Recent request latencies for each endpoint, for reporting percentiles
+class LatencyStats:
+  def __init__(self, max_samples = 10000):
+    self.max_samples = max_samples
+    self.samples = {}
+    self.counts = collections.Counter()
+    self.started = time.time()
+    self.lock = threading.Lock()
+  
+  def record(self, endpoint, seconds):
+    with self.lock:
+      if endpoint not in self.samples:
+        self.samples[endpoint] = collections.deque(maxlen = self.max_samples)
+      self.samples[endpoint].append(seconds)
+      self.counts[endpoint] += 1
+  
+  # Get the number of requests and latency percentiles (in milliseconds) for each endpoint, over the most recent max_samples requests
+  def summary(self):
+    with self.lock:
+      samples = {endpoint: sorted(endpoint_samples) for endpoint, endpoint_samples in self.samples.items()}
+      counts = dict(self.counts)
+    endpoints = {}
+    for endpoint, endpoint_samples in sorted(samples.items()):
+      endpoints[endpoint] = {'count': counts[endpoint]}
+      for percentile in (50, 90, 99):
+        endpoints[endpoint][f'p{percentile}_ms'] = round(get_percentile(endpoint_samples, percentile) * 1000, 3)
+      endpoints[endpoint]['max_ms'] = round(endpoint_samples[-1] * 1000, 3)
+    return {'uptime_seconds': round(time.time() - self.started, 1), 'endpoints': endpoints}
+
+
+# Get a percentile (0–100) of sorted values, using the nearest rank
+def get_percentile(sorted_values, percentile):
+  if not sorted_values:
+    return 0
+  return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * percentile / 100))]
+
+
+# Convert an option value to the option's type (query parameters are always strings)
+def get_option_value(name, value):
+  if name not in option_types:
+    raise RequestError(400, f'Unknown option: {name}')
+  if option_types[name] is bool:
+    if isinstance(value, str):
+      return value.lower() in ('1', 'true', 'yes', 'on')
+    return bool(value)
+  if value is not None and not isinstance(value, str):
+    raise RequestError(400, f'Option “{name}” must be a string')
+  return value
+
+
+# Get options for a command, from request parameters (other than "command", "input", and "inputs")
+def get_options(parameters, default_lang = 'en'):
+  options = {'lang': default_lang}
+  for name, value in parameters.items():
+    if name not in ('command', 'input', 'inputs'):
+      options[name] = get_option_value(name, value)
+  return options
+
+
+# Run a command with an engine, returning its result
+def run_command(lookup_engine, command_name, input_string, options):
+  if command_name not in commands:
+    raise RequestError(404, f'Unknown command: {command_name}')
+  command = getattr(lookup_engine, command_name)
+  if command_name in commands_without_input:
+    return command(**options)
+  if not isinstance(input_string, str):
+    raise RequestError(400, '“input” must be a string')
+  return command(input_string, **options)
+
+
+# Run a command on each input in a batch. Inputs can be strings, or objects with "input" and options for that input.
+# Returns a result for each input, in input order, as {"result": result} or {"error": message}
+def run_batch(lookup_engine, command_name, inputs, options):
+  if not isinstance(inputs, list):
+    raise RequestError(400, '“inputs” must be a list')
+  if len(inputs) > max_batch_size:
+    raise RequestError(413, f'Batches can have up to {max_batch_size} inputs')
+  if command_name not in commands:
+    raise RequestError(404, f'Unknown command: {command_name}')
+  
+  results = []
+  for item in inputs:
+    try:
+      if isinstance(item, dict):
+        item_options = dict(options)
+        item_options.update(get_options(item, default_lang = options['lang']))
+        results.append({'result': run_command(lookup_engine, command_name, item.get('input'), item_options)})
+      else:
+        results.append({'result': run_command(lookup_engine, command_name, item, options)})
+    except Exception as e:
+      results.append({'error': str(e)})
+  return results
+
+
+# Handler for requests. Endpoints:
+#   GET /{command}?input=…&lang=…    Run a command (options are query parameters)
+#   POST /{command}                  Run a command, with a JSON body: {"input": …, "lang": …}
+#   POST /batch                      Run a command on many inputs: {"command": …, "inputs": […], "lang": …}
+#   POST /reload                     Reload metadata if it changed on the server, without restarting: {"force": false}
+#   GET /stats                       Number of requests and latency percentiles for each endpoint (and profiling stats, if enabled)
+#   GET /health                      {"status": "ok"}
+class RequestHandler(http.server.BaseHTTPRequestHandler):
+  server_version = 'scripturelookup'
+  # Keep connections open between requests, and send responses right away (headers and body are written separately)
+  protocol_version = 'HTTP/1.1'
+  disable_nagle_algorithm = True
+  
+  def do_GET(self):
+    url = urllib.parse.urlsplit(self.path)
+    endpoint = url.path.strip('/')
+    parameters = dict(urllib.parse.parse_qsl(url.query, keep_blank_values = True))
+    self.handle_endpoint(endpoint, lambda: self.get_response(endpoint, parameters, is_post = False))
+  
+  def do_POST(self):
+    endpoint = urllib.parse.urlsplit(self.path).path.strip('/')
+    self.handle_endpoint(endpoint, lambda: self.get_response(endpoint, self.read_json(), is_post = True))
+  
+  # Get the response for an endpoint, as (status, JSON value)
+  def get_response(self, endpoint, parameters, is_post):
+    if endpoint in ('', 'health'):
+      return 200, {'status': 'ok'}
+    elif endpoint == 'stats':
+      stats = self.server.stats.summary()
+      # Stage times, cache hit rates, and slow inputs, if the server was started with profiling enabled
+      if profiling.profiler:
+        stats['profile'] = profiling.profiler.get_stats()
+      return 200, stats
+    elif endpoint == 'reload':
+      if not is_post:
+        raise RequestError(405, 'Use POST to reload metadata')
+      # The current metadata is kept if the new metadata can't be downloaded or isn't valid
+      try:
+        return 200, {'changed': self.server.engine.reload_metadata(force = bool(parameters.get('force')))}
+      except (OSError, ValueError) as e:
+        raise RequestError(502, str(e))
+    elif endpoint == 'batch':
+      if not is_post:
+        raise RequestError(405, 'Use POST for batches')
+      options = get_options(parameters, default_lang = self.server.default_lang)
+      return 200, {'results': run_batch(self.server.engine, parameters.get('command'), parameters.get('inputs'), options)}
+    else:
+      options = get_options(parameters, default_lang = self.server.default_lang)
+      try:
+        return 200, {'result': run_command(self.server.engine, endpoint, parameters.get('input'), options)}
+      except RequestError:
+        raise
+      except Exception as e:
+        raise RequestError(400, str(e))
+  
+  # Run an endpoint, send the response, and record how long it took
+  def handle_endpoint(self, endpoint, get_response):
+    start_time = time.perf_counter()
+    try:
+      status, value = get_response()
+      value = lookup.get_json_result(value)
+    except RequestError as e:
+      status, value = e.status, {'error': str(e)}
+    except Exception as e:
+      status, value = 500, {'error': str(e)}
+    body = json.dumps(value, ensure_ascii = False).encode('utf-8')
+    self.send_response(status)
+    self.send_header('Content-Type', 'application/json; charset=utf-8')
+    self.send_header('Content-Length', str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+    # Stats are recorded for known endpoints only, so requests for unknown paths can't grow them
+    if endpoint in commands or endpoint in ('batch', 'reload', 'stats', 'health', ''):
+      self.server.stats.record(endpoint or 'health', time.perf_counter() - start_time)
+  
+  # Read a JSON object from the request body
+  def read_json(self):
+    try:
+      length = int(self.headers.get('Content-Length') or 0)
+    except ValueError:
+      self.close_connection = True
+      raise RequestError(400, 'Invalid Content-Length')
+    if length > max_body_size:
+      # The body isn't read, so the connection can't be used for another request
+      self.close_connection = True
+      raise RequestError(413, f'Request bodies can be up to {max_body_size} bytes')
+    body = self.rfile.read(length) if length else b'{}'
+    try:
+      value = json.loads(body)
+    except ValueError as e:
+      raise RequestError(400, f'Invalid JSON: {e}')
+    if not isinstance(value, dict):
+      raise RequestError(400, 'Request body must be a JSON object')
+    return value
+  
+  def log_message(self, format, *args):
+    if not self.server.quiet:
+      super().log_message(format, *args)
+
+
+# HTTP server that handles each connection in its own thread, with one engine shared by every thread
+class ScriptureLookupServer(http.server.ThreadingHTTPServer):
+  daemon_threads = True
+  
+  def __init__(self, address, lookup_engine, quiet = False):
+    super().__init__(address, RequestHandler)
+    self.engine = lookup_engine
+    self.default_lang = lookup_engine.lang
+    self.quiet = quiet
+    self.stats = LatencyStats()
+
+
+# Make a server (use port 0 to pick any free port), with lookup tables built for the given languages, so the first requests don't have to
+def make_server(host = '127.0.0.1', port = 8000, default_lang = 'en', warm_langs = None, quiet = False):
+  lookup_engine = engine.Engine(lang = default_lang, warm_langs = warm_langs)
+  return ScriptureLookupServer((host, port), lookup_engine, quiet = quiet)
+
+
+# Run a server until it's interrupted
+def serve(host = '127.0.0.1', port = 8000, default_lang = 'en', warm_langs = None, quiet = False):
+  server = make_server(host = host, port = port, default_lang = default_lang, warm_langs = warm_langs, quiet = quiet)
+  host, port = server.server_address[:2]
+  sys.stdout.write(f'Serving on http://{host}:{port}\n')
+  sys.stdout.flush()
+  try:
+    server.serve_forever()
+  except KeyboardInterrupt:
+    pass
+  finally:
+    server.server_close()
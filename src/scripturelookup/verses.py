@@ -0,0 +1,165 @@
+# Python standard libraries
+import re
+import bisect
+
+
+# Merge verse ranges that overlap or are next to each other, and sort them
+# Example: [(5, 7), (1, 2), (3, 3), (6, 9)] –> ((1, 3), (5, 9))
+def merge_ranges(verse_ranges):
+  merged_ranges = []
+  for start, end in sorted(verse_ranges):
+    if merged_ranges and start <= merged_ranges[-1][1] + 1:
+      if end > merged_ranges[-1][1]:
+        merged_ranges[-1] = (merged_ranges[-1][0], end)
+    else:
+      merged_ranges.append((start, end))
+  return tuple(merged_ranges)
+
+
+# Sortable value for a verse that might be a string (such as '7a')
+def get_verse_sort_value(verse):
+  if isinstance(verse, int):
+    return (0, verse, '')
+  return (1, 0, str(verse))
+
+
+# Whole verse number at the start of a verse that might be a string (such as 7 for '7a'), or None if it doesn't start with one
+def get_verse_number(verse):
+  if isinstance(verse, int):
+    return verse
+  match = re.match(r'\d+', str(verse))
+  return int(match.group()) if match else None
+
+
+# Set of verses in a chapter, stored as sorted, non-overlapping ranges (start, end) – individual verses are never listed out
+# Verses that aren't whole numbers (such as '7a') are kept separately, and only match themselves
+class VerseRangeSet:
+  __slots__ = ('ranges', 'other_verses', 'starts')
+  
+  def __init__(self, verse_ranges = ()):
+    int_ranges = []
+    other_verses = set()
+    for start, end in verse_ranges:
+      if isinstance(start, int) and isinstance(end, int):
+        if start <= end:
+          int_ranges.append((start, end))
+      else:
+        # Mixed ranges (such as 7–9a) keep whole-number verses as a range (7–8) and the partial verses by themselves ('9a')
+        # (or just the whole-number endpoint if the other endpoint isn't numbered, such as 'fac-1')
+        start_number = get_verse_number(start)
+        end_number = get_verse_number(end)
+        for verse in (start, end):
+          if isinstance(verse, int):
+            int_ranges.append((verse, verse))
+          else:
+            other_verses.add(verse)
+        if start_number is not None and end_number is not None:
+          if not isinstance(start, int):
+            start_number += 1
+          if not isinstance(end, int):
+            end_number -= 1
+          if start_number <= end_number:
+            int_ranges.append((start_number, end_number))
+    self.ranges = merge_ranges(int_ranges)
+    self.other_verses = frozenset(other_verses)
+    self.starts = [start for start, end in self.ranges]
+  
+  # Create a set from ranges that are already merged and sorted
+  @classmethod
+  def from_merged_ranges(cls, merged_ranges, other_verses = frozenset()):
+    verse_range_set = cls.__new__(cls)
+    verse_range_set.ranges = tuple(merged_ranges)
+    verse_range_set.other_verses = frozenset(other_verses)
+    verse_range_set.starts = [start for start, end in verse_range_set.ranges]
+    return verse_range_set
+  
+  # Get the verses as a tuple of ranges (whole-number ranges first, then other verses)
+  def to_ranges(self):
+    return self.ranges + tuple((verse, verse) for verse in sorted(self.other_verses, key = get_verse_sort_value))
+  
+  def union(self, other):
+    return VerseRangeSet.from_merged_ranges(merge_ranges(self.ranges + other.ranges), self.other_verses | other.other_verses)
+  
+  def intersection(self, other):
+    intersected_ranges = []
+    i = j = 0
+    while i < len(self.ranges) and j < len(other.ranges):
+      start = max(self.ranges[i][0], other.ranges[j][0])
+      end = min(self.ranges[i][1], other.ranges[j][1])
+      if start <= end:
+        intersected_ranges.append((start, end))
+      if self.ranges[i][1] < other.ranges[j][1]:
+        i += 1
+      else:
+        j += 1
+    return VerseRangeSet.from_merged_ranges(intersected_ranges, self.other_verses & other.other_verses)
+  
+  def difference(self, other):
+    remaining_ranges = []
+    j = 0
+    for start, end in self.ranges:
+      # Skip ranges in other that end before this range starts
+      while j < len(other.ranges) and other.ranges[j][1] < start:
+        j += 1
+      k = j
+      while k < len(other.ranges) and other.ranges[k][0] <= end:
+        if other.ranges[k][0] > start:
+          remaining_ranges.append((start, other.ranges[k][0] - 1))
+        start = max(start, other.ranges[k][1] + 1)
+        k += 1
+      if start <= end:
+        remaining_ranges.append((start, end))
+    return VerseRangeSet.from_merged_ranges(remaining_ranges, self.other_verses - other.other_verses)
+  
+  # Whether every verse in other is also in this set
+  def issuperset(self, other):
+    if not other.other_verses <= self.other_verses:
+      return False
+    for start, end in other.ranges:
+      i = bisect.bisect_right(self.starts, start) - 1
+      if i < 0 or self.ranges[i][1] < end:
+        return False
+    return True
+  
+  # Whether any verse is in both sets
+  def overlaps(self, other):
+    if self.other_verses & other.other_verses:
+      return True
+    i = j = 0
+    while i < len(self.ranges) and j < len(other.ranges):
+      if self.ranges[i][0] <= other.ranges[j][1] and other.ranges[j][0] <= self.ranges[i][1]:
+        return True
+      if self.ranges[i][1] < other.ranges[j][1]:
+        i += 1
+      else:
+        j += 1
+    return False
+  
+  # Whether a single verse is in the set
+  def __contains__(self, verse):
+    if not isinstance(verse, int):
+      return verse in self.other_verses
+    i = bisect.bisect_right(self.starts, verse) - 1
+    return i >= 0 and self.ranges[i][1] >= verse
+  
+  # Number of verses in the set
+  def __len__(self):
+    return sum([end - start + 1 for start, end in self.ranges]) + len(self.other_verses)
+  
+  def __bool__(self):
+    return bool(self.ranges or self.other_verses)
+  
+  def __eq__(self, other):
+    if not isinstance(other, VerseRangeSet):
+      return NotImplemented
+    return self.ranges == other.ranges and self.other_verses == other.other_verses
+  
+  def __hash__(self):
+    return hash((self.ranges, self.other_verses))
+  
+  def __repr__(self):
+    return f'VerseRangeSet({self.to_ranges()!r})'
+  
+  __or__ = union
+  __and__ = intersection
+  __sub__ = difference
@@ -0,0 +1,108 @@
+# Python standard libraries
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+import http.server
+
+# Third-party libraries
+import pytest
+
+# Internal imports
+from scripturelookup import data
+
+
+# Handler for stub servers (see start_stub_server), which records each request and sends the response from the server's respond function
+class StubHandler(http.server.BaseHTTPRequestHandler):
+  def do_GET(self):
+    self.server.requests.append((self.path, self.headers))
+    status, headers, body = self.server.respond(self)
+    self.send_response(status)
+    for name, value in headers.items():
+      self.send_header(name, value)
+    if status != 304:
+      self.send_header('Content-Length', str(len(body)))
+    self.end_headers()
+    if status != 304:
+      self.wfile.write(body)
+  
+  def log_message(self, format, *args):
+    pass
+
+
+# Start stub HTTP servers on localhost (on any free port), which are stopped after the test
+# Usage: server = start_stub_server(respond), where respond(request) returns (status, headers, body bytes) for a request
+# handler (with path, headers, and server). Each server has its URL (url) and the requests it received ((path, headers), in requests).
+@pytest.fixture
+def start_stub_server():
+  servers = []
+  def start(respond):
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.daemon_threads = True
+    server.respond = respond
+    server.requests = []
+    server.url = f'http://127.0.0.1:{server.server_address[1]}'
+    threading.Thread(target = server.serve_forever, daemon = True).start()
+    servers.append(server)
+    return server
+  yield start
+  for server in servers:
+    server.shutdown()
+    server.server_close()
+
+
+# Metadata server, which serves a copy of the metadata from a temporary data directory with an ETag for each version
+# (server.files is filename –> bytes). The current metadata is restored after the test.
+@pytest.fixture
+def metadata_server(tmp_path, start_stub_server, monkeypatch):
+  def respond(request):
+    body = server.files[request.path.rsplit('/', 1)[-1]]
+    etag = '"' + hashlib.md5(body).hexdigest() + '"'
+    if request.headers.get('If-None-Match') == etag:
+      return 304, {'ETag': etag}, b''
+    return 200, {'ETag': etag}, body
+  server = start_stub_server(respond)
+  server.files = {}
+  data.load_metadata()
+  original_metadata = data.metadata
+  for filename in data.metadata_filenames:
+    shutil.copy(os.path.join(data.data_directory, filename), tmp_path)
+    with open(os.path.join(tmp_path, filename), 'rb') as f:
+      server.files[filename] = f.read()
+  monkeypatch.setattr(data, 'data_directory', str(tmp_path))
+  monkeypatch.setattr(data, 'scraper_base_url', server.url)
+  monkeypatch.setattr(data, 'chapter_cache', None)
+  yield server
+  with data.metadata_lock:
+    data.set_metadata(original_metadata)
+
+
+# Serves chapter JSON in the python-scripture-scraper format, with two verses for each chapter
+# Set server.failing to respond with 404s, or server.delays (chapter name, such as 'moses-1' –> seconds) to respond slowly
+@pytest.fixture
+def chapter_server(start_stub_server, monkeypatch):
+  def respond(request):
+    chapter_name = request.path.rsplit('/', 1)[-1][:-len('.json')] if request.path.endswith('.json') else None
+    if not chapter_name or server.failing:
+      return 404, {}, b''
+    time.sleep(server.delays.get(chapter_name, 0))
+    return 200, {}, json.dumps({
+      'paragraphs': [
+        {'type': 'title', 'number': None, 'content': f'Chapter {chapter_name}'},
+        {'type': 'verse', 'number': '1', 'content': f'First verse of {chapter_name}.'},
+        {'type': 'verse', 'number': '2', 'content': f'Second verse of {chapter_name}.'},
+      ],
+    }).encode('utf-8')
+  server = start_stub_server(respond)
+  server.failing = False
+  server.delays = {}
+  data.load_metadata()
+  monkeypatch.setattr(data, 'scraper_base_url', server.url)
+  monkeypatch.setattr(data, 'content_cache', None)
+  monkeypatch.setattr(data, 'chapter_cache', None)
+  monkeypatch.setattr(data, 'content_bundle_path', data.content_bundle_path)
+  monkeypatch.setattr(data, 'content_bundle', None, raising = False)
+  yield server
+  data.set_content_bundle(None)
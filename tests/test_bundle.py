@@ -0,0 +1,48 @@
+# Python standard libraries
+import json
+import sqlite3
+
+# Third-party libraries
+import pytest
+
+# Internal imports
+from scripturelookup import bundle, data
+
+
+# A bundle built from downloaded chapters is read back without requesting them again
+def test_update_content_builds_bundle(tmp_path, chapter_server):
+  path = str(tmp_path / 'bundle.sqlite')
+  data.configure_content_bundle(path = path)
+  assert data.content_bundle is None
+  
+  assert data.update_content(publications = ['pearl-of-great-price']) == 19
+  assert len(chapter_server.requests) == 19
+  assert data.content_bundle.path == path
+  assert data.content_bundle.count() == 19
+  
+  chapter_server.failing = True
+  text, requested = data.fetch_content(('python-scripture-scraper', 'en', 'pearl-of-great-price', 'moses', 1), 'unused')
+  assert (json.loads(text)['paragraphs'][1]['content'], requested) == ('First verse of moses-1.', False)
+  content = data.request_content('pearl-of-great-price', 'moses', 1, [(2, 2)], None)
+  assert content.startswith('2 Second verse of moses-1.\n\n')
+  assert len(chapter_server.requests) == 19
+
+
+# Updating the configured bundle replaces it with the updated bundle, and closes the old connection
+def test_update_content_replaces_configured_bundle(tmp_path, chapter_server):
+  path = str(tmp_path / 'bundle.sqlite')
+  bundle.ContentBundle(path).close()
+  data.configure_content_bundle(path = path)
+  configured_bundle = data.content_bundle
+  
+  data.update_content(publications = ['pearl-of-great-price'])
+  assert data.content_bundle is configured_bundle
+  
+  other_path = str(tmp_path / 'other.sqlite')
+  data.update_content(publications = ['pearl-of-great-price'], path = other_path)
+  assert data.content_bundle is configured_bundle
+  
+  data.configure_content_bundle(path = other_path)
+  with pytest.raises(sqlite3.ProgrammingError):
+    configured_bundle.count()
+  assert data.content_bundle.count() == 19
@@ -0,0 +1,150 @@
+# Python standard libraries
+import os
+import json
+import time
+
+# Third-party libraries
+import pytest
+
+# Internal imports
+from scripturelookup import cache
+
+
+# Serves a body for each path, with an ETag (the server's version) and Last-Modified, answering revalidation with 304 if the version didn't change
+@pytest.fixture
+def stub_server(start_stub_server):
+  def respond(request):
+    if request.path == '/missing':
+      return 404, {}, b''
+    etag = f'"{server.version}"'
+    if request.headers.get('If-None-Match') == etag:
+      return 304, {'ETag': etag}, b''
+    return 200, {'ETag': etag, 'Last-Modified': 'Wed, 21 Oct 2015 07:28:00 GMT'}, f'{request.path} version {server.version}'.encode('utf-8')
+  server = start_stub_server(respond)
+  server.version = 1
+  return server
+
+
+# Make a cache entry look like it was fetched `seconds` ago
+def age_entry(content_cache, key, seconds):
+  metadata_path = content_cache.path(key) + '.json'
+  with open(metadata_path, 'r', encoding='utf-8') as f:
+    metadata = json.load(f)
+  metadata['fetched'] -= seconds
+  with open(metadata_path, 'w', encoding='utf-8') as f:
+    json.dump(metadata, f)
+
+
+def test_fetch_uses_cached_body_within_ttl(tmp_path, stub_server):
+  content_cache = cache.ContentCache(str(tmp_path), ttl = 60)
+  assert content_cache.fetch(('a',), stub_server.url + '/a') == (b'/a version 1', True)
+  assert content_cache.fetch(('a',), stub_server.url + '/a') == (b'/a version 1', False)
+  assert len(stub_server.requests) == 1
+
+
+# Expired entries are revalidated with their ETag and Last-Modified, and a 304 marks the entry as fetched again
+def test_fetch_revalidates_expired_entry(tmp_path, stub_server):
+  content_cache = cache.ContentCache(str(tmp_path), ttl = 60)
+  content_cache.fetch(('a',), stub_server.url + '/a')
+  age_entry(content_cache, ('a',), 120)
+  
+  assert content_cache.fetch(('a',), stub_server.url + '/a') == (b'/a version 1', True)
+  path, headers = stub_server.requests[-1]
+  assert (path, headers['If-None-Match'], headers['If-Modified-Since']) == ('/a', '"1"', 'Wed, 21 Oct 2015 07:28:00 GMT')
+  assert time.time() - content_cache.get(('a',))['fetched'] < 60
+  
+  # The entry is fresh again, so it's used without a request
+  assert content_cache.fetch(('a',), stub_server.url + '/a') == (b'/a version 1', False)
+  assert len(stub_server.requests) == 2
+
+
+def test_fetch_replaces_expired_entry_that_changed(tmp_path, stub_server):
+  content_cache = cache.ContentCache(str(tmp_path), ttl = 60)
+  content_cache.fetch(('a',), stub_server.url + '/a')
+  age_entry(content_cache, ('a',), 120)
+  stub_server.version = 2
+  
+  assert content_cache.fetch(('a',), stub_server.url + '/a') == (b'/a version 2', True)
+  assert content_cache.get(('a',))['etag'] == '"2"'
+
+
+def test_fetch_failure_isnt_cached(tmp_path, stub_server):
+  content_cache = cache.ContentCache(str(tmp_path))
+  assert content_cache.fetch(('missing',), stub_server.url + '/missing') == (None, True)
+  assert content_cache.get(('missing',)) is None
+  assert content_cache.fetch(('missing',), stub_server.url + '/missing') == (None, True)
+  assert len(stub_server.requests) == 2
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+  content_cache = cache.ContentCache(str(tmp_path), max_size = 25)
+  content_cache.set(('a',), 'url', b'a' * 10)
+  content_cache.set(('b',), 'url', b'b' * 10)
+  os.utime(content_cache.path(('a',)) + '.body', (100, 100))
+  os.utime(content_cache.path(('b',)) + '.body', (200, 200))
+  content_cache.set(('c',), 'url', b'c' * 10)
+  
+  assert content_cache.get(('a',)) is None
+  assert content_cache.get(('b',))['body'] == b'b' * 10
+  assert content_cache.get(('c',))['body'] == b'c' * 10
+  assert content_cache.size == 20
+
+
+# The directory is only scanned the first time and when the cache is over max_size, not every time an entry is added
+def test_evict_only_scans_when_over_max_size(tmp_path, monkeypatch):
+  content_cache = cache.ContentCache(str(tmp_path), max_size = 100)
+  evict_calls = []
+  original_evict = content_cache.evict
+  monkeypatch.setattr(content_cache, 'evict', lambda: evict_calls.append(1) or original_evict())
+  
+  for i in range(5):
+    content_cache.set((i,), 'url', b'x' * 10)
+  assert len(evict_calls) == 1
+  
+  # Replacing an entry counts the change in size, not the whole new body
+  content_cache.set((0,), 'url', b'x' * 20)
+  assert content_cache.size == 60
+  assert len(evict_calls) == 1
+  
+  content_cache.set((5,), 'url', b'x' * 50)
+  assert len(evict_calls) == 2
+  assert content_cache.size <= 100
+
+
+def test_clear_ignores_files_removed_by_others(tmp_path, monkeypatch):
+  content_cache = cache.ContentCache(str(tmp_path))
+  content_cache.set(('a',), 'url', b'a')
+  original_listdir = os.listdir
+  monkeypatch.setattr(cache.os, 'listdir', lambda path: original_listdir(path) + ['removed.body'])
+  
+  content_cache.clear()
+  assert original_listdir(str(tmp_path)) == []
+  assert content_cache.size == 0
+
+
+# Chunks are read from the server as they're used, and the entry is only added after the last one is read
+def test_fetch_chunks_adds_entry_after_last_chunk(tmp_path, stub_server):
+  content_cache = cache.ContentCache(str(tmp_path))
+  chunks, requested = content_cache.fetch_chunks(('a',), stub_server.url + '/a', chunk_size = 4)
+  assert requested
+  assert next(chunks) == b'/a v'
+  assert content_cache.get(('a',)) is None
+  assert b''.join(chunks) == b'ersion 1'
+  assert content_cache.get(('a',))['body'] == b'/a version 1'
+  
+  assert content_cache.fetch_chunks(('a',), stub_server.url + '/a') == ([b'/a version 1'], False)
+  assert content_cache.fetch_chunks(('missing',), stub_server.url + '/missing') == (None, True)
+
+
+# Content is still returned when the cache directory can't be written to, but it isn't cached
+def test_fetch_without_writable_directory(tmp_path, stub_server):
+  (tmp_path / 'file').write_bytes(b'')
+  content_cache = cache.ContentCache(str(tmp_path / 'file' / 'cache'))
+  assert content_cache.set(('a',), 'url', b'a') is False
+  assert content_cache.fetch(('a',), stub_server.url + '/a') == (b'/a version 1', True)
+  assert content_cache.fetch(('a',), stub_server.url + '/a') == (b'/a version 1', True)
+  assert content_cache.get(('a',)) is None
+  content_cache.touch(('a',), validated = True)
+  content_cache.evict()
+  content_cache.clear()
+  assert os.listdir(str(tmp_path)) == ['file']
@@ -0,0 +1,67 @@
+# Python standard libraries
+import os
+
+# Third-party libraries
+import pytest
+
+# Internal imports
+from scripturelookup import cache, chapters, data
+
+
+fixture_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks', 'fixtures', 'alma-32.html')
+
+
+# Serves the saved Alma 32 page from ChurchofJesusChrist.org
+@pytest.fixture
+def page_server(start_stub_server, monkeypatch):
+  with open(fixture_path, 'rb') as f:
+    page = f.read()
+  server = start_stub_server(lambda request: (200, {'Content-Type': 'text/html; charset=utf-8'}, page))
+  server.url += '/study/scriptures/bofm/alma/32'
+  monkeypatch.setattr(data, 'content_cache', None)
+  monkeypatch.setattr(data, 'chapter_cache', None)
+  monkeypatch.setattr(data, 'content_bundle', None, raising = False)
+  return server
+
+
+# Record the chunks that pages are parsed from
+@pytest.fixture
+def parsed_chunks(monkeypatch):
+  parsed_chunks = []
+  parse_church_chapter = chapters.parse_church_chapter
+  def record_chunks(chunks):
+    for chunk in chunks:
+      parsed_chunks.append(chunk)
+      yield chunk
+  monkeypatch.setattr(chapters, 'parse_church_chapter', lambda chunks: parse_church_chapter(record_chunks(chunks)))
+  return parsed_chunks
+
+
+def get_alma_32(url):
+  return data.get_chapter(('ChurchofJesusChrist.org', 'en', 'book-of-mormon', 'alma', 32), url, source = 'ChurchofJesusChrist.org')
+
+
+# Pages are parsed a chunk at a time as they're downloaded, the same as the whole page
+def test_church_chapter_is_parsed_as_its_downloaded(page_server, parsed_chunks):
+  with open(fixture_path, 'r', encoding='utf-8') as f:
+    expected_chapter = chapters.parse_chapter(f.read(), source = 'ChurchofJesusChrist.org')
+  parsed_chunks.clear()
+  
+  chapter = get_alma_32(page_server.url)
+  assert len(parsed_chunks) > 1
+  assert all(isinstance(chunk, bytes) and len(chunk) <= 16384 for chunk in parsed_chunks)
+  assert chapter.paragraphs == expected_chapter.paragraphs
+  assert chapter.verse_positions == expected_chapter.verse_positions
+  assert list(chapter.iter_paragraphs(((21, 21),)))[0].startswith('21 ')
+
+
+# Pages that are parsed as they're downloaded are added to the content cache, and read from the cache the next time
+def test_streamed_church_chapter_is_cached(tmp_path, page_server, parsed_chunks, monkeypatch):
+  monkeypatch.setattr(data, 'content_cache', cache.ContentCache(str(tmp_path)))
+  chapter = get_alma_32(page_server.url)
+  assert len(parsed_chunks) > 1
+  
+  parsed_chunks.clear()
+  assert get_alma_32(page_server.url).paragraphs == chapter.paragraphs
+  assert len(parsed_chunks) == 1
+  assert len(page_server.requests) == 1
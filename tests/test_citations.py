@@ -0,0 +1,134 @@
+# Python standard libraries
+import math
+import random
+
+# Internal imports
+from scripturelookup import citations, lookup
+
+
+def alma_32(*verse_ranges):
+  return lookup.Reference(publication_slug = 'book-of-mormon', book_slug = 'alma', chapter = 32, verse_ranges = verse_ranges)
+
+
+# Get every node in a treap, in order
+def iter_nodes(node):
+  if node:
+    yield from iter_nodes(node.left)
+    yield node
+    yield from iter_nodes(node.right)
+
+
+# Check that a treap is ordered by key and by priority, and that each node has the largest end in its subtree, and return its height
+def check_treap(node):
+  if node is None:
+    return 0
+  for child in (node.left, node.right):
+    if child:
+      assert child.priority <= node.priority
+  if node.left:
+    assert max(child.key for child in iter_nodes(node.left)) <= node.key
+  if node.right:
+    assert min(child.key for child in iter_nodes(node.right)) >= node.key
+  assert node.max_end == max(child.key[1] for child in iter_nodes(node))
+  return 1 + max(check_treap(node.left), check_treap(node.right))
+
+
+def test_add_query_and_remove():
+  index = citations.CitationIndex(lang = 'en')
+  assert index.add('talk-1', 'Alma 32:21; John 3:16') == 2
+  assert index.add('talk-2', 'Alma 32:27-28') == 1
+  assert index.add('lesson-1', 'Alma 33') == 1
+  assert index.add('lesson-2', 'Alma') == 1
+  check_treap(index.root)
+  
+  assert index.query('Alma 32:21-43') == ['lesson-2', 'talk-1', 'talk-2']
+  assert index.query('Alma 32:22-26') == ['lesson-2']
+  assert index.query('Alma 33:5') == ['lesson-2', 'lesson-1']
+  assert index.query('John 3') == ['talk-1']
+  assert index.query('Genesis 1') == []
+  assert [document_id for document_id, reference in index.query_citations('Alma 32')] == ['lesson-2', 'talk-1', 'talk-2']
+  
+  assert index.remove('talk-1', 'John 3:16') == 1
+  assert index.query('John 3:16') == []
+  assert index.query('Alma 32:21') == ['lesson-2', 'talk-1']
+  assert index.remove('talk-2') == 1
+  assert index.remove('talk-2') == 0
+  assert index.query('Alma 32:27') == ['lesson-2']
+  assert len(index) == 3
+  assert set(index.documents) == {'talk-1', 'lesson-1', 'lesson-2'}
+  check_treap(index.root)
+
+
+def test_references_that_cant_be_indexed_are_skipped(capsys):
+  index = citations.CitationIndex(lang = 'en')
+  assert index.add('talk-1', [lookup.Reference(publication_slug = 'book-of-mormon', book_slug = 'alma', chapter = 99)]) == 0
+  assert capsys.readouterr().out.startswith('Warning: Couldn’t index')
+  assert len(index) == 0
+
+
+# Verses like '7a' are indexed as the verse they're part of, and verses past max_position are clamped, so one citation can
+# have the same interval more than once. Each copy is added and removed, and the citation is found once.
+def test_duplicate_intervals():
+  index = citations.CitationIndex(lang = 'en')
+  index.add('talk-1', [alma_32((7, 7), ('7a', '7a')), alma_32((1000, 1000), (1001, 1001))])
+  index.add('talk-2', [alma_32((7, 7))])
+  keys = [node.key for node in iter_nodes(index.root)]
+  assert len(keys) == 5
+  assert len(set(keys)) == 3
+  check_treap(index.root)
+  
+  assert index.query_citations([alma_32((7, 7))]) == [('talk-1', alma_32((7, 7), ('7a', '7a'))), ('talk-2', alma_32((7, 7)))]
+  assert index.query([alma_32((999, 999))]) == ['talk-1']
+  
+  assert index.remove('talk-1') == 2
+  assert [node.key[2] for node in iter_nodes(index.root)] == [3]
+  assert index.query([alma_32((7, 7))]) == ['talk-2']
+  assert index.remove('talk-2') == 1
+  assert index.root is None
+
+
+def test_save_and_load(tmp_path):
+  index = citations.CitationIndex(lang = 'en')
+  index.add('talk-1', 'Alma 32:21, 21a; John 3:16')
+  index.add(2, 'Alma 32:27-28')
+  index.add('lesson-1', 'Alma 33')
+  index.remove('lesson-1')
+  path = str(tmp_path / 'citations.json')
+  index.save(path)
+  
+  loaded_index = citations.CitationIndex.load(path)
+  assert loaded_index.lang == 'en'
+  assert len(loaded_index) == 3
+  assert sorted(loaded_index.citations.values(), key = repr) == sorted(index.citations.values(), key = repr)
+  assert loaded_index.query('Alma 32') == ['talk-1', 2]
+  assert loaded_index.query('Alma 32:21') == ['talk-1']
+  assert loaded_index.query('Alma 33') == []
+  check_treap(loaded_index.root)
+  
+  # Citations can be added to and removed from a loaded index
+  loaded_index.add('lesson-2', 'Alma 32:27')
+  assert loaded_index.query('Alma 32:27') == ['lesson-2', 2]
+  assert loaded_index.remove(2) == 1
+  assert loaded_index.query('Alma 32:27') == ['lesson-2']
+  check_treap(loaded_index.root)
+
+
+# Sorted keys are built into a treap that's as short as possible, and that stays valid as nodes are inserted and deleted
+def test_build_nodes_is_balanced():
+  randomizer = random.Random(1)
+  keys = sorted((start, start + randomizer.randrange(50), i) for i, start in enumerate(randomizer.randrange(1000) for i in range(1000)))
+  root = citations.build_nodes(keys)
+  assert check_treap(root) == math.ceil(math.log2(len(keys) + 1))
+  assert [node.key for node in iter_nodes(root)] == keys
+  assert citations.build_nodes([]) is None
+  
+  for key in keys[::3]:
+    root = citations.delete_node(root, key)
+  for i in range(300):
+    start = randomizer.randrange(1000)
+    keys.append((start, start + randomizer.randrange(50), 1000 + i))
+    root = citations.insert_node(root, keys[-1], randomizer.random())
+  remaining_keys = sorted(set(keys) - set(keys[:1000][::3]))
+  check_treap(root)
+  assert [node.key for node in iter_nodes(root)] == remaining_keys
+  assert list(citations.find_overlapping(root, 400, 450)) == [key for key in remaining_keys if key[0] <= 450 and key[1] >= 400]
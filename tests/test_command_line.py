@@ -0,0 +1,71 @@
+# Python standard libraries
+import io
+import sys
+import json
+
+# Third-party libraries
+import pytest
+
+# Internal imports
+from scripturelookup import lookup, command_line
+
+
+inputs = ['john 3:16', '', 'not a reference line', 'alma 32:21']
+
+
+# Run the command line with arguments, returning (stdout, stderr)
+def run_cli(capsys, monkeypatch, *args, stdin = ''):
+  monkeypatch.setattr(sys, 'argv', ['scripturelookup', *args])
+  monkeypatch.setattr(sys, 'stdin', io.StringIO(stdin))
+  command_line.main_cli()
+  captured = capsys.readouterr()
+  return captured.out, captured.err
+
+
+# get_label, except that it raises for the line "not a reference line"
+@pytest.fixture
+def failing_get_label(monkeypatch):
+  get_label = lookup.get_label
+  def failing(input_string, **kwargs):
+    if input_string == 'not a reference line':
+      raise ValueError('Couldn’t parse the input')
+    return get_label(input_string, **kwargs)
+  monkeypatch.setattr(lookup, 'get_label', failing)
+
+
+# Each input line gets a result (blank lines are skipped), and errors are written to stderr without stopping
+@pytest.mark.parametrize('source', ['stdin', 'file'])
+def test_run_lines(source, failing_get_label, capsys, monkeypatch, tmp_path):
+  if source == 'stdin':
+    out, err = run_cli(capsys, monkeypatch, 'get_label', '-', stdin = '\n'.join(inputs) + '\n')
+  else:
+    (tmp_path / 'inputs.txt').write_text('\r\n'.join(inputs), encoding = 'utf-8')
+    out, err = run_cli(capsys, monkeypatch, 'get_label', '--input-file', str(tmp_path / 'inputs.txt'))
+  assert out == 'John\xa03:16\nAlma\xa032:21\n'
+  assert err == 'Error: Couldn’t process line 3 (“not a reference line”): Couldn’t parse the input\n'
+
+
+# With --jsonl, stdout only has JSON lines, with errors in the line for their input
+def test_run_lines_jsonl(failing_get_label, capsys, monkeypatch):
+  out, err = run_cli(capsys, monkeypatch, 'get_label', '-', '--jsonl', stdin = '\n'.join(inputs))
+  assert [json.loads(line) for line in out.splitlines()] == [
+    {'line': 1, 'input': 'john 3:16', 'result': 'John\xa03:16'},
+    {'line': 3, 'input': 'not a reference line', 'error': 'Couldn’t parse the input'},
+    {'line': 4, 'input': 'alma 32:21', 'result': 'Alma\xa032:21'},
+  ]
+  assert err == ''
+
+
+# Results that aren't strings are converted to JSON types, instead of their string representations
+def test_json_results(capsys, monkeypatch):
+  out, err = run_cli(capsys, monkeypatch, 'get_reference_objects', '-', '--jsonl', stdin = 'john 3:16\n')
+  assert json.loads(out) == {'line': 1, 'input': 'john 3:16', 'result': [lookup.parse_references_string('john 3:16')[0].attributes()]}
+  
+  out, err = run_cli(capsys, monkeypatch, 'get_reference_objects', 'alma 32:21', '--jsonl')
+  assert json.loads(out)['result'][0]['book_slug'] == 'alma'
+  
+  out, err = run_cli(capsys, monkeypatch, 'get_langs')
+  assert 'en' in json.loads(out) and 'fr' in json.loads(out)
+  
+  with pytest.raises(TypeError):
+    lookup.get_json_result(object())
@@ -0,0 +1,42 @@
+# Internal imports
+from scripturelookup import data, chapters
+
+
+def make_content_request(book_slug, chapter, verse_ranges):
+  return {'publication_slug': 'pearl-of-great-price', 'book_slug': book_slug, 'chapter': chapter, 'verse_ranges': verse_ranges, 'church_url': None}
+
+
+def get_requested_paths(chapter_server):
+  return sorted(path.rsplit('/', 1)[-1] for path, headers in chapter_server.requests)
+
+
+# Content is yielded in request order, even when a later chapter is ready first, and each chapter is fetched once
+def test_iter_contents_keeps_order_and_fetches_chapters_once(chapter_server, monkeypatch):
+  monkeypatch.setattr(data, 'chapter_cache', chapters.ChapterCache())
+  chapter_server.delays['moses-1'] = 0.3
+  content_requests = [
+    make_content_request('moses', 1, [(1, 1)]),
+    make_content_request('moses', 2, [(2, 2)]),
+    make_content_request('moses', 1, [(2, 2)]),
+    make_content_request('abraham', 1, [(1, 2)]),
+    make_content_request('moses', 2, [(1, 1)]),
+  ]
+  contents = list(data.iter_contents(iter(content_requests), workers = 2))
+  assert [content.split('\n\n')[0] for content in contents] == [
+    '1 First verse of moses-1.',
+    '2 Second verse of moses-2.',
+    '2 Second verse of moses-1.',
+    '1 First verse of abraham-1.',
+    '1 First verse of moses-2.',
+  ]
+  assert get_requested_paths(chapter_server) == ['abraham-1.json', 'moses-1.json', 'moses-2.json']
+  assert data.request_contents(content_requests[:2], workers = 1) == contents[:2]
+
+
+# Without the chapter cache, requests for a chapter that's already being fetched still share it
+def test_iter_contents_shares_chapters_being_fetched(chapter_server):
+  chapter_server.delays['moses-1'] = 0.2
+  content_requests = [make_content_request('moses', 1, [(1, 1)]), make_content_request('moses', 1, [(2, 2)]), make_content_request('moses', 2, [(1, 2)])]
+  contents = data.request_contents(content_requests, workers = 2)
+  assert [content.split('\n\n')[0] for content in contents] == ['1 First verse of moses-1.', '2 Second verse of moses-1.', '1 First verse of moses-2.']
+  assert get_requested_paths(chapter_server) == ['moses-1.json', 'moses-2.json']
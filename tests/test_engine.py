@@ -0,0 +1,86 @@
+# Python standard libraries
+import json
+import threading
+
+# Third-party libraries
+import pytest
+
+# Internal imports
+from scripturelookup import data, engine
+
+
+# Inputs in several languages, including lettered verses (which are sorted with each thread's ICU collator)
+inputs = (
+  ('Alma 32:21, 27–28', 'en'),
+  ('John 3:16; Genesis 1:1–3', 'en'),
+  ('D&C 20:6-8, 7a', 'en'),
+  ('Genesis 1:1-3, 2a', 'en'),
+  ('1 Nephi 3:7; Moroni 10:3–5 (1)', 'en'),
+  ('Jean 3:16; Alma 32:21', 'fr'),
+  ('Jean 3:16; Juan 3:16; 約翰福音 3:16', 'auto'),
+  ('Psalm 119:1-3, 105', 'en'),
+)
+
+
+# Get the label and URL for every input, from each of `thread_count` threads at once (each starting at a different input)
+def run_threads(lookup_engine, thread_count, rounds, work = None):
+  results = [[] for thread_number in range(thread_count)]
+  errors = []
+  barrier = threading.Barrier(thread_count)
+  def run_thread(thread_number):
+    barrier.wait()
+    try:
+      for i in range(rounds * len(inputs)):
+        input_string, lang = inputs[(thread_number + i) % len(inputs)]
+        results[thread_number].append((input_string, lang, lookup_engine.get_label(input_string, lang = lang), lookup_engine.get_church_url(input_string, lang = lang)))
+        if work:
+          work(thread_number, i)
+    except Exception as e:
+      errors.append(e)
+  threads = [threading.Thread(target = run_thread, args = (thread_number,)) for thread_number in range(thread_count)]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+  assert errors == []
+  return results
+
+
+def test_engine_threads_match_single_thread():
+  lookup_engine = engine.Engine(lang = 'en', warm_langs = ('en', 'fr', 'auto'))
+  expected = {(input_string, lang): (lookup_engine.get_label(input_string, lang = lang), lookup_engine.get_church_url(input_string, lang = lang)) for input_string, lang in inputs}
+  
+  for thread_results in run_threads(lookup_engine, 8, 20):
+    assert len(thread_results) == 20 * len(inputs)
+    for input_string, lang, label, url in thread_results:
+      assert (label, url) == expected[input_string, lang]
+
+
+# Serve metadata with a different English name for Alma
+def rename_alma(server, name):
+  scriptures = json.loads(server.files['metadata-scriptures.min.json'])
+  scriptures['languages']['en']['translatedNames']['alma']['name'] = name
+  server.files['metadata-scriptures.min.json'] = json.dumps(scriptures, ensure_ascii=False).encode('utf-8')
+
+
+# Lookups in progress while metadata is reloaded use either version of the metadata, never a mix of the two
+def test_reload_metadata_during_lookups(metadata_server):
+  lookup_engine = engine.Engine(lang = 'en', warm_langs = ('en', 'fr', 'auto'))
+  expected = {(input_string, lang): (lookup_engine.get_label(input_string, lang = lang), lookup_engine.get_church_url(input_string, lang = lang)) for input_string, lang in inputs}
+  assert lookup_engine.reload_metadata() is False
+  
+  reloads = []
+  def reload_metadata(thread_number, i):
+    if thread_number == 0 and i % 10 == 0:
+      rename_alma(metadata_server, 'Almah' if len(reloads) % 2 == 0 else 'Alma')
+      reloads.append(lookup_engine.reload_metadata())
+  for thread_results in run_threads(lookup_engine, 4, 10, reload_metadata):
+    for input_string, lang, label, url in thread_results:
+      expected_label, expected_url = expected[input_string, lang]
+      assert url == expected_url
+      assert label in (expected_label, expected_label.replace('Alma', 'Almah'))
+  assert reloads == [True] * 8
+  
+  rename_alma(metadata_server, 'Almah')
+  assert lookup_engine.reload_metadata() is True
+  assert lookup_engine.get_label('Alma 32:21') == 'Almah\xa032:21'
@@ -0,0 +1,234 @@
+# Python standard libraries
+import io
+import pickle
+import multiprocessing
+import warnings
+
+# Third-party libraries
+import pytest
+
+# Internal imports
+from scripturelookup import lookup
+
+
+# Keys that normalize to the same value are recorded as ambiguous, and lookups use the first key's slug and warn about the others once
+def test_normalized_slug_index_reports_ambiguous_names(capsys):
+  index = lookup.NormalizedSlugIndex({'Jn': 'john', 'jn.': 'jonah', 'J. N.': 'jonah', 'JN': 'john', 'Alma': 'alma', 'Ps': 'psalm', 'PS.': 'psalms'})
+  assert index.ambiguous == {'jn': ['john', 'jonah']}
+  
+  with pytest.warns(UserWarning, match = '“jn” could refer to any of john, jonah – using “john”.'):
+    assert index.get('jn') == 'john'
+  with warnings.catch_warnings():
+    warnings.simplefilter('error')
+    assert index.get('JN') == 'john'
+    # Slugs that the parser replaces with the same book aren't ambiguous
+    assert index.get('ps') == 'psalm'
+    assert index.get('ALMA') == 'alma'
+    assert index.get('Moroni') is None
+  assert capsys.readouterr().out == ''
+
+
+def test_convert_verse_groups_to_ranges_splits_verses_that_arent_consecutive():
+  assert lookup.convert_verse_groups_to_ranges([[1, 3, 5]]) == ((1, 1), (3, 3), (5, 5))
+  assert lookup.convert_verse_groups_to_ranges([[1, 2], [5, 6, 7, 9], ['9a']]) == ((1, 2), (5, 7), (9, 9), ('9a', '9a'))
+  assert lookup.convert_verse_groups_to_ranges([[6, 7], ['7a'], [8]]) == ((6, 7), ('7a', '7a'), (8, 8))
+  assert lookup.convert_verse_groups_to_ranges([[2, '4b'], []]) == ((2, '4b'),)
+  assert lookup.convert_verse_groups_to_ranges(None) == ()
+
+
+# Verse ranges and verse groups convert to each other without changing the verses
+def test_reference_verse_ranges_round_trip():
+  verse_ranges = ((1, 2), (5, 7), ('9a', '9a'), (10, 'fac-1'))
+  reference = lookup.Reference(publication_slug = 'old-testament', book_slug = 'genesis', chapter = 1, verse_ranges = verse_ranges)
+  assert reference.verse_ranges == verse_ranges
+  assert reference.verse_groups == [[1, 2], [5, 6, 7], ['9a'], [10, 'fac-1']]
+  
+  from_groups = lookup.Reference(publication_slug = 'old-testament', book_slug = 'genesis', chapter = 1, verse_groups = reference.verse_groups)
+  assert from_groups.verse_ranges == verse_ranges
+  assert from_groups == reference
+  assert hash(from_groups) == hash(reference)
+  
+  reference = lookup.Reference(publication_slug = 'old-testament', book_slug = 'genesis', chapter = 1, verse_groups = [[1, 3, 5]], context_verse_groups = [[1, 2, 3, 4, 5]])
+  assert reference.verse_ranges == ((1, 1), (3, 3), (5, 5))
+  assert reference.context_verse_ranges == ((1, 5),)
+  assert reference.verse_groups == [[1], [3], [5]]
+
+
+# References use slots and can't be changed, so they can be shared between threads and used as dictionary keys
+def test_reference_is_slotted_and_immutable():
+  reference = lookup.Reference(publication_slug = 'old-testament', book_slug = 'genesis', chapter = 1, verse_ranges = [(1, 2)])
+  assert not hasattr(reference, '__dict__')
+  assert reference.verse_ranges == ((1, 2),)
+  with pytest.raises(AttributeError):
+    reference.chapter = 2
+  with pytest.raises(AttributeError):
+    del reference.verse_ranges
+  with pytest.raises(AttributeError):
+    reference.note = 'note'
+  
+  copy = pickle.loads(pickle.dumps(reference))
+  assert copy == reference
+  assert {reference: 'value'}[copy] == 'value'
+  assert copy != lookup.Reference(publication_slug = 'old-testament', book_slug = 'genesis', chapter = 1, verse_ranges = [(1, 3)])
+
+
+# Get (text, label) for the references found in text
+def find_labels(text, lang = 'en'):
+  return [(text[start:end], reference.label()) for start, end, reference in lookup.find_references(text, lang = lang)]
+
+
+def test_find_references_in_text():
+  text = 'Read John 3:16, 18; 4:1 and then 1 Nephi 3:7, 2 Nephi 2:25.'
+  assert [(start, end) for start, end, reference in lookup.find_references(text)] == [(5, 18), (20, 23), (33, 44), (46, 58)]
+  assert find_labels(text) == [
+    ('John 3:16, 18', 'John\xa03:16, 18'),
+    ('4:1', 'John\xa04:1'),
+    ('1 Nephi 3:7', '1\xa0Nephi\xa03:7'),
+    ('2 Nephi 2:25', '2\xa0Nephi\xa02:25'),
+  ]
+  assert find_labels('Jean 3:16 et John 3:17', lang = 'fr') == [('Jean 3:16', 'Jean 3:16'), ('John 3:17', 'Jean 3:17')]
+  assert find_labels('請讀約翰福音3:16和阿爾瑪書32:21。', lang = 'cmn-Hant') == [('約翰福音3:16', '約翰福音3：16'), ('阿爾瑪書32:21', '阿爾瑪書32：21')]
+  assert find_labels('No references here, only John and Alma.') == []
+
+
+# Names that overlap (such as "John" in "2 John", or "Ephesians" in "JST, Ephesians") are found as the name that starts first
+def test_find_references_prefers_earliest_overlapping_name():
+  assert find_labels('JST, Ephesians 4:21 and 2 John 1:3') == [('JST, Ephesians 4:21', 'JST, Ephesians\xa04:21'), ('2 John 1:3', '2\xa0John\xa01:3')]
+  assert find_labels('Song of Solomon 2:1, Doctrine and Covenants 20:6-8 (1-10)') == [
+    ('Song of Solomon 2:1', 'Song of Solomon\xa02:1'),
+    ('Doctrine and Covenants 20:6-8 (1-10)', 'Doctrine and Covenants\xa020:6–8 (1–10)'),
+  ]
+
+
+# Names must be whole words, and short names must be capitalized
+def test_find_references_word_boundaries():
+  assert find_labels('Johnny 3:16 and Almanac 5:1 and SuperJohn 3:16') == []
+  assert find_labels('Ex 3:1 but not ex 3:1, Job 1:1 but not job 1:1') == [('Ex 3:1', 'Exodus\xa03:1'), ('Job 1:1', 'Job\xa01:1')]
+
+
+# References that cross chunks are found the same way as in one string
+def test_find_references_in_chunks():
+  assert [(start, end, reference.label()) for start, end, reference in lookup.find_references(iter(['Read Jo', 'hn 3:', '16 and Al', 'ma 32:21.']))] == [(5, 14, 'John\xa03:16'), (19, 29, 'Alma\xa032:21')]
+  text = 'x ' * 40000 + 'John 3:16 ' + 'y' * 70000 + ' Alma 32:21'
+  found = [(start, end, reference.label()) for start, end, reference in lookup.find_references(io.StringIO(text), chunk_size = 1000)]
+  assert found == [(80000, 80009, 'John\xa03:16'), (150011, 150021, 'Alma\xa032:21')]
+
+
+def test_detect_lang():
+  assert lookup.detect_lang('Jean 3:16') == 'fr'
+  assert lookup.detect_lang('От Иоанна 3:16') == 'ru'
+  assert lookup.detect_lang('요한복음 3:16') == 'ko'
+  # Names used by several languages go to the default language, if it uses the name
+  assert lookup.detect_lang('Alma 32:21') == 'en'
+  assert lookup.detect_lang('Alma 32:21', default = 'fr') == 'fr'
+  assert lookup.detect_lang('3:16', default = 'de') == 'de'
+  # Names inside a longer name don't count
+  assert lookup.get_language_detector().get_segment_scores('雅歌 2:1')[1] == [{'yue-Hant': 2, 'ja': 2, 'cmn-Hant': 2, 'cmn-Hans': 2}]
+
+
+# Each reference in mixed-language (and mixed-script) input is parsed in its own language
+def test_language_detector_splits_mixed_input():
+  input_string = 'John 3:16; 요한복음 3:16; 1 Нефий 3:7; 4:1; Juan 3:16; 約翰福音 3:16; Alma 32:21'
+  assert lookup.get_language_detector().split(input_string) == [
+    ('en', 'John 3:16;'),
+    ('ko', ' 요한복음 3:16;'),
+    ('ru', ' 1 Нефий 3:7; 4:1;'),
+    ('es', ' Juan 3:16;'),
+    ('cmn-Hant', ' 約翰福音 3:16;'),
+    ('en', ' Alma 32:21'),
+  ]
+  references = lookup.parse_references_string(input_string, lang = 'auto')
+  assert [(reference.lang, reference.book_slug, reference.chapter) for reference in references] == [
+    ('en', 'john', 3),
+    ('ko', 'john', 3),
+    ('ru', '1-nephi', 3),
+    ('ru', '1-nephi', 4),
+    ('es', 'john', 3),
+    ('cmn-Hant', 'john', 3),
+    ('en', 'alma', 32),
+  ]
+
+
+# Results are in input order, and inputs that can't be parsed give the exception instead of raising it
+@pytest.mark.parametrize('workers', [None, 1, 3])
+def test_parse_many_keeps_order_and_returns_exceptions(workers):
+  input_strings = ['john 3:16', None, 'alma 32:21', 'gen 1', 42] * 5
+  results = list(lookup.parse_many(iter(input_strings), workers = workers, chunksize = 2))
+  assert len(results) == len(input_strings)
+  for input_string, result in zip(input_strings, results):
+    if isinstance(input_string, str):
+      assert result == lookup.parse_references_string(input_string)
+    else:
+      assert isinstance(result, AttributeError)
+
+
+# Workers that don't inherit the parent process (spawn) build the parser tables when they start
+def test_parse_many_with_spawned_workers(monkeypatch):
+  monkeypatch.setattr(multiprocessing, 'Pool', multiprocessing.get_context('spawn').Pool)
+  results = list(lookup.parse_many(['Jean 3:16', None], lang = 'fr', workers = 2))
+  assert [reference.label() for reference in results[0]] == ['Jean 3:16']
+  assert isinstance(results[1], AttributeError)
+
+
+# lang = 'auto' detects the language of each input, in one process or several
+@pytest.mark.parametrize('workers', [None, 2])
+def test_parse_many_detects_lang(workers, capsys):
+  results = list(lookup.parse_many(['Jean 3:16', '요한복음 3:16; Alma 32:21'], lang = 'auto', workers = workers))
+  assert [[(reference.lang, reference.label()) for reference in references] for references in results] == [
+    [('fr', 'Jean 3:16')],
+    [('ko', '요한복음 3:16'), ('en', 'Alma\xa032:21')],
+  ]
+  assert capsys.readouterr().out == ''
+
+
+# lang = 'auto' scans each part of the text in its detected language, with offsets in the whole text
+def test_find_references_detects_lang():
+  text = 'Lisez Jean 3:16. 요한복음 3:16; Read John 3:17.'
+  found = [(text[start:end], reference.lang, reference.label()) for start, end, reference in lookup.find_references(text, lang = 'auto')]
+  assert found == [('Jean 3:16', 'fr', 'Jean 3:16'), ('요한복음 3:16', 'ko', '요한복음 3:16'), ('John 3:17', 'en', 'John\xa03:17')]
+  assert [text[start:end] for start, end, reference in lookup.find_references(io.StringIO(text), lang = 'auto', chunk_size = 4)] == [text for text, lang, label in found]
+
+
+# sort_key gives the same order as sort_references, by book order or alphabetically by label in the references' language
+@pytest.mark.parametrize('lang, sort_by, expected_labels', [
+  ('en', 'traditional', ['Genesis 1:1', 'John 2', 'John 3:5', 'John 3:16', '1 Nephi 3:7', 'Alma 32', 'Alma 32:21', 'Ether 12:27', 'Doctrine and Covenants 4:2', 'Moses 1:39']),
+  ('en', 'label', ['1 Nephi 3:7', 'Alma 32', 'Alma 32:21', 'Ether 12:27', 'Genesis 1:1', 'John 2', 'John 3:5', 'John 3:16', 'Moses 1:39', 'Doctrine and Covenants 4:2']),
+  ('fr', 'traditional', ['Genèse 1:1', 'Jean 2', 'Jean 3:5', 'Jean 3:16', '1 Néphi 3:7', 'Alma 32', 'Alma 32:21', 'Éther 12:27', 'Doctrine et Alliances 4:2', 'Moïse 1:39']),
+  ('fr', 'label', ['1 Néphi 3:7', 'Alma 32', 'Alma 32:21', 'Éther 12:27', 'Genèse 1:1', 'Jean 2', 'Jean 3:5', 'Jean 3:16', 'Moïse 1:39', 'Doctrine et Alliances 4:2']),
+])
+def test_sort_key_matches_sort_references(lang, sort_by, expected_labels):
+  input_string = 'Alma 32:21; John 3:16; Genesis 1:1; 1 Nephi 3:7; D&C 4:2; John 3:5; Moses 1:39; John 2; Ether 12:27; Alma 32'
+  references = lookup.parse_references_string(input_string, lang = lang)
+  sorted_references = sorted(references, key = lambda reference: reference.sort_key(sort_by = sort_by, lang = lang))
+  assert [reference.label().replace('\xa0', ' ') for reference in sorted_references] == expected_labels
+  assert lookup.sort_references(references, lang = lang, sort_by = sort_by) == sorted_references
+  assert lookup.parse_references_string(input_string, lang = lang, sort_by = sort_by) == sorted_references
+  with pytest.raises(ValueError):
+    references[0].sort_key(sort_by = 'name')
+
+
+# Church URIs and URLs parse to one reference (not the publication and book named in the URI), which gives back the same URI
+@pytest.mark.parametrize('input_string, uri', [
+  ('/scriptures/nt/john/3.16', '/scriptures/nt/john/3.16'),
+  ('/scriptures/nt/john/3.16-18,20', '/scriptures/nt/john/3.16-18,20'),
+  ('/scriptures/nt/john/3?id=p16-p18#p16', '/scriptures/nt/john/3.16-18'),
+  ('https://www.churchofjesuschrist.org/study/scriptures/nt/john/3?lang=eng&id=p16#p16', '/scriptures/nt/john/3.16'),
+  ('/scriptures/bofm/alma/32', '/scriptures/bofm/alma/32'),
+  ('/scriptures/pgp/abr/fac-1', '/scriptures/pgp/abr/fac-1'),
+  ('/scriptures/nt', '/scriptures/nt'),
+])
+def test_church_uri_round_trip(input_string, uri):
+  references = lookup.parse_references_string(input_string)
+  assert [reference.church_uri() for reference in references] == [uri]
+  assert lookup.parse_references_string(references[0].church_url()) == references
+
+
+# Every book and chapter URI gives back the same URI (including books that the parser gives another slug, like JST Psalms)
+def test_every_chapter_uri_round_trips():
+  scripture_index = lookup.get_scripture_index()
+  for book_slug, chapters in scripture_index.chapters_by_book.items():
+    book_uri = scripture_index.book_church_uris[book_slug]
+    if not book_uri:
+      continue
+    for uri in [book_uri] + [f'{book_uri}/{chapter}' for chapter in chapters]:
+      assert [reference.church_uri() for reference in lookup.parse_references_string(uri)] == [uri]
@@ -0,0 +1,81 @@
+# Python standard libraries
+import threading
+
+# Internal imports
+from scripturelookup import network
+
+
+# Clock for network.time, which only moves forward when the test advances it, and records how long each sleep was
+class FakeClock:
+  def __init__(self):
+    self.now = 0.0
+    self.sleeps = []
+  
+  def monotonic(self):
+    return self.now
+  
+  def sleep(self, seconds):
+    self.sleeps.append(seconds)
+
+
+# Up to `burst` requests are allowed at once, then requests waiting at the same time are spaced out by 1/rate seconds each
+def test_rate_limiter_token_bucket(monkeypatch):
+  clock = FakeClock()
+  monkeypatch.setattr(network, 'time', clock)
+  rate_limiter = network.RateLimiter(2, burst = 3)
+  for i in range(5):
+    rate_limiter.acquire()
+  assert clock.sleeps == [0.5, 1.0]
+  
+  # Tokens are added back over time, up to the burst size
+  clock.now += 2.5
+  clock.sleeps.clear()
+  for i in range(4):
+    rate_limiter.acquire()
+  assert clock.sleeps == [0.5]
+  
+  clock.now += 0.25
+  rate_limiter.acquire()
+  assert clock.sleeps == [0.5, 0.75]
+
+
+# Each rate-limited host has one limiter, which is shared by every request to that host
+def test_rate_limiters_are_shared_per_host(monkeypatch):
+  monkeypatch.setattr(network, 'rate_limits', {'www.churchofjesuschrist.org': 1})
+  monkeypatch.setattr(network, 'rate_limiters', {})
+  rate_limiter = network.get_rate_limiter('www.churchofjesuschrist.org')
+  assert rate_limiter.rate == 1
+  assert network.get_rate_limiter('www.churchofjesuschrist.org') is rate_limiter
+  assert network.get_rate_limiter('127.0.0.1') is None
+  
+  network.set_rate_limit('127.0.0.1', 10, burst = 5)
+  assert (network.get_rate_limiter('127.0.0.1').rate, network.get_rate_limiter('127.0.0.1').burst) == (10, 5)
+  network.set_rate_limit('127.0.0.1', None)
+  assert network.get_rate_limiter('127.0.0.1') is None
+
+
+# Requests from every thread use the same session (and its connection pool), and wait for the host's rate limiter
+def test_requests_share_session(start_stub_server, monkeypatch):
+  server = start_stub_server(lambda request: (200, {}, request.path.encode('utf-8')))
+  monkeypatch.setattr(network, 'session', None)
+  monkeypatch.setattr(network, 'rate_limiters', {})
+  clock = FakeClock()
+  monkeypatch.setattr(network, 'time', clock)
+  network.set_rate_limit('127.0.0.1', 4)
+  
+  sessions = []
+  responses = []
+  def make_request(i):
+    sessions.append(network.get_session())
+    responses.append(network.get(f'{server.url}/{i}').text)
+  threads = [threading.Thread(target = make_request, args = (i,)) for i in range(4)]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+  network.set_rate_limit('127.0.0.1', None)
+  
+  assert len(sessions) == 4 and all(session is sessions[0] for session in sessions)
+  assert network.get_session() is sessions[0]
+  assert sorted(responses) == ['/0', '/1', '/2', '/3']
+  assert sorted(clock.sleeps) == [0.25, 0.5, 0.75]
@@ -0,0 +1,42 @@
+# Third-party libraries
+import pytest
+
+# Internal imports
+from scripturelookup import numbers
+
+
+# Every number up to 10000 parses back to itself, including numbers past the cached ones (1–cached_number_limit)
+@pytest.mark.parametrize('target_format', ['chinese-simplified', 'chinese-traditional', 'geez'])
+def test_numeral_system_round_trip(target_format):
+  numeral_system = numbers.numeral_systems[target_format]
+  for int_number in range(1, 10001):
+    formatted_number = numeral_system.format(int_number)
+    assert numeral_system.format_function(int_number) == formatted_number
+    assert numeral_system.can_parse(formatted_number)
+    assert numeral_system.parse(formatted_number) == int_number
+    assert numeral_system.parse_function(formatted_number) == int_number
+    assert numbers.convert_number_to_int(formatted_number) == int_number
+
+
+def test_chinese_numerals():
+  for formatted_number, int_number in [('十', 10), ('十一', 11), ('二十', 20), ('一百零一', 101), ('一百一十', 110), ('一千零五', 1005), ('一万', 10000)]:
+    assert numbers.get_formatted_number(int_number, target_format = 'chinese-simplified') == formatted_number
+    assert numbers.convert_number_to_int(formatted_number) == int_number
+  assert numbers.convert_number_to_int('一百零一', advanced_conversion_types = []) == '一百零一'
+
+
+def test_geez_numerals():
+  for formatted_number, int_number in [('፩', 1), ('፲', 10), ('፲፬', 14), ('፻', 100), ('፻፩', 101), ('፼', 10000)]:
+    assert numbers.get_formatted_number(int_number, target_lang = 'am') == formatted_number
+    assert numbers.convert_number_to_int(formatted_number) == int_number
+
+
+# Numbers are formatted through the registered numeral systems, or custom digits
+def test_format_many():
+  assert numbers.format_many([1, '14', 'fac-1'], target_lang = 'ar') == ['١', '١٤', '']
+  assert numbers.format_many([3, 14], target_format = 'roman-lower') == ['iii', 'xiv']
+  assert numbers.format_many([7, 10], target_custom_numerals = list('abcdefghij')) == ['h', 'ba']
+  assert numbers.format_many(['5'], target_format = 'decimal-int') == [5]
+  assert numbers.format_many([5], target_format = 'unknown') == ['']
+  assert numbers.parse_many(['XIV', '十四', '፲፬', '14', '']) == ['XIV', 14, 14, 14, None]
+  assert numbers.parse_many(['XIV', 'c'], advanced_conversion_types = ['roman', 'alphabet']) == [14, 100]
@@ -0,0 +1,63 @@
+# Python standard libraries
+import sys
+import json
+
+# Internal imports
+from scripturelookup import lookup, profiling, command_line
+
+
+# While profiling is enabled, each stage's calls, cache hits, and the slowest inputs are recorded
+def test_profile_records_stages_and_cache_hits():
+  lookup.get_label('John 3:16')
+  with profiling.profile(slow_input_count = 2) as profiler:
+    assert profiling.profiler is profiler
+    lookup.get_label('John 3:16; Alma 32:21')
+    lookup.get_church_url('Alma 32:21')
+    lookup.get_label('Ether 12:27')
+  assert profiling.profiler is None
+  
+  stats = profiler.get_stats()
+  assert stats['stages']['parse_references_string']['calls'] == 3
+  assert stats['stages']['label']['calls'] == 2
+  assert stats['stages']['church_url']['calls'] == 1
+  assert stats['stages']['parse/roman_numerals']['calls'] == 3
+  assert all(stage_stats['total_ms'] >= 0 for stage_stats in stats['stages'].values())
+  assert stats['caches']['lookup.get_parser_tables']['misses'] == 0
+  assert stats['caches']['lookup.get_parser_tables']['hit_rate'] == 1.0
+  assert len(stats['slow_inputs']) == 2
+  assert {sample['input'] for sample in stats['slow_inputs']} <= {'John 3:16; Alma 32:21', 'Alma 32:21', 'Ether 12:27'}
+  assert stats['slow_inputs'][0]['ms'] >= stats['slow_inputs'][1]['ms']
+
+
+# Nothing is recorded while profiling is disabled, including by a profiler that was stopped
+def test_disabled_profiling_records_nothing():
+  assert profiling.profiler is None
+  lookup.get_label('John 3:16')
+  
+  profiler = profiling.enable()
+  lookup.get_label('John 3:16')
+  assert profiling.disable() is profiler
+  stats = profiler.get_stats()
+  lookup.get_label('John 3:16; Alma 32:21')
+  lookup.get_church_uri('Alma 32:21')
+  assert profiler.get_stats()['stages'] == stats['stages']
+  assert profiler.get_stats()['slow_inputs'] == stats['slow_inputs']
+  assert profiling.disable() is None
+  
+  # Profiles can be nested, and the outer profiler is restored afterwards
+  with profiling.profile() as outer_profiler:
+    with profiling.profile() as inner_profiler:
+      lookup.get_label('John 3:16')
+    assert profiling.profiler is outer_profiler
+  assert 'label' in inner_profiler.get_stats()['stages']
+  assert outer_profiler.get_stats()['stages'] == {}
+
+
+# --profile writes the stats to stderr as JSON, after the results on stdout
+def test_profile_command_line_option(capsys, monkeypatch):
+  monkeypatch.setattr(sys, 'argv', ['scripturelookup', 'get_label', 'John 3:16', '--profile'])
+  command_line.main_cli()
+  captured = capsys.readouterr()
+  assert captured.out == 'John\xa03:16\n'
+  assert json.loads(captured.err)['stages']['label']['calls'] == 1
+  assert profiling.profiler is None
@@ -0,0 +1,128 @@
+# Python standard libraries
+import json
+import threading
+import urllib.error
+import urllib.request
+
+# Third-party libraries
+import pytest
+
+# Internal imports
+from scripturelookup import data, server
+
+
+@pytest.fixture
+def lookup_server():
+  lookup_server = server.make_server(port = 0, warm_langs = ('en', 'fr'), quiet = True)
+  lookup_server.url = f'http://127.0.0.1:{lookup_server.server_address[1]}'
+  threading.Thread(target = lookup_server.serve_forever, daemon = True).start()
+  yield lookup_server
+  lookup_server.shutdown()
+  lookup_server.server_close()
+
+
+# Make a request (POST if there's a body), and return (status, JSON response)
+def request(lookup_server, path, body = None):
+  request_body = json.dumps(body).encode('utf-8') if isinstance(body, dict) else body
+  http_request = urllib.request.Request(lookup_server.url + path, data = request_body, method = 'GET' if body is None else 'POST')
+  try:
+    with urllib.request.urlopen(http_request) as response:
+      return response.status, json.loads(response.read())
+  except urllib.error.HTTPError as e:
+    return e.code, json.loads(e.read())
+
+
+def test_health(lookup_server):
+  assert request(lookup_server, '/') == (200, {'status': 'ok'})
+  assert request(lookup_server, '/health') == (200, {'status': 'ok'})
+
+
+# Options are query parameters for GET requests (booleans as strings), and JSON values for POST requests
+def test_command_options(lookup_server):
+  assert request(lookup_server, '/get_label?input=John+3:16') == (200, {'result': 'John\xa03:16'})
+  assert request(lookup_server, '/get_label?input=John+3:16&lang=fr&abbreviated=true') == (200, {'result': 'Jn 3:16'})
+  assert request(lookup_server, '/get_label?input=John+3:16&abbreviated=false') == (200, {'result': 'John\xa03:16'})
+  assert request(lookup_server, '/get_label', {'input': 'John 3:17; John 3:16', 'merge': True, 'separator': '|'}) == (200, {'result': 'John\xa03:16–17'})
+  assert request(lookup_server, '/get_label', {'input': 'John 3:17; Alma 1', 'sort_by': 'label', 'separator': '|'}) == (200, {'result': 'Alma\xa01|John\xa03:17'})
+  
+  status, response = request(lookup_server, '/get_reference_objects?input=Alma+32:21')
+  assert status == 200
+  assert response['result'][0]['book_slug'] == 'alma'
+  assert response['result'][0]['chapter'] == 32
+  status, response = request(lookup_server, '/get_langs')
+  assert status == 200
+  assert 'en' in response['result'] and 'fr' in response['result']
+
+
+def test_command_errors(lookup_server):
+  assert request(lookup_server, '/get_label?input=John+3:16&color=red') == (400, {'error': 'Unknown option: color'})
+  assert request(lookup_server, '/get_label', {'input': 'John 3:16', 'lang': 5}) == (400, {'error': 'Option “lang” must be a string'})
+  assert request(lookup_server, '/get_label') == (400, {'error': '“input” must be a string'})
+  assert request(lookup_server, '/unknown?input=John+3:16') == (404, {'error': 'Unknown command: unknown'})
+  assert request(lookup_server, '/get_label', b'{not json')[0] == 400
+  assert request(lookup_server, '/get_label', b'[1, 2]') == (400, {'error': 'Request body must be a JSON object'})
+  assert request(lookup_server, '/batch') == (405, {'error': 'Use POST for batches'})
+  assert request(lookup_server, '/reload') == (405, {'error': 'Use POST to reload metadata'})
+
+
+# Each input in a batch gets its own result or error, in input order, and can have its own options
+def test_batch(lookup_server):
+  status, response = request(lookup_server, '/batch', {
+    'command': 'get_label',
+    'lang': 'fr',
+    'inputs': ['John 3:16', {'input': 'John 3:16', 'lang': 'en'}, 42, {'input': 'John 3:16', 'color': 'red'}, {'input': 'Jean 3:16', 'abbreviated': True}],
+  })
+  assert status == 200
+  assert response == {'results': [
+    {'result': 'Jean 3:16'},
+    {'result': 'John\xa03:16'},
+    {'error': '“input” must be a string'},
+    {'error': 'Unknown option: color'},
+    {'result': 'Jn 3:16'},
+  ]}
+  assert request(lookup_server, '/batch', {'command': 'get_label', 'inputs': 'John 3:16'}) == (400, {'error': '“inputs” must be a list'})
+  assert request(lookup_server, '/batch', {'command': 'unknown', 'inputs': []}) == (404, {'error': 'Unknown command: unknown'})
+  assert request(lookup_server, '/batch', {'command': 'get_label', 'inputs': [''] * (server.max_batch_size + 1)})[0] == 413
+
+
+# Stats have the number of requests and latency percentiles for each known endpoint
+def test_stats(lookup_server):
+  for i in range(10):
+    request(lookup_server, f'/get_label?input=John+3:{i + 1}')
+  request(lookup_server, '/health')
+  request(lookup_server, '/unknown')
+  
+  status, stats = request(lookup_server, '/stats')
+  assert status == 200
+  assert set(stats['endpoints']) == {'get_label', 'health'}
+  endpoint_stats = stats['endpoints']['get_label']
+  assert endpoint_stats['count'] == 10
+  assert 0 <= endpoint_stats['p50_ms'] <= endpoint_stats['p90_ms'] <= endpoint_stats['p99_ms'] <= endpoint_stats['max_ms']
+  assert stats['endpoints']['health']['count'] == 1
+  assert stats['uptime_seconds'] >= 0
+
+
+def test_percentiles():
+  values = list(range(1, 101))
+  assert [server.get_percentile(values, percentile) for percentile in (0, 50, 90, 99, 100)] == [1, 51, 91, 100, 100]
+  assert server.get_percentile([], 50) == 0
+
+
+def test_reload(lookup_server, metadata_server):
+  assert request(lookup_server, '/reload', {}) == (200, {'changed': False})
+  assert request(lookup_server, '/reload', {'force': True}) == (200, {'changed': False})
+  
+  scriptures = json.loads(metadata_server.files['metadata-scriptures.min.json'])
+  scriptures['languages']['en']['translatedNames']['alma']['name'] = 'Almah'
+  metadata_server.files['metadata-scriptures.min.json'] = json.dumps(scriptures, ensure_ascii=False).encode('utf-8')
+  assert request(lookup_server, '/reload', {}) == (200, {'changed': True})
+  assert request(lookup_server, '/get_label?input=Alma+32:21') == (200, {'result': 'Almah\xa032:21'})
+  
+  # Invalid metadata isn't used
+  current_metadata = data.metadata
+  metadata_server.files['metadata-scriptures.min.json'] = b'{not json'
+  status, response = request(lookup_server, '/reload', {})
+  assert status == 502
+  assert response['error'].startswith('Invalid metadata: metadata-scriptures.min.json isn’t valid JSON')
+  assert data.metadata is current_metadata
+  assert request(lookup_server, '/get_label?input=Alma+32:21') == (200, {'result': 'Almah\xa032:21'})
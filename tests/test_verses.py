@@ -0,0 +1,82 @@
+# Third-party libraries
+import pytest
+
+# Internal imports
+from scripturelookup import lookup
+from scripturelookup.verses import VerseRangeSet
+
+
+def make_reference(chapter, verse_ranges = (), book_slug = 'alma'):
+  return lookup.Reference(publication_slug = 'book-of-mormon', book_slug = book_slug, chapter = chapter, verse_ranges = verse_ranges)
+
+
+# Ranges that overlap or are next to each other are merged
+def test_verse_range_set_merges_adjacent_and_overlapping_ranges():
+  assert VerseRangeSet([(5, 7), (1, 2), (3, 3), (6, 9)]).ranges == ((1, 3), (5, 9))
+  assert (VerseRangeSet([(1, 3)]) | VerseRangeSet([(4, 6)])).ranges == ((1, 6),)
+  assert (VerseRangeSet([(1, 5)]) | VerseRangeSet([(3, 8), (10, 10)])).ranges == ((1, 8), (10, 10))
+  assert (VerseRangeSet([(1, 3)]) | VerseRangeSet([(5, 6)])).ranges == ((1, 3), (5, 6))
+  assert len(VerseRangeSet([(1, 5), (3, 8)])) == 8
+
+
+# Removing verses from the middle of a range splits it
+def test_verse_range_set_difference_splits_ranges():
+  assert (VerseRangeSet([(1, 10)]) - VerseRangeSet([(4, 6)])).ranges == ((1, 3), (7, 10))
+  assert (VerseRangeSet([(1, 10)]) - VerseRangeSet([(1, 2), (10, 12)])).ranges == ((3, 9),)
+  assert not VerseRangeSet([(3, 4)]) - VerseRangeSet([(1, 10)])
+  assert (VerseRangeSet([(1, 5), (8, 9)]) & VerseRangeSet([(4, 8)])).ranges == ((4, 5), (8, 8))
+
+
+def test_verse_range_set_containment():
+  verse_range_set = VerseRangeSet([(1, 3), (7, 9), ('9a', '9a')])
+  assert 2 in verse_range_set and 8 in verse_range_set and '9a' in verse_range_set
+  assert 5 not in verse_range_set and '9b' not in verse_range_set
+  assert verse_range_set.issuperset(VerseRangeSet([(1, 2), (8, 9)]))
+  assert not verse_range_set.issuperset(VerseRangeSet([(3, 7)]))
+  assert verse_range_set.overlaps(VerseRangeSet([(3, 7)]))
+  assert not verse_range_set.overlaps(VerseRangeSet([(4, 6)]))
+
+
+# Whole-number verses in a range that ends (or starts) with a partial verse are part of the interval set
+def test_verse_range_set_mixed_ranges():
+  verse_range_set = VerseRangeSet([(7, '9a')])
+  assert verse_range_set.ranges == ((7, 8),)
+  assert verse_range_set.other_verses == {'9a'}
+  assert 7 in verse_range_set and 8 in verse_range_set and 9 not in verse_range_set
+  assert VerseRangeSet([('7b', 9)]).ranges == ((8, 9),)
+  assert VerseRangeSet([(10, 'fac-1')]).ranges == ((10, 10),)
+  assert (VerseRangeSet([(7, '9a')]) | VerseRangeSet([(5, 6)])).ranges == ((5, 8),)
+
+
+def test_reference_set_operations_in_one_chapter():
+  assert (make_reference(32, [(1, 3)]) | make_reference(32, [(4, 6)])).verse_ranges == ((1, 6),)
+  assert (make_reference(32, [(1, 10)]) - make_reference(32, [(4, 6)])).verse_ranges == ((1, 3), (7, 10))
+  assert (make_reference(32, [(1, 5)]) & make_reference(32, [(4, 8)])).verse_ranges == ((4, 5),)
+  assert make_reference(32, [(1, 5)]) & make_reference(32, [(6, 8)]) is None
+  assert make_reference(32, [(1, 5)]) - make_reference(32, [(1, 8)]) is None
+  assert make_reference(32, [(2, 3)]) in make_reference(32, [(1, 5)])
+  assert make_reference(32, [(4, 6)]) not in make_reference(32, [(1, 5)])
+
+
+# References in different chapters only combine when one covers the other (a whole chapter or book)
+def test_reference_set_operations_across_chapters():
+  verses_32 = make_reference(32, [(21, 23)])
+  verses_33 = make_reference(33, [(1, 2)])
+  with pytest.raises(ValueError):
+    verses_32 | verses_33
+  assert verses_32 & verses_33 is None
+  assert verses_32 - verses_33 == verses_32
+  assert verses_33 not in verses_32
+  
+  chapter_32 = make_reference(32)
+  assert verses_32 in chapter_32 and verses_33 not in chapter_32
+  assert chapter_32 | verses_32 == chapter_32
+  assert verses_32 & chapter_32 == verses_32
+  assert verses_32 - chapter_32 is None
+  with pytest.raises(ValueError):
+    chapter_32 - verses_32
+  
+  book = make_reference(None)
+  assert verses_33 in book
+  assert make_reference(1, [(1, 1)], book_slug = 'ether') not in book
+  assert lookup.merge_references([verses_32, verses_33, make_reference(32, [(24, 25)])]) == [make_reference(32, [(21, 25)]), verses_33]